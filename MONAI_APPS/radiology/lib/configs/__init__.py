@@ -1,18 +1,25 @@
 # __init__.py - lib/configs
-from .deepedit import DeepEdit
-from .deepedit_weld import DeepEditWeld
-from .deepgrow_2d import Deepgrow2D
-from .deepgrow_3d import Deepgrow3D
-from .localization_spine import LocalizationSpine
-from .localization_vertebra import LocalizationVertebra
-from .segmentation import Segmentation
-from .segmentation_spleen import SegmentationSpleen
-from .segmentation_vertebra import SegmentationVertebra
-from .sw_fastedit import SWFastEditConfig
+# Config classes are imported on first access (PEP 562): importing lib.configs does not load every model module.
+import importlib
+
+from .registry import ConfigSpec, LazyTask, LazyTaskConfig, TaskManifest, discover_configs, source_stamp, task_stamp
+
+_EXPORTS = {
+    "DeepEdit": "deepedit",
+    "DeepEditWeldConfig": "deepedit_weld",
+    "Deepgrow2D": "deepgrow_2d",
+    "Deepgrow3D": "deepgrow_3d",
+    "LocalizationSpine": "localization_spine",
+    "LocalizationVertebra": "localization_vertebra",
+    "Segmentation": "segmentation",
+    "SegmentationSpleen": "segmentation_spleen",
+    "SegmentationVertebra": "segmentation_vertebra",
+    "SWFastEditConfig": "sw_fastedit",
+}
 
 __all__ = [
     "DeepEdit",
-    "DeepEditWeld",
+    "DeepEditWeldConfig",
     "Deepgrow2D",
     "Deepgrow3D",
     "LocalizationSpine",
@@ -21,4 +28,19 @@ __all__ = [
     "SegmentationSpleen",
     "SegmentationVertebra",
     "SWFastEditConfig",
+    "ConfigSpec",
+    "LazyTask",
+    "LazyTaskConfig",
+    "TaskManifest",
+    "discover_configs",
+    "source_stamp",
+    "task_stamp",
 ]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(f"{__name__}.{_EXPORTS[name]}"), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
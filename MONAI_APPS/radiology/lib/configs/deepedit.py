@@ -1,42 +1,98 @@
-from monailabel.interfaces.tasks.infer import InferTask
-from monailabel.interfaces.tasks.train import TrainTask
-from monailabel.tasks.infer.basic_infer import BasicInferTask
-from monai.transforms import (
-    LoadImaged,
-    EnsureChannelFirstd,
-    SaveImaged,
-    Compose
-)
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
 import logging
+import os
+from typing import Any, Dict, Optional, Union
+
+import lib.infers
+import lib.trainers
+from monai.networks.nets import DynUNet
+
+from monailabel.interfaces.config import TaskConfig
+from monailabel.interfaces.tasks.infer_v2 import InferTask
+from monailabel.interfaces.tasks.train import TrainTask
+from monailabel.utils.others.generic import strtobool
 
 logger = logging.getLogger(__name__)
 
-class DeepEdit:
+
+class DeepEdit(TaskConfig):
     """
-    Versión mínima funcional del modelo DeepEdit
+    DeepEdit model for weld defects (DynUNet, intensity + one click channel per label)
     """
 
-    def __init__(self):
-        self.path = None
-        logger.info("✅ DeepEdit inicializado correctamente")
-
-    def infer(self) -> InferTask:
-        # Define la tarea de inferencia
-        return BasicInferTask(
-            path=None,  # Aquí podrías luego poner tu modelo entrenado .pt
-            network=None,
-            labels={"background": 0, "defect": 1},
-            load_strict=False,
-            pre_transforms=Compose([
-                LoadImaged(keys=["image"]),
-                EnsureChannelFirstd(keys=["image"]),
-            ]),
-            post_transforms=Compose([
-                SaveImaged(keys="pred", output_dir="./", output_postfix="pred", output_ext=".nii.gz"),
-            ])
+    def init(self, name: str, model_dir: str, conf: Dict[str, str], planner: Any, **kwargs):
+        super().init(name, model_dir, conf, planner, **kwargs)
+
+        self.labels = {"background": 0, "defect": 1}
+
+        # Number of input channels (intensity)
+        self.number_intensity_ch = 1
+
+        # Model Files
+        self.path = [
+            os.path.join(self.model_dir, f"pretrained_{self.name}.pt"),  # pretrained
+            os.path.join(self.model_dir, f"{self.name}.pt"),  # published
+        ]
+
+        self.target_spacing = (1.0, 1.0, 1.0)  # target space for image
+        self.spatial_size = (128, 128, 64)  # train input size
+
+        # Network
+        self.network = DynUNet(
+            spatial_dims=3,
+            in_channels=len(self.labels) + self.number_intensity_ch,
+            out_channels=len(self.labels),
+            kernel_size=[3, 3, 3, 3, 3, 3],
+            strides=[1, 2, 2, 2, 2, [2, 2, 1]],
+            upsample_kernel_size=[2, 2, 2, 2, [2, 2, 1]],
+            norm_name="instance",
+            deep_supervision=False,
+            res_block=True,
         )
 
-    def trainer(self) -> TrainTask:
-        # Este modelo no entrena (placeholder)
-        logger.info("⚠️ DeepEdit: entrenamiento no implementado")
-        return None
+    def infer(self) -> Union[InferTask, Dict[str, InferTask]]:
+        task: InferTask = lib.infers.DeepEdit(
+            path=self.path,
+            network=self.network,
+            labels=self.labels,
+            preload=strtobool(self.conf.get("preload", "false")),
+            spatial_size=self.spatial_size,
+            target_spacing=self.target_spacing,
+            number_intensity_ch=self.number_intensity_ch,
+            config={"cache_transforms": True, "cache_transforms_in_memory": True, "cache_transforms_ttl": 300},
+        )
+        return task
+
+    def trainer(self) -> Optional[TrainTask]:
+        output_dir = os.path.join(self.model_dir, self.name)
+        load_path = self.path[0] if os.path.exists(self.path[0]) else self.path[1]
+
+        task: TrainTask = lib.trainers.DeepEdit(
+            model_dir=output_dir,
+            network=self.network,
+            load_path=load_path,
+            publish_path=self.path[1],
+            spatial_size=self.spatial_size,
+            target_spacing=self.target_spacing,
+            number_intensity_ch=self.number_intensity_ch,
+            # resize (whole volume, as the infer task) | label (label-balanced crops at native resolution)
+            sampling=self.conf.get("sampling", "resize"),
+            num_samples=int(self.conf.get("num_samples", "4")),  # crops per loaded volume (sampling=label)
+            cpu_workers=int(self.conf.get("cpu_workers", "0")),  # > 1: CPU data parallel (gloo)
+            precision=self.conf.get("precision", "fp32"),  # fp32 | bf16 | auto
+            config={"pretrained": os.path.exists(self.path[0])},
+            labels=self.labels,
+            debug_mode=False,
+            find_unused_parameters=True,
+        )
+        return task
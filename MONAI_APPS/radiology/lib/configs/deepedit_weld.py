@@ -1,32 +1,74 @@
-from monailabel.interfaces.tasks.infer import InferTask
-from monailabel.interfaces.tasks.train import TrainTask
-from monailabel.tasks.infer.basic_infer import BasicInferTask
-from monai.transforms import LoadImaged, EnsureChannelFirstd, SaveImaged, Compose
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
 import logging
+import os
+from typing import Any, Dict, Optional, Union
+
+import lib.infers
+import lib.trainers
+from lib.networks import weld_unet
+
+from monailabel.interfaces.config import TaskConfig
+from monailabel.interfaces.tasks.infer_v2 import InferTask
+from monailabel.interfaces.tasks.train import TrainTask
+from monailabel.utils.others.generic import strtobool
 
 logger = logging.getLogger(__name__)
 
-class DeepEditWeld(BasicInferTask):
-    """
-    Versión funcional mínima de DeepEditWeld
-    """
-
-    def __init__(self):
-        super().__init__(
-            path=None,  # Puedes dejarlo None si no hay modelo entrenado aún
-            network=None,
-            labels={"background": 0, "defect": 1},
-            load_strict=False
+
+class DeepEditWeldConfig(TaskConfig):
+    def init(self, name: str, model_dir: str, conf: Dict[str, str], planner: Any, **kwargs):
+        super().init(name, model_dir, conf, planner, **kwargs)
+
+        self.labels = {"background": 0, "defect": 1}
+
+        # Model Files: Annex A checkpoint; exported artifacts (.onnx / .ts / .int8.onnx) live next to it
+        self.path = [os.path.join(self.model_dir, self.conf.get("weld_model", "best_metric_model.pth"))]
+
+        self.roi_size = tuple(json.loads(self.conf.get("weld_roi_size", "[64, 64, 64]")))
+
+        # Network
+        self.network = weld_unet()
+
+    def infer(self) -> Union[InferTask, Dict[str, InferTask]]:
+        task: InferTask = lib.infers.DeepEditWeld(
+            path=self.path[0],
+            runtime=self.conf.get("runtime", "auto"),  # auto | onnx | int8 | torchscript | eager
+            threads=int(self.conf.get("threads", "0")),
+            roi_size=self.roi_size,
+            precision=self.conf.get("precision", "fp32"),  # fp32 | bf16 | auto
+        )
+        return task
+
+    def trainer(self) -> Optional[TrainTask]:
+        output_dir = os.path.join(self.model_dir, self.name)
+
+        task: TrainTask = lib.trainers.DeepEditWeld(
+            model_dir=output_dir,
+            network=self.network,
+            roi_size=self.roi_size,
+            load_path=self.path[0],
+            publish_path=self.path[0],
+            description="Train weld defect segmentation model",
+            labels=self.labels,
+            load_strict=False,
+            cpu_workers=int(self.conf.get("cpu_workers", "0")),  # > 1: CPU data parallel (gloo)
+            precision=self.conf.get("precision", "fp32"),
+            preprocess_cache=(
+                os.path.join(output_dir, "preprocess_cache")
+                if strtobool(self.conf.get("preprocess_cache", "true"))
+                else None
+            ),
+            config={"dataset": ["PersistentDataset", "CacheDataset", "SmartCacheDataset", "Dataset"]},
         )
-        logger.info("✅ DeepEditWeld inicializado correctamente")
-
-    def pre_transforms(self):
-        return Compose([
-            LoadImaged(keys=["image"]),
-            EnsureChannelFirstd(keys=["image"]),
-        ])
-
-    def post_transforms(self):
-        return Compose([
-            SaveImaged(keys="pred", output_dir="./", output_postfix="pred", output_ext=".nii.gz"),
-        ])
+        return task
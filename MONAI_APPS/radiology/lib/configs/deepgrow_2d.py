@@ -82,6 +82,7 @@ class Deepgrow2D(TaskConfig):
             description="Train 2D Deepgrow model",
             dimension=2,
             labels=self.labels,
+            cpu_workers=int(self.conf.get("cpu_workers", "0")),  # > 1: CPU data parallel (gloo)
             roi_size=(256, 256),
             model_size=(256, 256),
             max_train_interactions=10,
@@ -84,6 +84,7 @@ class Deepgrow3D(TaskConfig):
             description="Train 3D Deepgrow model",
             dimension=3,
             labels=self.labels,
+            cpu_workers=int(self.conf.get("cpu_workers", "0")),  # > 1: CPU data parallel (gloo)
             roi_size=(128, 192, 192),
             model_size=(128, 192, 192),
             max_train_interactions=15,
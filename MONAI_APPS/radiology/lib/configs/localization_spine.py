@@ -108,5 +108,6 @@ class LocalizationSpine(TaskConfig):
             publish_path=self.path[1],
             description="Train spine localization Model",
             labels=self.labels,
+            cpu_workers=int(self.conf.get("cpu_workers", "0")),  # > 1: CPU data parallel (gloo)
         )
         return task
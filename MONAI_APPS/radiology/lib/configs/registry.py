@@ -0,0 +1,430 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import ast
+import hashlib
+import importlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from monailabel.interfaces.exception import MONAILabelError, MONAILabelException
+from monailabel.interfaces.tasks.infer_v2 import InferType
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigSpec(NamedTuple):
+    module: str
+    cls: str
+    path: str = ""
+    description: str = ""
+    labels: Any = None
+    infer_type: Optional[str] = None
+    dimension: int = 3
+
+
+def _base_name(node: ast.expr) -> Optional[str]:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def discover_configs(
+    package_dir: str, package: str = "lib.configs", infers_dir: Optional[str] = None
+) -> Dict[str, ConfigSpec]:
+    """
+    ``TaskConfig`` subclasses of the modules of ``package_dir``, found by parsing their sources (AST) instead of
+    importing them: name (module name, lower case) => module/class.  Subclasses of other configs of the package
+    are found too; if a module defines several, the last one (by class name) is used, as ``inspect.getmembers``.
+
+    The spec also carries what ``/info`` shows before the task is built: literal labels of ``init`` and the type
+    and dimension of the ``lib.infers`` task created by ``infer()`` (call arguments, else the defaults of the
+    infer task class in ``infers_dir``, by default the ``infers`` package next to ``package_dir``).
+    """
+    classes = _parse_classes(package_dir)
+    infer_classes = _parse_classes(infers_dir or os.path.join(os.path.dirname(package_dir), "infers"))
+
+    def is_config(name, seen=()):
+        if name == "TaskConfig":
+            return True
+        if name not in classes or name in seen:
+            return False
+        return any(is_config(b, (*seen, name)) for b in classes[name][1])
+
+    configs: Dict[str, ConfigSpec] = {}
+    for name in sorted(classes):
+        module, _, path, node = classes[name]
+        if name != "TaskConfig" and is_config(name):
+            doc = (ast.get_docstring(node) or "").strip().split("\n")[0]
+            infer_type, dimension = _infer_type(node, infer_classes)
+            spec = ConfigSpec(f"{package}.{module}", name, path, doc, _literal_labels(node), infer_type, dimension)
+            configs[module.lower()] = spec
+    return dict(sorted(configs.items()))
+
+
+def _parse_classes(package_dir: str) -> Dict[str, Any]:
+    """Top level classes of the modules of ``package_dir``: name => (module, base names, path, node)."""
+    classes: Dict[str, Any] = {}
+    if not os.path.isdir(package_dir):
+        return classes
+    for file in sorted(os.listdir(package_dir)):
+        module, ext = os.path.splitext(file)
+        if ext != ".py" or module.startswith("_"):
+            continue
+        try:
+            with open(os.path.join(package_dir, file), encoding="utf-8") as fp:
+                tree = ast.parse(fp.read(), filename=file)
+        except (OSError, SyntaxError) as e:
+            logger.warning(f"  -> Could not parse module {module}: {e}")
+            continue
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef):
+                bases = [_base_name(b) for b in node.bases]
+                classes[node.name] = (module, bases, os.path.join(package_dir, file), node)
+    return classes
+
+
+def _infer_type(node: ast.ClassDef, infer_classes: Dict[str, Any]):
+    """
+    ``(type, dimension)`` of the first ``lib.infers.<Task>(...)`` created by the ``infer`` method of a config class:
+    keyword arguments of the call, else the ``type`` / ``dimension`` of ``<Task>.__init__`` (parameter defaults or
+    literal arguments of its ``super().__init__``).  Type None if not found (the task is described once built).
+    """
+    call = None
+    for item in node.body:
+        if isinstance(item, ast.FunctionDef) and item.name == "infer":
+            calls = [c for c in ast.walk(item) if isinstance(c, ast.Call) and isinstance(c.func, ast.Attribute)]
+            call = next((c for c in calls if _base_name(c.func.value) == "infers"), None)
+    if call is None:
+        return None, 3
+
+    values: Dict[str, ast.expr] = {}
+    cls = infer_classes.get(call.func.attr)
+    for item in cls[3].body if cls else []:
+        if isinstance(item, ast.FunctionDef) and item.name == "__init__":
+            args = item.args.args[len(item.args.args) - len(item.args.defaults) :]
+            values.update((a.arg, d) for a, d in zip(args, item.args.defaults))
+            for sub in ast.walk(item):
+                if isinstance(sub, ast.Call) and isinstance(sub.func, ast.Attribute) and sub.func.attr == "__init__":
+                    values.update((k.arg, k.value) for k in sub.keywords if not isinstance(k.value, ast.Name))
+    values.update((k.arg, k.value) for k in call.keywords if k.arg)
+
+    infer_type, dimension = values.get("type"), values.get("dimension")
+    if isinstance(infer_type, ast.Attribute) and _base_name(infer_type.value) == "InferType":
+        infer_type = getattr(InferType, infer_type.attr, None)
+    else:
+        infer_type = infer_type.value if isinstance(infer_type, ast.Constant) else None
+    dimension = dimension.value if isinstance(dimension, ast.Constant) else 3
+    return infer_type, dimension
+
+
+def _literal_labels(node: ast.ClassDef) -> Any:
+    """``self.labels = <literal>`` of the ``init`` of a config class (None if not a literal)."""
+    for item in node.body:
+        if isinstance(item, ast.FunctionDef) and item.name == "init":
+            for stmt in ast.walk(item):
+                if not isinstance(stmt, ast.Assign) or len(stmt.targets) != 1:
+                    continue
+                target = stmt.targets[0]
+                if isinstance(target, ast.Attribute) and target.attr == "labels":
+                    try:
+                        return ast.literal_eval(stmt.value)
+                    except ValueError:
+                        return None
+    return None
+
+
+def source_stamp(*paths: str) -> str:
+    """Stamp of the python sources under ``paths`` (size + mtime): any code change describes the tasks again."""
+    h = hashlib.sha1()
+    for root in paths:
+        if os.path.isfile(root):
+            st = os.stat(root)
+            h.update(f"{root}:{st.st_size}:{st.st_mtime_ns}".encode())
+        for folder, dirs, files in sorted(os.walk(root)):
+            dirs[:] = sorted(d for d in dirs if not d.startswith((".", "__")))
+            for file in sorted(f for f in files if f.endswith(".py")):
+                st = os.stat(os.path.join(folder, file))
+                h.update(f"{folder}/{file}:{st.st_size}:{st.st_mtime_ns}".encode())
+    return h.hexdigest()
+
+
+def task_stamp(*parts: Any) -> str:
+    """Manifest stamp of a task: hash of what its description depends on (config, code stamp, conf, ...)."""
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _jsonable(value: Any) -> Any:
+    return json.loads(json.dumps(value, default=str))
+
+
+class TaskManifest:
+    """
+    What ``/info`` needs of the tasks of the app (``info()``, model files of ``is_valid()``, train stats file),
+    saved in a JSON file when a task is built so that later runs answer ``/info`` without building anything.
+    Entries are kept per task and kind (infer / train) with the stamp they were made with (config source, app
+    code and conf); an entry with another stamp is ignored until the task is built again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path) as fc:
+                self._entries: Dict[str, Any] = json.load(fc)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def get(self, key: str, stamp: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        return entry if entry and entry.get("stamp") == stamp else None
+
+    def put(self, key: str, stamp: str, entry: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = {**entry, "stamp": stamp}
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(tmp, "w") as fc:
+                    json.dump(self._entries, fc, indent=2)
+                os.replace(tmp, self.path)
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning(f"Task manifest: could not save {key}: {e}")
+
+
+def describe_task(task: Any, kind: str) -> Dict[str, Any]:
+    """Manifest entry of a built task (None: the config has no such task)."""
+    if task is None:
+        return {"available": False}
+    entry: Dict[str, Any] = {"available": True, "info": _jsonable(task.info())}
+    if kind == "infer":
+        paths = getattr(task, "path", None)
+        paths = [paths] if isinstance(paths, str) else [p for p in paths or [] if isinstance(p, str)]
+        # valid without model files (network given, scribbles): always; otherwise checked again on every /info
+        static = task.is_valid() and not any(os.path.exists(p) for p in paths)
+        entry.update({"valid": bool(static), "paths": paths})
+    else:
+        stats_path = getattr(task, "_stats_path", None)
+        entry["stats_path"] = stats_path if isinstance(stats_path, str) else None
+    return entry
+
+
+class LazyTaskConfig:
+    """
+    ``TaskConfig`` imported, instantiated and initialized (``init``) on first use; attributes not defined here are
+    the ones of the built config (e.g. ``labels``, ``infer()``).  ``get()`` raises if the config can not be built.
+    """
+
+    def __init__(self, name: str, spec: ConfigSpec, model_dir: str, conf: Dict[str, str], planner: Any):
+        self.name = name
+        self.spec = spec
+        self.model_dir = model_dir
+        self.conf = conf
+        self.planner = planner
+        self._config = None
+        self._lock = threading.Lock()
+
+    @property
+    def built(self) -> bool:
+        return self._config is not None
+
+    @property
+    def labels(self):
+        # literal labels of the config source until it is built (e.g. scribbles labels)
+        if self._config is None and self.spec.labels is not None:
+            return self.spec.labels
+        return self.get().labels
+
+    def stamp(self, code: str) -> str:
+        """Manifest stamp of the tasks of this config: config class, app code (``source_stamp``) and conf."""
+        conf = {k: v for k, v in self.conf.items() if k != "models"}
+        return task_stamp(self.spec.module, self.spec.cls, code, self.model_dir, conf)
+
+    def describe(self, kind: str) -> Optional[Dict[str, Any]]:
+        """
+        ``info()`` of a task of this config known without importing it (first run, before any manifest); None when
+        the source does not tell (labels set from the conf, no ``lib.infers`` task): the task is built to answer.
+        """
+        if self.spec.labels is None or kind == "infer" and self.spec.infer_type is None:
+            return None
+        description = self.spec.description or f"{self.spec.cls} ({self.name})"
+        if kind == "train":
+            return {"description": description, "config": {}, "labels": self.spec.labels}
+        return {
+            "type": self.spec.infer_type,
+            "labels": self.spec.labels,
+            "dimension": self.spec.dimension,
+            "description": description,
+            "config": {},
+        }
+
+    def get(self):
+        with self._lock:
+            if self._config is None:
+                logger.info(f"+++ Adding Model: {self.name} => {self.spec.module}.{self.spec.cls}")
+                config = getattr(importlib.import_module(self.spec.module), self.spec.cls)()
+                if hasattr(config, "init"):
+                    config.init(self.name, self.model_dir, self.conf, self.planner)
+                self._config = config
+            return self._config
+
+    def __getattr__(self, item):
+        if item.startswith("__") or item in ("_config", "_lock"):
+            raise AttributeError(item)
+        return getattr(self.get(), item)
+
+
+class LazyTask:
+    """
+    Infer/train task (or strategy, scoring method) created by ``factory`` on first use: call or attribute access.
+
+    ``info()``, ``is_valid()``, ``config()``, ``stats()``, ``labels``, ``description``, ``type`` and ``get_path()``
+    are answered without building the task, from the ``manifest`` entry saved by an earlier build (same ``stamp``)
+    or else from ``describe`` (what is known of the config without importing it).  A task that can not be built
+    raises a ``MONAILabelException`` with the cause when it is requested.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        kind: str = "infer",
+        manifest: Optional[TaskManifest] = None,
+        stamp: str = "",
+        describe: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.factory = factory
+        self.kind = kind
+        self.manifest = manifest
+        self.stamp = stamp
+        self.describe = describe
+        self._task = None
+        self._error: Optional[str] = None
+        self._missing = False
+        self._built = False
+        self._lock = threading.Lock()
+
+    @property
+    def built(self) -> bool:
+        return self._built
+
+    def get(self):
+        with self._lock:
+            if not self._built:
+                try:
+                    self._task = self.factory()
+                    if self._task is None:
+                        self._missing, self._error = True, f"the model has no {self.kind} task"
+                    if self.manifest is not None:
+                        self.manifest.put(f"{self.kind}:{self.name}", self.stamp, describe_task(self._task, self.kind))
+                except Exception as e:
+                    logger.exception(f"Error creating task {self.name}: {e}")
+                    self._error = f"{type(e).__name__}: {e}"
+                self._built = True
+            return self._task
+
+    @property
+    def error(self) -> Optional[str]:
+        return self._error
+
+    @property
+    def available(self) -> bool:
+        """False only if the config is known (built / manifest) to have no such task."""
+        if self._built:
+            return not self._missing
+        entry = self._entry()
+        return entry is None or entry.get("available", True)
+
+    def _entry(self) -> Optional[Dict[str, Any]]:
+        return self.manifest.get(f"{self.kind}:{self.name}", self.stamp) if self.manifest is not None else None
+
+    def _described(self) -> Optional[Dict[str, Any]]:
+        entry = self._entry()
+        if entry is not None and entry.get("available"):
+            return entry
+        return {"info": self.describe} if self.describe is not None else None
+
+    def info(self) -> Dict[str, Any]:
+        if not self._built:
+            entry = self._described()
+            if entry is not None:
+                return entry["info"]
+        task = self.get()
+        if task is None:
+            # not buildable: still described (the error is reported when the task is requested)
+            return (self._described() or {"info": {"description": self._error, "config": {}}})["info"]
+        return task.info()
+
+    def is_valid(self) -> bool:
+        if self._built:
+            return self._task is not None and self._task.is_valid()
+        entry = self._entry()
+        if entry is None:
+            return self.describe is not None or self.get() is not None and self._task.is_valid()
+        return entry.get("available", False) and (entry["valid"] or any(os.path.exists(p) for p in entry["paths"]))
+
+    def get_path(self, validate=True):
+        entry = None if self._built else self._entry()
+        if entry is None or not entry.get("available"):
+            task = self.get()
+            return task.get_path(validate) if task is not None else None
+        for path in reversed(entry.get("paths") or []):
+            if path and (not validate or os.path.exists(path)):
+                return path
+        return None
+
+    def config(self) -> Dict[str, Any]:
+        return self.info().get("config", {})
+
+    def stats(self) -> Dict[str, Any]:
+        if self._built:
+            return self._task.stats() if self._task is not None else {}
+        entry = self._entry()
+        if entry is None or not entry.get("available"):
+            return {}  # not trained by this app yet (or not described yet)
+        stats_path = entry.get("stats_path")
+        if stats_path and os.path.exists(stats_path):
+            with open(stats_path) as fc:
+                return json.load(fc)
+        return {}
+
+    @property
+    def labels(self):
+        return self.info().get("labels", [])
+
+    @property
+    def description(self):
+        return self.info().get("description")
+
+    @property
+    def type(self):
+        return self.info().get("type")
+
+    def __call__(self, *args, **kwargs):
+        task = self.get()
+        if task is None:
+            error = f"Task {self.name} is not available: {self._error}"
+            raise MONAILabelException(MONAILabelError.APP_INIT_ERROR, error)
+        return task(*args, **kwargs)
+
+    def __getattr__(self, item):
+        if item.startswith("__") or item in ("_task", "_built", "_lock", "_error", "_missing", "manifest"):
+            raise AttributeError(item)
+        return getattr(self.get(), item)
+
+    def __repr__(self):
+        return f"LazyTask({self.name}, {'built: ' + repr(self._task) if self._built else 'not built'})"
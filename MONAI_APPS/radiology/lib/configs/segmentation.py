@@ -106,7 +106,14 @@ class Segmentation(TaskConfig):
             target_spacing=self.target_spacing,
             labels=self.labels,
             preload=strtobool(self.conf.get("preload", "false")),
-            config={"largest_cc": True if has_cp and has_cucim else False},
+            config={
+                "largest_cc": True if has_cp and has_cucim else False,
+                # eager | int8 (scripts/quantize_model.py) | onnx | torchscript (scripts/export_model.py)
+                "runtime": self.conf.get("runtime", "eager"),
+                "precision": self.conf.get("precision", "fp32"),  # fp32 | bf16 | auto
+                # read image.zarr next to the image when it exists (scripts/convert_chunked.py)
+                "chunked_store": strtobool(self.conf.get("chunked_store", "false")),
+            },
         )
         return task
 
@@ -123,5 +130,15 @@ class Segmentation(TaskConfig):
             publish_path=self.path[1],
             description="Train Segmentation Model",
             labels=self.labels,
+            cpu_workers=int(self.conf.get("cpu_workers", "0")),  # > 1: CPU data parallel (gloo)
+            precision=self.conf.get("precision", "fp32"),
+            chunked_store=strtobool(self.conf.get("chunked_store", "false")),
+            # persistent cache of the deterministic preprocessing (used with dataset=PersistentDataset)
+            preprocess_cache=(
+                os.path.join(output_dir, "preprocess_cache")
+                if strtobool(self.conf.get("preprocess_cache", "true"))
+                else None
+            ),
+            config={"dataset": ["PersistentDataset", "CacheDataset", "SmartCacheDataset", "Dataset"]},
         )
         return task
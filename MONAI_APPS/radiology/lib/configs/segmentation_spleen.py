@@ -102,6 +102,7 @@ class SegmentationSpleen(TaskConfig):
             load_path=load_path,
             publish_path=self.path[1],
             labels=self.labels,
+            cpu_workers=int(self.conf.get("cpu_workers", "0")),  # > 1: CPU data parallel (gloo)
             disable_meta_tracking=False,
         )
         return task
@@ -107,5 +107,6 @@ class SegmentationVertebra(TaskConfig):
             publish_path=self.path[1],
             description="Train vertebra segmentation Model",
             labels=self.labels,
+            cpu_workers=int(self.conf.get("cpu_workers", "0")),  # > 1: CPU data parallel (gloo)
         )
         return task
@@ -75,7 +75,19 @@ class SWFastEditConfig(TaskConfig):
             labels=self.labels,
             label_names=self.label_names,
             preload=strtobool(self.conf.get("preload", "false")),
-            config={"cache_transforms": True, "cache_transforms_in_memory": True, "cache_transforms_ttl": 1200},
+            config={
+                "cache_transforms": True,
+                "cache_transforms_in_memory": True,
+                "cache_transforms_ttl": 1200,
+                # keep the preprocessed image and window outputs between clicks (per image, LRU, TTL above);
+                # off by default: window outputs stay on the device and sessions run every window (no sw_skip_empty)
+                "interactive_session": strtobool(self.conf.get("interactive_session", "false")),
+                "interactive_sessions": int(self.conf.get("interactive_sessions", "2")),
+                "sw_skip_empty": strtobool(self.conf.get("sw_skip_empty", "false")),
+                "sw_skip_threshold": float(self.conf.get("sw_skip_threshold", "0.5")),
+                "sw_skip_source": self.conf.get("sw_skip_source", "threshold"),
+                "precision": self.conf.get("precision", "fp32"),  # fp32 | bf16 | auto
+            },
             target_spacing=self.target_spacing,
         )
         # Reenable this for the Auto Segmentation support
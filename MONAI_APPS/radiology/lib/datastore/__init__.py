@@ -0,0 +1,16 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from .cache import PreprocessCacheDataset, content_hashing, file_digest, params_hashing, transform_state
+from .chunked import CHUNKED_EXT, ChunkedVolume, LoadChunkedd, chunked_path, write_chunked
+from .dicom import ConversionIndex, DicomConverter, convert_series, find_series, series_hash
+from .results import CachedInferTask, ResultCache, model_digest
+from .volume import iter_slabs, load_volume, read_region
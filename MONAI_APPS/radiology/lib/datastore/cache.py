@@ -0,0 +1,121 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import enum
+import hashlib
+import inspect
+import logging
+import os
+from functools import partial
+from typing import Any, Dict, Mapping, Sequence, Tuple
+
+import numpy as np
+import torch
+from monai.data import PersistentDataset
+from monai.data.utils import json_hashing
+
+logger = logging.getLogger(__name__)
+
+# bump when the cached content changes for reasons not captured by the transform parameters
+CACHE_VERSION = 1
+
+_digests: Dict[Tuple[str, int, int], str] = {}
+
+
+def file_digest(path: str, chunk: int = 1 << 20) -> str:
+    """sha256 of a file, memoized on (path, size, mtime) so it is read once per process and not once per epoch."""
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if key not in _digests:
+        h = hashlib.sha256()
+        with open(path, "rb") as fc:
+            for block in iter(lambda: fc.read(chunk), b""):
+                h.update(block)
+        _digests[key] = h.hexdigest()
+    return _digests[key]
+
+
+def content_hashing(item: Mapping[str, Any], keys: Sequence[str] = ("image", "label")) -> bytes:
+    """Cache key of a datalist item: content of its files (renamed/moved cases keep their cache)."""
+    return json_hashing({k: file_digest(item[k]) for k in keys if isinstance(item.get(k), str)})
+
+
+def transform_state(value: Any, _seen=None) -> Any:
+    """
+    JSON serializable description of a transform and of the parameters it was built with (its attributes and the
+    ones of the array transforms it wraps, e.g. ``GaussianSmoothd`` => ``GaussianSmooth.sigma``).  Tensors and
+    arrays are reduced to a digest, functions to their qualified name.
+    """
+    _seen = set() if _seen is None else _seen
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (torch.Tensor, np.ndarray)):
+        array = value.detach().cpu().numpy() if isinstance(value, torch.Tensor) else value
+        return f"{array.dtype}{list(array.shape)}:{hashlib.sha256(np.ascontiguousarray(array).tobytes()).hexdigest()}"
+    if isinstance(value, (torch.dtype, torch.device, np.dtype)):
+        return str(value)
+    if isinstance(value, (list, tuple)):
+        return [transform_state(v, _seen) for v in value]
+    if isinstance(value, dict):
+        return {str(k): transform_state(v, _seen) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, type) or inspect.isroutine(value):
+        return getattr(value, "__qualname__", repr(value))
+    if isinstance(value, partial):
+        args = [value.args, value.keywords]
+        return {"class": "partial", "func": transform_state(value.func, _seen), "args": transform_state(args, _seen)}
+    if not hasattr(value, "__dict__") or id(value) in _seen:
+        return type(value).__qualname__
+
+    _seen.add(id(value))
+    state = {k: transform_state(v, _seen) for k, v in sorted(vars(value).items()) if k not in ("R", "_lazy")}
+    return {"class": type(value).__qualname__, **state}
+
+
+def params_hashing(params: Mapping[str, Any], transforms: Sequence[Any]) -> bytes:
+    """Hash of the deterministic transforms (with their constructor parameters) and of ``params``."""
+    return json_hashing({"version": CACHE_VERSION, "transforms": transform_state(transforms), "params": params})
+
+
+class PreprocessCacheDataset(PersistentDataset):
+    """
+    ``PersistentDataset`` keyed by content: cache files are named after the hash of the image/label files plus
+    the hash of the deterministic transform chain (cut at the first random transform) with the parameters each
+    transform was built with (``transform_state``) and of ``params``.  Unlike the per run cache of ``BasicTrainTask`` it lives across
+    training runs; entries of other parameters are stale and are removed when the dataset is created.
+
+    Args:
+        data: datalist.
+        transform: full pre-transform chain.
+        cache_dir: persistent cache folder.
+        params: extra JSON serializable parameters of the cached content.
+        keys: datalist keys holding the files that are hashed.
+    """
+
+    def __init__(self, data, transform, cache_dir: str, params: Mapping[str, Any], keys=("image", "label")):
+        super().__init__(
+            data,
+            transform,
+            cache_dir=cache_dir,
+            hash_func=partial(content_hashing, keys=keys),
+            hash_transform=partial(params_hashing, dict(params)),
+        )
+        self._prune()
+
+    def _prune(self):
+        removed = 0
+        for f in self.cache_dir.glob("*.pt"):
+            if not f.stem.endswith(self.transform_hash):
+                f.unlink(missing_ok=True)
+                removed += 1
+        if removed:
+            logger.info(f"Preprocess cache: removed {removed} stale entries from {self.cache_dir}")
@@ -0,0 +1,236 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+from monai.config import KeysCollection
+from monai.data import MetaTensor
+from monai.transforms import LoadImaged
+from monai.transforms.transform import MapTransform
+from monai.utils import optional_import
+
+from .volume import iter_slabs, load_volume
+
+zarr, has_zarr = optional_import("zarr", "3")
+
+logger = logging.getLogger(__name__)
+
+CHUNKED_EXT = ".zarr"
+
+
+def chunked_path(path: str) -> str:
+    """``case_001/image.nii.gz`` => ``case_001/image.zarr``"""
+    return re.sub(r"\.nii(\.gz)?$", "", path) + CHUNKED_EXT
+
+
+def level_affine(affine: np.ndarray, scale: Sequence[float], centered: bool = True) -> np.ndarray:
+    """
+    Affine of a level downsampled by ``scale``.  Voxel centers of a block mean (``centered``) sit between the
+    original ones; a strided (nearest) level keeps the first voxel of every block.
+    """
+    affine = np.array(affine, dtype=np.float64)
+    scale = np.asarray(scale, dtype=np.float64)
+    out = affine.copy()
+    out[:3, :3] = affine[:3, :3] * scale
+    if centered:
+        out[:3, 3] = affine[:3, :3] @ ((scale - 1) / 2) + affine[:3, 3]
+    return out
+
+
+def downsample(block: np.ndarray, mode: str = "mean") -> np.ndarray:
+    """2x downsampling of a 3D block; ``mean`` for images, ``nearest`` (strided) for label maps."""
+    if mode == "nearest":
+        return block[::2, ::2, ::2]
+    pad = [(0, s % 2) for s in block.shape]
+    if any(p for _, p in pad):
+        block = np.pad(block, pad, mode="edge")
+    x, y, z = (s // 2 for s in block.shape)
+    out = block.reshape(x, 2, y, 2, z, 2).mean(axis=(1, 3, 5), dtype=np.float32)
+    return np.rint(out).astype(block.dtype) if np.issubdtype(block.dtype, np.integer) else out.astype(block.dtype)
+
+
+def write_chunked(
+    image_path: str,
+    output_path: Optional[str] = None,
+    chunks: Sequence[int] = (64, 64, 64),
+    levels: int = 3,
+    cname: str = "zstd",
+    clevel: int = 3,
+    label: bool = False,
+) -> str:
+    """
+    Convert a NIfTI volume into a chunked, blosc compressed multiscale store (``<name>.zarr``).
+
+    Level ``0`` is the original grid in its native dtype; level ``k`` is downsampled ``2**k`` times (block mean,
+    or nearest for ``label`` maps).  Every level is written slab by slab (one chunk row along the last axis at
+    a time), so peak memory does not depend on the volume size.  Level affines are stored in the attributes.
+    """
+    output_path = output_path if output_path else chunked_path(image_path)
+    img = load_volume(image_path)
+    shape, dtype = tuple(int(s) for s in img.shape[:3]), np.dtype(img.get_data_dtype())
+    affine = np.asarray(img.affine, dtype=np.float64)
+
+    compressors = zarr.codecs.BloscCodec(cname=cname, clevel=clevel, shuffle="shuffle")
+    group = zarr.open_group(output_path, mode="w")
+
+    depth = int(chunks[2])
+    arr = group.create_array("0", shape=shape, chunks=tuple(chunks), dtype=dtype, compressors=compressors)
+    for z, slab in iter_slabs(img, depth):
+        arr[:, :, z : z + slab.shape[2]] = slab
+
+    meta: List[Dict[str, Any]] = [{"path": "0", "scale": [1, 1, 1], "shape": list(shape), "affine": affine.tolist()}]
+    prev = arr
+    for k in range(1, levels):
+        if min(prev.shape) < 2:
+            break
+        shape_k = tuple((s + 1) // 2 for s in prev.shape)
+        chunks_k = tuple(min(c, s) for c, s in zip(chunks, shape_k))
+        arr = group.create_array(str(k), shape=shape_k, chunks=chunks_k, dtype=dtype, compressors=compressors)
+        for z in range(0, prev.shape[2], 2 * depth):
+            small = downsample(prev[:, :, z : z + 2 * depth], "nearest" if label else "mean")
+            arr[:, :, z // 2 : z // 2 + small.shape[2]] = small
+        scale = [2**k] * 3
+        affine_k = level_affine(affine, scale, centered=not label).tolist()
+        meta.append({"path": str(k), "scale": scale, "shape": list(shape_k), "affine": affine_k})
+        prev = arr
+
+    group.attrs.update({"source": os.path.basename(image_path), "label": label, "levels": meta})
+    logger.info(f"{image_path} => {output_path} ({len(meta)} levels, chunks {tuple(chunks)}, blosc {cname})")
+    return output_path
+
+
+class ChunkedVolume:
+    """
+    Read-only access to a store written by ``write_chunked``.
+
+    ``read`` only decompresses the chunks intersecting the requested box, at the requested resolution level.
+    Boxes are given in level ``0`` voxel coordinates (``[start, end)`` per axis), so the same seam box can be
+    read at any level.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.group = zarr.open_group(path, mode="r")
+        self.levels: List[Dict[str, Any]] = self.group.attrs["levels"]
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return tuple(self.levels[0]["shape"])
+
+    def affine(self, level: int = 0) -> np.ndarray:
+        return np.asarray(self.levels[level]["affine"], dtype=np.float64)
+
+    def level_for_spacing(self, spacing: Sequence[float]) -> int:
+        """Coarsest level whose voxel size does not exceed ``spacing`` (mm)."""
+        best = 0
+        for k in range(len(self.levels)):
+            if np.all(np.linalg.norm(self.affine(k)[:3, :3], axis=0) <= np.asarray(spacing) + 1e-6):
+                best = k
+        return best
+
+    def read(self, box: Optional[Sequence[Sequence[int]]] = None, level: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns: (data, affine) of ``box`` (``[[x0, y0, z0], [x1, y1, z1]]`` in level 0 voxels, whole volume
+        when None) at ``level``; the affine is the one of the returned region.
+        """
+        info = self.levels[level]
+        scale, shape = np.asarray(info["scale"]), np.asarray(info["shape"])
+        if box is None:
+            start, end = np.zeros(3, dtype=int), shape
+        else:
+            start = np.clip(np.floor_divide(np.asarray(box[0]), scale), 0, shape).astype(int)
+            end = np.clip(-np.floor_divide(-np.asarray(box[1]), scale), start, shape).astype(int)
+
+        data = self.group[info["path"]][tuple(slice(a, b) for a, b in zip(start, end))]
+        affine = self.affine(level)
+        affine[:3, 3] += affine[:3, :3] @ start
+        return data, affine
+
+
+class LoadChunkedd(MapTransform):
+    def __init__(
+        self,
+        keys: KeysCollection,
+        box_key: str = "roi",
+        level: int = 0,
+        level_key: str = "level",
+        spacing: Optional[Sequence[float]] = None,
+        allow_missing_keys: bool = False,
+    ):
+        """
+        Load a region of interest from chunked ``.zarr`` volumes (see ``write_chunked``) instead of decompressing
+        a whole ``.nii.gz`` with ``LoadImaged``.
+
+        A ``.nii.gz`` path is read from its chunked store next to it (``chunked_path``) when it exists, otherwise
+        with ``LoadImaged``.  Only the chunks intersecting ``data[box_key]`` (``[[x0, y0, z0], [x1, y1, z1]]`` in
+        full resolution voxels, whole volume when missing) are read, at resolution ``data[level_key]`` (or
+        ``level``; with ``spacing``, the coarsest level not coarser than it, the same for every key of the item).
+        The output is a channel-less MetaTensor with the affine of the region (``original_affine`` is the one of the
+        full resolution volume, as with ``LoadImaged(image_only=True)``), so ``EnsureChannelFirstd`` and spacing
+        aware transforms work unchanged.
+
+        :param keys: The ``keys`` parameter will be used to get and set the actual data item to transform
+        :param box_key: key of the bounding box in the data
+        :param level: default pyramid level (0 = full resolution)
+        :param level_key: key of the pyramid level in the data
+        :param spacing: target spacing (mm) used to pick the level (e.g. before ``Spacingd`` in training)
+        """
+        super().__init__(keys, allow_missing_keys)
+        self.box_key = box_key
+        self.level = level
+        self.level_key = level_key
+        self.spacing = spacing
+        self._volumes: Dict[str, ChunkedVolume] = {}
+        self._fallback = LoadImaged(keys=keys, allow_missing_keys=allow_missing_keys)
+
+    def _volume(self, path: str) -> ChunkedVolume:
+        # opening only parses the group metadata; kept per path for repeated ROI reads of the same case
+        if path not in self._volumes:
+            self._volumes[path] = ChunkedVolume(path)
+        return self._volumes[path]
+
+    @staticmethod
+    def _store(path: str) -> Optional[str]:
+        if path.endswith(CHUNKED_EXT):
+            return path
+        store = chunked_path(path)
+        return store if has_zarr and os.path.isdir(store) else None
+
+    def __call__(self, data):
+        d: Dict = dict(data)
+        box = d.get(self.box_key)
+        level = d.get(self.level_key)
+        for key in self.key_iterator(d):
+            path = str(d[key])
+            store = self._store(path)
+            if store is None:
+                d[key] = self._fallback({key: d[key]})[key]
+                continue
+
+            volume = self._volume(store)
+            if level is None:
+                level = volume.level_for_spacing(self.spacing) if self.spacing else self.level
+            level = min(int(level), len(volume.levels) - 1)
+            data_, affine = volume.read(box, level)
+            meta = {
+                "filename_or_obj": path,
+                "original_affine": volume.affine(),  # whole volume on disk, as LoadImaged
+                "spatial_shape": np.asarray(data_.shape),
+                "original_channel_dim": float("nan"),
+                "level": level,
+            }
+            d[key] = MetaTensor(torch.as_tensor(np.ascontiguousarray(data_)), affine=torch.as_tensor(affine), meta=meta)
+        return d
@@ -0,0 +1,225 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from monai.utils import optional_import
+
+sitk, has_sitk = optional_import("SimpleITK")
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = ".dicom_index.json"
+IMAGE_NAME = "image.nii.gz"
+CASE_PREFIX = "case_"
+
+# DICOM tags kept in the index next to the case (group|element as in SimpleITK)
+SERIES_TAGS = {
+    "0010|0020": "patient_id",
+    "0008|0020": "study_date",
+    "0008|0060": "modality",
+    "0008|103e": "series_description",
+    "0020|000e": "series_uid",
+}
+
+
+def find_series(root: str) -> List[Tuple[str, str, List[str]]]:
+    """
+    All DICOM series under ``root`` as (series uid, folder, sorted file names).
+
+    Files are grouped and ordered by GDCM from their headers (not by name/extension), one folder can hold
+    several series.
+    """
+    series = []
+    for folder, _, names in os.walk(root):
+        if not names:
+            continue
+        for uid in sitk.ImageSeriesReader.GetGDCMSeriesIDs(folder) or ():
+            files = sitk.ImageSeriesReader.GetGDCMSeriesFileNames(folder, uid)
+            if files:
+                series.append((uid, folder, list(files)))
+    return series
+
+
+def fingerprint(files: Sequence[str]) -> str:
+    """Cheap (name, size, mtime) signature, used to avoid re-hashing a series folder that did not change."""
+    h = hashlib.sha1()
+    for f in sorted(files):
+        st = os.stat(f)
+        h.update(f"{f}|{st.st_size}|{st.st_mtime_ns}".encode())
+    return h.hexdigest()
+
+
+def series_hash(files: Sequence[str], chunk: int = 1 << 20) -> str:
+    """
+    Content hash (sha256) of a series: sha256 of the sorted sha256 of its files.
+
+    Only file contents count (not names or order): copies, renames or re-exports to another folder of the same
+    series give the same hash.
+    """
+    digests = []
+    for f in files:
+        h = hashlib.sha256()
+        with open(f, "rb") as fc:
+            for block in iter(lambda: fc.read(chunk), b""):
+                h.update(block)
+        digests.append(h.hexdigest())
+    return hashlib.sha256("\n".join(sorted(digests)).encode()).hexdigest()
+
+
+def convert_series(files: Sequence[str], output_path: str) -> Dict[str, Any]:
+    """
+    Read a DICOM series and write it as NIfTI.
+
+    Spacing, origin and direction come from the DICOM geometry (ImagePositionPatient/ImageOrientationPatient,
+    slice ordering by GDCM) and are written into the NIfTI qform/sform by SimpleITK.  The file is written to
+    a temporary name first, so the datastore never sees a partial volume.
+    """
+    reader = sitk.ImageSeriesReader()
+    reader.SetFileNames(list(files))
+    reader.MetaDataDictionaryArrayUpdateOn()
+    image = reader.Execute()
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    tmp = os.path.join(os.path.dirname(os.path.abspath(output_path)), f".tmp_{os.getpid()}_{IMAGE_NAME}")
+    sitk.WriteImage(image, tmp, useCompression=True)
+    os.replace(tmp, output_path)
+
+    info: Dict[str, Any] = {
+        "size": list(image.GetSize()),
+        "spacing": list(image.GetSpacing()),
+        "origin": list(image.GetOrigin()),
+        "direction": list(image.GetDirection()),
+        "slices": len(files),
+    }
+    for tag, name in SERIES_TAGS.items():
+        if reader.HasMetaDataKey(0, tag):
+            info[name] = reader.GetMetaData(0, tag).strip()
+    return info
+
+
+class ConversionIndex:
+    """
+    ``<datastore>/.dicom_index.json``: content hash => converted case (+ geometry and series tags).
+
+    Written atomically after every conversion, so an interrupted run keeps what was already converted.
+    """
+
+    def __init__(self, datastore: str):
+        self.datastore = datastore
+        self.path = os.path.join(datastore, INDEX_FILE)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.path):
+            with open(self.path) as fc:
+                self.entries = json.load(fc)
+
+    def __contains__(self, digest: str) -> bool:
+        entry = self.entries.get(digest)
+        return bool(entry) and os.path.exists(os.path.join(self.datastore, entry["case"], IMAGE_NAME))
+
+    def add(self, digest: str, entry: Dict[str, Any]):
+        self.entries[digest] = entry
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as fc:
+            json.dump(self.entries, fc, indent=2)
+        os.replace(tmp, self.path)
+
+    def next_id(self) -> int:
+        """Number of the ``case_NNN`` after the last existing one (``MONAI_STUDIES`` naming)."""
+        ids = [0]
+        for name in os.listdir(self.datastore) if os.path.isdir(self.datastore) else ():
+            m = re.fullmatch(rf"{CASE_PREFIX}(\d+)", name)
+            if m:
+                ids.append(int(m.group(1)))
+        return max(ids) + 1
+
+
+class DicomConverter:
+    """
+    Converts incoming DICOM series into the datastore layout (``<datastore>/case_NNN/image.nii.gz``).
+
+    Series are hashed and converted in ``executor`` (a process pool: GDCM decoding and gzip are CPU bound);
+    series whose content hash is already in the index, or repeated within the same scan, are skipped.
+    Folders whose (name, size, mtime) fingerprint did not change since the last scan are not even re-hashed,
+    which keeps polling an incoming folder cheap.
+
+    Args:
+        datastore: studies folder (e.g. ``MONAI_STUDIES``).
+        executor: pool used for hashing and conversion.
+        settle: seconds a series must be left untouched before it is converted (still being copied otherwise).
+    """
+
+    def __init__(self, datastore: str, executor: Executor, settle: float = 10.0):
+        self.datastore = datastore
+        self.executor = executor
+        self.settle = settle
+        self.index = ConversionIndex(datastore)
+        self._seen: Dict[str, str] = {}  # series uid + folder => fingerprint already handled
+
+    def _settled(self, files: Sequence[str]) -> bool:
+        newest = max(os.stat(f).st_mtime for f in files)
+        return time.time() - newest >= self.settle
+
+    def scan(self, incoming: str) -> List[Dict[str, Any]]:
+        """Convert every new series under ``incoming``; returns the index entries added."""
+        pending = []
+        for uid, folder, files in find_series(incoming):
+            key, fp = f"{folder}|{uid}", fingerprint(files)
+            if self._seen.get(key) == fp or not self._settled(files):
+                continue
+            pending.append((key, fp, uid, folder, files))
+
+        hashes = [self.executor.submit(series_hash, files) for *_, files in pending]
+        jobs: Dict[str, Tuple[Any, str, str, str, Sequence[str]]] = {}
+        skipped, first = 0, self.index.next_id()
+        for (key, fp, uid, folder, files), future in zip(pending, hashes):
+            digest = future.result()
+            self._seen[key] = fp
+            if digest in self.index or digest in jobs:
+                skipped += 1
+                continue
+            case = f"{CASE_PREFIX}{first + len(jobs):03d}"
+            output = os.path.join(self.datastore, case, IMAGE_NAME)
+            jobs[digest] = (self.executor.submit(convert_series, files, output), case, uid, folder, files)
+
+        added = []
+        for digest, (future, case, uid, folder, files) in jobs.items():
+            try:
+                info = future.result()
+            except Exception as e:
+                logger.error(f"{folder} ({uid}) => {e}")
+                self._seen.pop(f"{folder}|{uid}", None)
+                continue
+            entry = dict(case=case, source=folder, converted=time.strftime("%Y-%m-%d %H:%M:%S"), **info)
+            self.index.add(digest, entry)
+            added.append(entry)
+            logger.info(f"{folder} => {case} {info['size']} spacing {info['spacing']}")
+
+        if pending:
+            logger.info(f"Series: {len(pending)}; converted: {len(added)}; already converted: {skipped}")
+        return added
+
+    def watch(self, incoming: str, interval: float = 5.0, once: bool = False, callback: Optional[Callable] = None):
+        """Poll ``incoming`` every ``interval`` seconds (no filesystem notification dependency)."""
+        while True:
+            added = self.scan(incoming)
+            if added and callback:
+                callback(added)
+            if once:
+                return
+            time.sleep(interval)
@@ -0,0 +1,287 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+import glob
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from monai.data.utils import json_hashing
+
+from .cache import CACHE_VERSION, file_digest
+
+logger = logging.getLogger(__name__)
+
+# request keys that do not change the result (or are replaced by the image content hash)
+VOLATILE_PARAMS = (
+    "image",
+    "image_path",
+    "description",
+    "device",
+    "save_label",
+    "label_tag",
+    "timeout",
+    "client_id",
+    "session_id",
+    "result_cache",
+    "logging",
+)
+
+_FILE_REF = "__result_cache_file__"
+
+
+def model_files(task: Any) -> List[str]:
+    """
+    Model files of an infer task: its checkpoints (``path``), the exported artifacts next to them (same stem,
+    e.g. ``.onnx`` / ``.ts``) and the ones of the tasks it runs (pipelines).
+    """
+    files, tasks, seen = [], [task], set()
+    while tasks:
+        t = tasks.pop()
+        if id(t) in seen:
+            continue
+        seen.add(id(t))
+        paths = getattr(t, "path", None)
+        for p in [paths] if isinstance(paths, str) else paths or []:
+            if p and os.path.isfile(p):
+                stem = os.path.splitext(p)[0]
+                files.extend(f for f in sorted(glob.glob(stem + ".*")) if os.path.isfile(f))
+        tasks.extend(v for v in getattr(t, "__dict__", {}).values() if hasattr(v, "path") and callable(v))
+    return sorted(set(files))
+
+
+def model_digest(task: Any) -> Optional[str]:
+    """Hash of the model files of a task: a new model published by training (or re-exported) changes it."""
+    files = model_files(task)
+    return json_hashing({os.path.basename(f): file_digest(f) for f in files}).decode() if files else None
+
+
+class ResultCache:
+    """
+    Disk cache of infer results: label file + result JSON, keyed on the content of the image, the model files
+    of the task (``model_digest``) and the request parameters that change the result.
+
+    Every entry is a folder of ``cache_dir`` (label, JSON, extra files referenced by the JSON such as explain
+    maps).  Least recently used entries are removed beyond ``max_mb``; entries of a model are removed as soon
+    as the task is used with a different model digest (new checkpoint published by training).
+
+    Args:
+        cache_dir: cache folder.
+        max_mb: size limit of the cache, in MB.
+    """
+
+    def __init__(self, cache_dir: str, max_mb: float = 1024):
+        self.cache_dir = cache_dir
+        self.max_mb = max_mb
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._models: Dict[str, str] = {}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        for key in os.listdir(cache_dir):
+            meta = self._read_meta(key)
+            if meta is None or meta.get("version") != CACHE_VERSION:
+                shutil.rmtree(os.path.join(cache_dir, key), ignore_errors=True)
+                continue
+            self._entries[key] = meta
+        logger.info(f"Result cache: {len(self._entries)} entries ({self.nbytes / 2**20:.1f} MB) in {cache_dir}")
+
+    @property
+    def nbytes(self) -> int:
+        return sum(e["nbytes"] for e in self._entries.values())
+
+    def key(self, name: str, request: Mapping[str, Any], digest: str) -> Optional[str]:
+        """Cache key of a request; None if the image is not a file (uploaded arrays, DICOM folders)."""
+        image = request.get("image")
+        if not isinstance(image, str) or not os.path.isfile(image):
+            return None
+        params = {k: v for k, v in request.items() if k not in VOLATILE_PARAMS}
+        params = json.loads(json.dumps(params, sort_keys=True, default=str))
+        payload = {"version": CACHE_VERSION, "task": name, "model": digest, "image": file_digest(image)}
+        return json_hashing({**payload, "params": params}).decode()
+
+    def get(self, key: str) -> Optional[Tuple[Optional[str], Dict[str, Any]]]:
+        with self._lock:
+            meta = self._entries.get(key)
+            if meta is None:
+                self.misses += 1
+                return None
+            meta["used"] = time.time()
+            self.hits += 1
+
+        folder = os.path.join(self.cache_dir, key)
+        try:
+            with open(os.path.join(folder, "result.json")) as fc:
+                result_json = self._restore(json.load(fc), folder)
+            label = self._copy_out(os.path.join(folder, meta["label"])) if meta["label"] else None
+            os.utime(os.path.join(folder, "meta.json"))
+        except OSError as e:
+            logger.warning(f"Result cache: entry {key} unreadable ({e}); removed")
+            self._remove(key)
+            return None
+        return label, result_json
+
+    def put(self, key: str, name: str, digest: str, label: Optional[str], result_json: Dict[str, Any]):
+        folder = os.path.join(self.cache_dir, key)
+        tmp = tempfile.mkdtemp(dir=self.cache_dir, prefix=".tmp_")
+        try:
+            label_name = None
+            if label:
+                label_name = "label" + _extension(label)
+                shutil.copyfile(label, os.path.join(tmp, label_name))
+            files: List[str] = []
+            with open(os.path.join(tmp, "result.json"), "w") as fc:
+                json.dump(self._store(copy.deepcopy(result_json), tmp, files), fc)
+            nbytes = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp))
+            meta = {"version": CACHE_VERSION, "task": name, "model": digest, "label": label_name}
+            meta.update({"nbytes": nbytes, "used": time.time()})
+            with open(os.path.join(tmp, "meta.json"), "w") as fc:
+                json.dump(meta, fc)
+
+            with self._lock:
+                shutil.rmtree(folder, ignore_errors=True)
+                os.replace(tmp, folder)
+                self._entries[key] = meta
+            self._evict()
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Result cache: could not store {key}: {e}")
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def invalidate(self, name: str, digest: Optional[str]):
+        """Removes the entries of ``name`` computed with another model (checked once per model change)."""
+        with self._lock:
+            if self._models.get(name) == digest:
+                return
+            self._models[name] = digest
+            stale = [k for k, m in self._entries.items() if m["task"] == name and m["model"] != digest]
+        for key in stale:
+            self._remove(key)
+        if stale:
+            logger.info(f"Result cache: {len(stale)} entries of {name} invalidated (new model)")
+
+    def clear(self):
+        for key in list(self._entries):
+            self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "nbytes": self.nbytes, "hits": self.hits, "misses": self.misses}
+
+    def _evict(self):
+        budget = self.max_mb * 2**20
+        with self._lock:
+            by_use = sorted(self._entries, key=lambda k: self._entries[k]["used"])
+        total = self.nbytes
+        for key in by_use[:-1]:
+            if total <= budget:
+                break
+            total -= self._entries[key]["nbytes"]
+            self._remove(key)
+
+    def _remove(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+        shutil.rmtree(os.path.join(self.cache_dir, key), ignore_errors=True)
+
+    def _read_meta(self, key: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self.cache_dir, key, "meta.json")
+        try:
+            with open(path) as fc:
+                meta = json.load(fc)
+            meta["used"] = os.path.getmtime(path)
+            return meta
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, value: Any, folder: str, files: List[str]) -> Any:
+        # files written by the task next to the label (e.g. explain maps) are temporary: keep a copy
+        if isinstance(value, dict):
+            return {k: self._store(v, folder, files) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._store(v, folder, files) for v in value]
+        if isinstance(value, str) and os.path.isabs(value) and os.path.isfile(value):
+            name = f"file_{len(files)}{_extension(value)}"
+            shutil.copyfile(value, os.path.join(folder, name))
+            files.append(name)
+            return {_FILE_REF: name}
+        return value
+
+    def _restore(self, value: Any, folder: str) -> Any:
+        if isinstance(value, dict):
+            if set(value) == {_FILE_REF}:
+                return self._copy_out(os.path.join(folder, value[_FILE_REF]))
+            return {k: self._restore(v, folder) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._restore(v, folder) for v in value]
+        return value
+
+    @staticmethod
+    def _copy_out(path: str) -> str:
+        # the server removes the result files once sent: hand out a copy
+        fd, out = tempfile.mkstemp(suffix=_extension(path))
+        os.close(fd)
+        shutil.copyfile(path, out)
+        return out
+
+
+def _extension(path: str) -> str:
+    name = os.path.basename(path)
+    return name[name.index(".") :] if "." in name else ""
+
+
+class CachedInferTask:
+    """
+    Infer task served through a ``ResultCache``: a hit returns the stored label and result JSON without running
+    the task.  Requests whose result is not a file (``result_write_to_file: false``, pipeline stages) or that set
+    ``result_cache: false`` run the task as usual.  Other attributes are the ones of the task.
+    """
+
+    def __init__(self, name: str, task: Any, cache: ResultCache):
+        self.name = name
+        self.task = task
+        self.cache = cache
+
+    def __call__(self, request, callbacks=None):
+        bypass = request.get("result_write_to_file") is False or request.get("pipeline_mode")
+        if bypass or str(request.get("result_cache", True)).lower() == "false":
+            return self.task(request, callbacks)
+
+        digest = model_digest(self.task)
+        key = self.cache.key(self.name, request, digest) if digest else None
+        if key is None:
+            return self.task(request, callbacks)
+
+        self.cache.invalidate(self.name, digest)
+        start = time.time()
+        cached = self.cache.get(key)
+        if cached is not None:
+            label, result_json = cached
+            result_json["result_cache"] = {"hit": True, "latency": round(time.time() - start, 3)}
+            logger.info(f"Result cache hit: {self.name} ({key[:12]})")
+            return label, result_json
+
+        label, result_json = self.task(request, callbacks)
+        if isinstance(result_json, dict) and (label is None or isinstance(label, str) and os.path.isfile(label)):
+            self.cache.put(key, self.name, digest, label, result_json)
+            result_json["result_cache"] = {"hit": False}
+        return label, result_json
+
+    def __getattr__(self, item):
+        if item.startswith("__") or item in ("task", "cache", "name"):
+            raise AttributeError(item)
+        return getattr(self.task, item)
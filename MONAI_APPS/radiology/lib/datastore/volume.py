@@ -0,0 +1,38 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Iterator, Sequence, Tuple
+
+import numpy as np
+from monai.utils import optional_import
+
+nib, _ = optional_import("nibabel")
+
+
+def load_volume(path: str):
+    """
+    Lazy NIfTI image: ``.nii`` files are memory-mapped and ``.nii.gz`` are kept open, so slabs are read
+    (forward) on demand.  Nothing is decoded until sliced.
+    """
+    return nib.load(path, mmap=True, keep_file_open=True)
+
+
+def read_region(img, region: Sequence[slice]) -> np.ndarray:
+    """Read a region of the volume in its native dtype (no float64 upcast as with ``get_fdata``)."""
+    data = np.asanyarray(img.dataobj[tuple(region)])
+    return data.reshape(data.shape[:3])
+
+
+def iter_slabs(img, slab: int = 32) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yields (z offset, slab) along the last axis, which is contiguous on disk for NIfTI."""
+    depth = img.shape[2]
+    for z in range(0, depth, slab):
+        yield z, read_region(img, (slice(None), slice(None), slice(z, min(z + slab, depth))))
@@ -0,0 +1,61 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+from typing import Any, Optional
+
+from fastapi import Depends, File, Form, UploadFile
+from fastapi.background import BackgroundTasks
+
+from monailabel.config import settings
+from monailabel.endpoints.infer import ResultType, run_inference
+from monailabel.endpoints.user.auth import RBAC, User
+
+logger = logging.getLogger(__name__)
+
+
+def run_inference_concurrent(
+    background_tasks: BackgroundTasks,
+    model: str,
+    image: str = "",
+    session_id: str = "",
+    params: str = Form("{}"),
+    file: UploadFile = File(None),
+    label: UploadFile = File(None),
+    output: Optional[ResultType] = None,
+    user: User = Depends(RBAC(settings.MONAI_LABEL_AUTH_ROLE_USER)),
+):
+    # plain ``def``: FastAPI runs it in its worker threads, so requests overlap instead of blocking the event loop
+    return run_inference(background_tasks, model, image, session_id, params, file, label, output)
+
+
+def install_concurrent_infer(server: Any):
+    """
+    Serves ``POST /infer/{model}`` of the MONAI Label server (``monailabel.app.app``) with
+    ``run_inference_concurrent``, ahead of the stock route: same parameters and response, but run in the FastAPI
+    thread pool.
+
+    The stock endpoint is ``async`` and runs the inference synchronously on the event loop, so HTTP infer
+    requests are served one at a time and the ``InferenceScheduler`` never sees two of them together.
+    """
+    path = f"{settings.MONAI_LABEL_API_STR}/infer/{{model}}"
+    routes = server.router.routes
+    if any(getattr(route, "endpoint", None) is run_inference_concurrent for route in routes):
+        return
+
+    server.add_api_route(path, run_inference_concurrent, methods=["POST"], summary="Run Inference", tags=["Infer"])
+    # routes are matched in order: ahead of the included /infer router
+    routes.insert(0, routes.pop())
+    mark_changed = getattr(server.router, "_mark_routes_changed", None)
+    if mark_changed is not None:
+        mark_changed()
+    server.openapi_schema = None
+    logger.info(f"Concurrent infer endpoint installed: POST {path}")
@@ -0,0 +1,146 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import math
+from typing import Any, Callable, Optional, Sequence
+
+import torch
+import torch.nn.functional as F
+from monai.inferers import SlidingWindowInferer
+from monai.transforms.utils import generate_spatial_bounding_box
+from monai.utils import fall_back_tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ForegroundSlidingWindowInferer(SlidingWindowInferer):
+    """
+    Sliding window inference that only runs the network on windows containing foreground.
+
+    Weld CT volumes are mostly air around a thin seam.  Before scanning, a cheap low-resolution
+    occupancy map is built from the input (either an intensity threshold or the ``CropForeground``
+    bounding box); windows that do not touch any occupied cell are not sent to the network and are
+    filled with a constant background prediction instead.  Number of skipped windows is kept in ``stats``.
+
+    Args:
+        roi_size: the window size to execute SlidingWindow evaluation.
+        sw_batch_size: the batch size to run window slices.
+        overlap: amount of overlap between scans.
+        threshold: voxels with intensity above this value are foreground.
+        source: ``"threshold"`` to use every voxel above ``threshold`` or ``"box"`` to use the bounding box
+            of those voxels (same logic as ``CropForeground``).
+        channels: input channels used to build the occupancy map; None to use all of them
+            (e.g. include guidance channels so windows with clicks are never skipped).
+        occupancy_scale: downsampling factor of the occupancy map.
+        margin: margin (in full resolution voxels) added around the foreground.
+        background_index: output channel filled for skipped windows.
+        fill_value: logit value used for ``background_index`` in skipped windows (others are 0).
+        kwargs: other arguments of ``monai.inferers.SlidingWindowInferer``.
+    """
+
+    def __init__(
+        self,
+        roi_size,
+        sw_batch_size: int = 1,
+        overlap: float = 0.25,
+        threshold: float = 0.0,
+        source: str = "threshold",
+        channels: Optional[Sequence[int]] = None,
+        occupancy_scale: int = 4,
+        margin: int = 0,
+        background_index: int = 0,
+        fill_value: float = 1.0,
+        **kwargs,
+    ):
+        # window coordinates are needed to look up the occupancy map
+        kwargs["with_coord"] = True
+        super().__init__(roi_size=roi_size, sw_batch_size=sw_batch_size, overlap=overlap, **kwargs)
+        if source not in ("threshold", "box"):
+            raise ValueError(f"source should be 'threshold' or 'box', got {source}")
+
+        self.threshold = threshold
+        self.source = source
+        self.channels = channels
+        self.occupancy_scale = max(1, int(occupancy_scale))
+        self.margin = margin
+        self.background_index = background_index
+        self.fill_value = fill_value
+        self.stats = {"windows": 0, "skipped": 0}
+
+    def occupancy(self, inputs: torch.Tensor) -> torch.Tensor:
+        """
+        Low resolution foreground map of shape (B, 1, ceil(S / occupancy_scale)...) for inputs (B, C, S...).
+        """
+        x = inputs if self.channels is None else inputs[:, list(self.channels)]
+        mask = (x > self.threshold).any(dim=1, keepdim=True)
+
+        if self.source == "box":
+            box = torch.zeros_like(mask)
+            for b in range(mask.shape[0]):
+                start, end = generate_spatial_bounding_box(mask[b], margin=self.margin, allow_smaller=True)
+                if any(e > s for s, e in zip(start, end)):
+                    box[(b, slice(None), *[slice(s, e) for s, e in zip(start, end)])] = True
+            mask = box
+
+        spatial_dims = mask.ndim - 2
+        max_pool = getattr(F, f"max_pool{spatial_dims}d")
+        s = self.occupancy_scale
+        occupied = max_pool(mask.float(), kernel_size=s, stride=s, ceil_mode=True)
+
+        cells = math.ceil(self.margin / s) if self.source == "threshold" else 0
+        if cells:
+            occupied = max_pool(occupied, kernel_size=2 * cells + 1, stride=1, padding=cells)
+        return occupied > 0
+
+    def _is_occupied(self, occupied, coords, pad, image_size) -> bool:
+        region = [coords[0], slice(None)]
+        for d, sl in enumerate(coords[2:]):
+            start = min(max(sl.start - pad[d], 0), image_size[d] - 1)
+            stop = max(min(sl.stop - pad[d], image_size[d]), start + 1)
+            region.append(slice(start // self.occupancy_scale, -(-stop // self.occupancy_scale)))
+        return bool(occupied[tuple(region)].any())
+
+    def __call__(self, inputs: torch.Tensor, network: Callable[..., torch.Tensor], *args: Any, **kwargs: Any):
+        image_size = inputs.shape[2:]
+        roi_size = fall_back_tuple(self.roi_size, image_size)
+        # sliding_window_inference pads symmetrically when the image is smaller than roi
+        pad = [max(r - i, 0) // 2 for r, i in zip(roi_size, image_size)]
+
+        occupied = self.occupancy(inputs).to(inputs.device)
+        self.stats.update({"windows": 0, "skipped": 0})
+        template = {}
+
+        def predictor(win_data, coords, *a, **kw):
+            n = win_data.shape[0]
+            keep = [i for i, c in enumerate(coords) if self._is_occupied(occupied, c, pad, image_size)]
+            if not keep and not template:
+                keep = [0]  # run a single window to learn the output shape
+
+            self.stats["windows"] += n
+            self.stats["skipped"] += n - len(keep)
+
+            pred = None
+            if keep:
+                pred = network(win_data if len(keep) == n else win_data[keep], *a, **kw)
+                template.update({"shape": pred.shape[1:], "dtype": pred.dtype})
+                if len(keep) == n:
+                    return pred
+
+            out = torch.zeros((n, *template["shape"]), dtype=template["dtype"], device=win_data.device)
+            out[:, self.background_index] = self.fill_value
+            if pred is not None:
+                out[keep] = pred.to(out.device)
+            return out
+
+        result = super().__call__(inputs, predictor, *args, **kwargs)
+        logger.info(f"Sliding Window:: skipped {self.stats['skipped']} of {self.stats['windows']} windows (no foreground)")
+        return result
@@ -0,0 +1,168 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+from typing import Callable, Optional, Tuple
+
+import torch
+import torch.nn.functional as F
+from monai.inferers import SlidingWindowInferer
+
+logger = logging.getLogger(__name__)
+
+
+def get_layer(network: torch.nn.Module, name: str) -> torch.nn.Module:
+    for n, module in network.named_modules():
+        if n == name:
+            return module
+    raise ValueError(f"Layer {name} not found in {type(network).__name__}")
+
+
+def grad_cam(
+    network: Callable[..., torch.Tensor],
+    layer: torch.nn.Module,
+    x: torch.Tensor,
+    class_idx: int = 1,
+    defect_only: bool = False,
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Forward ``x`` (B, C, S...) once and compute the Grad-CAM map of ``class_idx`` for every window of the batch.
+
+    Activations of ``layer`` are captured with a forward hook that is removed afterwards (cached networks are
+    left untouched) and gradients are taken only w.r.t. those activations, so no parameter ``.grad`` is kept.
+    With ``defect_only``, windows whose prediction has no ``class_idx`` voxel get an all-zero map.
+
+    Returns: (logits, cam) where cam is (B, 1, S...) and not normalized.
+    """
+    captured = {}
+    handle = layer.register_forward_hook(lambda _m, _i, o: captured.__setitem__("acti", o))
+    try:
+        with torch.enable_grad():
+            logits = network(x)
+            acti = captured["acti"]
+
+            keep = torch.ones(x.shape[0], dtype=torch.bool, device=x.device)
+            if defect_only:
+                keep = (logits.argmax(1) == class_idx).flatten(1).any(1)
+
+            cam = torch.zeros((x.shape[0], 1, *x.shape[2:]), dtype=logits.dtype, device=x.device)
+            if keep.any():
+                score = logits[keep, class_idx].sum()
+                grad = torch.autograd.grad(score, acti)[0][keep]
+                weights = grad.flatten(2).mean(2).view(*grad.shape[:2], *[1] * (grad.ndim - 2))
+                acti_map = F.relu((weights * acti[keep]).sum(1, keepdim=True))
+                mode = "trilinear" if acti_map.ndim == 5 else "bilinear"
+                cam[keep] = F.interpolate(acti_map, size=x.shape[2:], mode=mode, align_corners=False)
+    finally:
+        handle.remove()
+    return logits.detach(), cam.detach()
+
+
+class SlidingWindowGradCAM(SlidingWindowInferer):
+    """
+    Grad-CAM for full resolution volumes, computed per sliding window ROI.
+
+    ``monai.visualize.GradCAM`` on a whole weld CT keeps activations and gradients of the entire volume.
+    Here every ROI (same windowing as the inference ``SlidingWindowInferer``) is explained on its own and
+    the window maps are blended with Gaussian importance weights into a full volume map, so peak memory is
+    bounded by ``sw_batch_size`` windows.  Windows are only explained when they are occupied in ``mask``
+    (e.g. the predicted segmentation) and/or, with ``defect_only``, when their own prediction has a defect.
+    Number of windows with a non-empty map (``explained``) is kept in ``stats``.
+
+    Args:
+        roi_size: the window size to execute SlidingWindow evaluation.
+        target_layer: name (as in ``named_modules``) of the layer used for Grad-CAM.
+        class_idx: class to explain (1 = defect).
+        sw_batch_size: the batch size to run window slices.
+        overlap: amount of overlap between scans.
+        defect_only: skip the backward pass for windows without ``class_idx`` in their prediction.
+        normalize: scale the blended map to [0, 1].
+        kwargs: other arguments of ``monai.inferers.SlidingWindowInferer`` (default mode is ``gaussian``).
+    """
+
+    def __init__(
+        self,
+        roi_size,
+        target_layer: str,
+        class_idx: int = 1,
+        sw_batch_size: int = 1,
+        overlap: float = 0.25,
+        defect_only: bool = False,
+        normalize: bool = True,
+        **kwargs,
+    ):
+        kwargs.setdefault("mode", "gaussian")
+        super().__init__(roi_size=roi_size, sw_batch_size=sw_batch_size, overlap=overlap, **kwargs)
+        self.target_layer = target_layer
+        self.class_idx = class_idx
+        self.defect_only = defect_only
+        self.normalize = normalize
+        self.stats = {"windows": 0, "explained": 0}
+
+    def __call__(self, inputs: torch.Tensor, network: torch.nn.Module, mask: Optional[torch.Tensor] = None):
+        """
+        Args:
+            inputs: (B, C, S...) volume.
+            network: eager torch network (``target_layer`` must exist).
+            mask: optional (B, 1, S...) prediction; windows without foreground in the mask are not explained.
+        """
+        layer = get_layer(network, self.target_layer)
+        channels = inputs.shape[1]
+        if mask is not None:
+            # windowed together with the image (same padding/ROI), split again in the predictor
+            inputs = torch.cat([inputs, mask.to(device=inputs.device, dtype=inputs.dtype)], dim=1)
+        self.stats.update({"windows": 0, "explained": 0})
+
+        def predictor(win_data, *args, **kwargs):
+            x = win_data[:, :channels]
+            keep = torch.ones(x.shape[0], dtype=torch.bool, device=x.device)
+            if mask is not None:
+                keep = (win_data[:, channels:] > 0).flatten(1).any(1)
+
+            cam = torch.zeros((x.shape[0], 1, *x.shape[2:]), dtype=x.dtype, device=x.device)
+            if keep.any():
+                _, cam[keep] = grad_cam(network, layer, x[keep], self.class_idx, self.defect_only)
+
+            self.stats["windows"] += x.shape[0]
+            self.stats["explained"] += int(cam.flatten(1).any(1).sum())
+            return cam
+
+        return self._normalize(super().__call__(inputs, predictor))
+
+    def _normalize(self, cam: torch.Tensor) -> torch.Tensor:
+        logger.info(f"Grad-CAM:: explained {self.stats['explained']} of {self.stats['windows']} windows")
+        return cam / cam.max().clamp(min=1e-8) if self.normalize else cam
+
+
+class SlidingWindowExplainInferer(SlidingWindowGradCAM):
+    """
+    Predict + explain in a single sliding window traversal.
+
+    Each window goes through the network once: the logits are used for the segmentation and the activations
+    captured by the hook during that same forward pass give the Grad-CAM map (only a backward pass down to
+    ``target_layer`` is added), instead of running inference and then ``SlidingWindowGradCAM`` again.
+
+    Returns: ``{"pred": logits, "cam": cam}``, both blended over the full volume.
+    """
+
+    def __call__(self, inputs: torch.Tensor, network: torch.nn.Module, *args, **kwargs):
+        layer = get_layer(network, self.target_layer)
+        self.stats.update({"windows": 0, "explained": 0})
+
+        def predictor(win_data, *a, **kw):
+            logits, cam = grad_cam(network, layer, win_data, self.class_idx, self.defect_only)
+            self.stats["windows"] += win_data.shape[0]
+            self.stats["explained"] += int(cam.flatten(1).any(1).sum())
+            return {"pred": logits, "cam": cam}
+
+        outputs = SlidingWindowInferer.__call__(self, inputs, predictor)
+        outputs["cam"] = self._normalize(outputs["cam"])
+        return outputs
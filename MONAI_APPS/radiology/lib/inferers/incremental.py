@@ -0,0 +1,94 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import torch
+from monai.inferers import SlidingWindowInferer
+from monai.utils import fall_back_tuple
+
+logger = logging.getLogger(__name__)
+
+Box = Tuple[Sequence[int], Sequence[int]]
+
+
+def boxes_intersect(a: Box, b: Box) -> bool:
+    """``[start, end)`` boxes."""
+    return all(s0 < e1 and s1 < e0 for s0, e0, s1, e1 in zip(a[0], a[1], b[0], b[1]))
+
+
+class IncrementalSlidingWindowInferer(SlidingWindowInferer):
+    """
+    Sliding window inference that reuses the window outputs of a previous run on the same input.
+
+    The output of every window is kept in ``windows`` (window start => network output).  On the next call only
+    the windows that are not cached or whose input intersects one of the ``changed`` boxes (e.g. around a new
+    click) are sent to the network; all the others reuse their cached output.  Blending is the one of
+    ``SlidingWindowInferer``, so the result is the same as running every window again.
+
+    The caller owns ``windows`` and must clear it when the input shape, the network or the inferer parameters
+    change.  Number of recomputed windows is kept in ``stats``.
+
+    Args:
+        roi_size: the window size to execute SlidingWindow evaluation.
+        sw_batch_size: the batch size to run window slices.
+        overlap: amount of overlap between scans.
+        windows: window outputs of the previous runs, updated in place.
+        changed: ``[start, end)`` boxes (input voxels) changed since the windows were computed; None if every
+            window has to be recomputed.
+        kwargs: other arguments of ``monai.inferers.SlidingWindowInferer``.
+    """
+
+    def __init__(
+        self,
+        roi_size,
+        sw_batch_size: int = 1,
+        overlap: float = 0.25,
+        windows: Optional[Dict[Tuple[int, ...], torch.Tensor]] = None,
+        changed: Optional[Sequence[Box]] = None,
+        **kwargs,
+    ):
+        # window coordinates are the cache keys
+        kwargs["with_coord"] = True
+        super().__init__(roi_size=roi_size, sw_batch_size=sw_batch_size, overlap=overlap, **kwargs)
+        self.windows = windows if windows is not None else {}
+        self.changed = changed
+        self.stats = {"windows": 0, "computed": 0}
+
+    def _is_dirty(self, key, coords, pad) -> bool:
+        if key not in self.windows or self.changed is None:
+            return True
+        box = ([sl.start - p for sl, p in zip(coords, pad)], [sl.stop - p for sl, p in zip(coords, pad)])
+        return any(boxes_intersect(box, c) for c in self.changed)
+
+    def __call__(self, inputs: torch.Tensor, network: Callable[..., torch.Tensor], *args: Any, **kwargs: Any):
+        image_size = inputs.shape[2:]
+        roi_size = fall_back_tuple(self.roi_size, image_size)
+        # sliding_window_inference pads symmetrically when the image is smaller than roi
+        pad = [max(r - i, 0) // 2 for r, i in zip(roi_size, image_size)]
+        self.stats.update({"windows": 0, "computed": 0})
+
+        def predictor(win_data, coords, *a, **kw):
+            keys = [tuple(sl.start for sl in c[2:]) for c in coords]
+            dirty = [i for i, (k, c) in enumerate(zip(keys, coords)) if self._is_dirty(k, c[2:], pad)]
+            self.stats["windows"] += len(keys)
+            self.stats["computed"] += len(dirty)
+
+            if dirty:
+                pred = network(win_data if len(dirty) == len(keys) else win_data[dirty], *a, **kw)
+                for i, p in zip(dirty, pred):
+                    self.windows[keys[i]] = p.detach().clone()
+            return torch.stack([self.windows[k] for k in keys]).to(win_data.device)
+
+        result = super().__call__(inputs, predictor, *args, **kwargs)
+        logger.info(f"Sliding Window:: computed {self.stats['computed']} of {self.stats['windows']} windows")
+        return result
@@ -0,0 +1,114 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import logging
+from typing import Any, Callable, Union
+
+import torch
+from monai.inferers import Inferer
+
+logger = logging.getLogger(__name__)
+
+PRECISIONS = ("fp32", "bf16", "auto")
+
+# CPU capabilities with native bf16 dot products (AVX512-BF16 / AMX); on older CPUs bf16 is emulated and slower
+_BF16_CPU_CAPABILITIES = ("AVX512", "AMX")
+
+
+def device_type(device: Union[str, torch.device]) -> str:
+    return torch.device(device).type
+
+
+def bf16_supported(device: Union[str, torch.device] = "cpu") -> bool:
+    if device_type(device) == "cuda":
+        return torch.cuda.is_available() and torch.cuda.is_bf16_supported()
+    if not torch.backends.mkldnn.is_available():
+        return False
+    if not torch.backends.cpu.get_cpu_capability().startswith(_BF16_CPU_CAPABILITIES):
+        return False
+    is_supported = getattr(torch.ops.mkldnn, "_is_mkldnn_bf16_supported", None)
+    return bool(is_supported()) if is_supported else True
+
+
+def resolve_precision(precision: str, device: Union[str, torch.device] = "cpu") -> str:
+    """
+    ``fp32`` | ``bf16`` | ``auto`` => the precision actually used on ``device`` (``bf16`` or ``fp32``).
+
+    ``auto`` uses bf16 only where the hardware supports it; an explicit ``bf16`` on unsupported hardware falls
+    back to fp32 with a warning instead of failing.
+    """
+    if isinstance(precision, (list, tuple)):  # train/infer config options: first one is the default
+        precision = precision[0] if precision else None
+    precision = (precision or "fp32").lower()
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision}; expected one of {PRECISIONS}")
+    if precision == "fp32":
+        return "fp32"
+    if bf16_supported(device):
+        return "bf16"
+    if precision == "bf16":
+        logger.warning(f"bf16 is not supported on {device} ({torch.backends.cpu.get_cpu_capability()}); using fp32")
+    return "fp32"
+
+
+def autocast(precision: str, device: Union[str, torch.device] = "cpu"):
+    """``torch.autocast`` context for a resolved precision (no-op for fp32)."""
+    if precision != "bf16":
+        return contextlib.nullcontext()
+    return torch.autocast(device_type=device_type(device), dtype=torch.bfloat16)
+
+
+def _to_float(outputs: Any) -> Any:
+    if isinstance(outputs, torch.Tensor):
+        return outputs.float() if outputs.is_floating_point() else outputs
+    if isinstance(outputs, dict):
+        return {k: _to_float(v) for k, v in outputs.items()}
+    if isinstance(outputs, (list, tuple)):
+        return type(outputs)(_to_float(v) for v in outputs)
+    return outputs
+
+
+class AutocastInferer(Inferer):
+    """
+    Runs the network calls of ``inferer`` under bf16 autocast.
+
+    Only the network forward is autocast; its outputs are cast back to fp32, so sliding window blending,
+    activations and losses stay in fp32.  With ``fp32`` (or bf16 unsupported on the device) it is a pass-through.
+
+    Args:
+        inferer: wrapped inferer (e.g. ``SlidingWindowInferer`` / ``SimpleInferer``).
+        precision: ``fp32`` | ``bf16`` | ``auto``.
+        device: device the network runs on (used to check bf16 support).
+    """
+
+    def __init__(self, inferer: Inferer, precision: str = "auto", device: Union[str, torch.device] = "cpu"):
+        super().__init__()
+        self.inferer = inferer
+        self.device = device
+        self.precision = resolve_precision(precision, device)
+
+    def __call__(self, inputs: torch.Tensor, network: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if self.precision == "fp32":
+            return self.inferer(inputs, network, *args, **kwargs)
+
+        def predictor(x, *a, **kw):
+            with autocast(self.precision, inputs.device):
+                outputs = network(x, *a, **kw)
+            return _to_float(outputs)
+
+        return self.inferer(inputs, predictor, *args, **kwargs)
+
+    def __getattr__(self, name):
+        # e.g. ``stats`` / ``roi_size`` of the wrapped inferer
+        if name == "inferer":
+            raise AttributeError(name)
+        return getattr(self.inferer, name)
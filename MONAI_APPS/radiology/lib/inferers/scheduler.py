@@ -0,0 +1,304 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+def _autocast_state(device: torch.device):
+    """Autocast dtype of the calling thread (autocast is thread local: the worker re-enters it)."""
+    if torch.is_autocast_enabled(device.type):
+        return torch.get_autocast_dtype(device.type)
+    return None
+
+
+class _Call:
+    __slots__ = ("inputs", "key", "caller", "future", "enqueued")
+
+    def __init__(self, inputs: torch.Tensor, key):
+        self.inputs = inputs
+        self.key = key
+        self.caller = threading.get_ident()
+        self.future: Future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class MicroBatcher:
+    """
+    Coalesces the forward calls of one network made by concurrent requests into micro-batches.
+
+    Sliding window inferers call ``network(windows)`` with a few windows at a time; each call is queued and a
+    worker concatenates the queued windows of compatible calls (same window shape, dtype, device and autocast
+    dtype) up to ``max_batch`` windows, runs the network once and hands every caller its slice of the output.
+    A call waits at most ``max_wait_ms`` for other requests, and only while other requests are using the network
+    (a single request is never delayed).  Workers stop after ``idle`` seconds without calls.
+
+    Args:
+        network: network (or any callable batch => batch, e.g. an ONNX Runtime session wrapper).
+        max_batch: maximum number of windows per forward.
+        max_wait_ms: latency window to gather calls of other requests.
+        workers: threads running forwards (1 per GPU is usually enough; more can overlap CPU work).
+        idle: seconds without calls after which the workers exit.
+    """
+
+    def __init__(
+        self, network: Callable, max_batch: int = 16, max_wait_ms: float = 10, workers: int = 1, idle: float = 60
+    ):
+        self.network = network
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.workers = max(1, workers)
+        self.idle = idle
+        self.last_used = time.time()
+
+        self._queue: Deque[_Call] = deque()
+        self._cond = threading.Condition()
+        self._running = 0
+        self._callers: Dict[int, float] = {}  # thread => last call; concurrent requests
+        self._closed = False
+
+        self.calls = self.batches = self.windows = 0
+        self.requests = self.shared_batches = 0  # requests per batch; batches of more than one request
+        self.wait_ms: Deque[float] = deque(maxlen=1000)
+
+    # nn.Module like interface used by BasicInferTask / inferers
+    def eval(self):
+        return self
+
+    def __getattr__(self, name):
+        if name == "network":
+            raise AttributeError(name)
+        return getattr(self.network, name)
+
+    def __call__(self, inputs: torch.Tensor, *args, **kwargs) -> Any:
+        if args or kwargs or not isinstance(inputs, torch.Tensor) or torch.is_grad_enabled():
+            return self.network(inputs, *args, **kwargs)
+        return self.submit(inputs).result()
+
+    @property
+    def depth(self) -> int:
+        """Queued calls (not yet dispatched)."""
+        return len(self._queue)
+
+    def submit(self, inputs: torch.Tensor) -> Future:
+        call = _Call(inputs, (tuple(inputs.shape[1:]), inputs.dtype, inputs.device, _autocast_state(inputs.device)))
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            now = time.time()
+            self.last_used = now
+            self._callers[call.caller] = now
+            self._queue.append(call)
+            if self._running < self.workers:
+                self._running += 1
+                threading.Thread(target=self._run, name="InferBatch", daemon=True).start()
+            self._cond.notify()
+        return call.future
+
+    def release(self, caller: Optional[int] = None):
+        """The request of thread ``caller`` (default: this thread) ended: calls no longer wait for it."""
+        with self._cond:
+            if self._callers.pop(threading.get_ident() if caller is None else caller, None) is not None:
+                self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        wait = np.asarray(self.wait_ms) if self.wait_ms else np.zeros(1)
+        return {
+            "queue_depth": self.depth,
+            "calls": self.calls,
+            "batches": self.batches,
+            "windows": self.windows,
+            "mean_batch": round(self.windows / self.batches, 2) if self.batches else 0,
+            "mean_requests": round(self.requests / self.batches, 2) if self.batches else 0,
+            "shared_batches": self.shared_batches,
+            "wait_ms": {"p50": round(float(np.median(wait)), 2), "p95": round(float(np.percentile(wait, 95)), 2)},
+        }
+
+    def _concurrent(self, now: float) -> bool:
+        # callers are released when their request ends; callers never released (no ``track``) expire
+        horizon = max(1.0, 20 * self.max_wait)
+        for ident, last in list(self._callers.items()):
+            if now - last > horizon:
+                del self._callers[ident]
+        return len(self._callers) > 1
+
+    def _next_batch(self) -> Optional[List[_Call]]:
+        with self._cond:
+            while not self._queue:
+                if self._closed or not self._cond.wait(timeout=self.idle) and not self._queue:
+                    self._running -= 1
+                    return None
+
+            # wait for the other requests (at most max_wait) unless every one already queued a call
+            first = self._queue[0]
+            if self._concurrent(time.time()):
+                deadline = first.enqueued + self.max_wait
+                while time.perf_counter() < deadline and not self._ready(first.key):
+                    self._cond.wait(timeout=max(0.0, deadline - time.perf_counter()))
+
+            batch, size = [], 0
+            for call in list(self._queue):
+                n = call.inputs.shape[0]
+                if call.key != first.key or (batch and size + n > self.max_batch):
+                    continue
+                self._queue.remove(call)
+                batch.append(call)
+                size += n
+            return batch
+
+    def _ready(self, key) -> bool:
+        calls = [c for c in self._queue if c.key == key]
+        windows = sum(c.inputs.shape[0] for c in calls)
+        return windows >= self.max_batch or len({c.caller for c in calls}) >= len(self._callers)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            start = time.perf_counter()
+            for call in batch:
+                self.wait_ms.append(1000 * (start - call.enqueued))
+            device, amp = batch[0].inputs.device, batch[0].key[3]
+            try:
+                inputs = torch.cat([c.inputs for c in batch]) if len(batch) > 1 else batch[0].inputs
+                ctx = torch.autocast(device_type=device.type, dtype=amp) if amp else contextlib.nullcontext()
+                with torch.no_grad(), ctx:
+                    outputs = self.network(inputs)
+            except BaseException as e:
+                for call in batch:
+                    call.future.set_exception(e)
+                continue
+
+            offset = 0
+            for call in batch:
+                n = call.inputs.shape[0]
+                call.future.set_result(_slice(outputs, offset, offset + n))
+                offset += n
+            requests = len({call.caller for call in batch})
+            self.calls += len(batch)
+            self.batches += 1
+            self.windows += offset
+            self.requests += requests
+            self.shared_batches += requests > 1
+
+
+def _slice(outputs: Any, start: int, end: int) -> Any:
+    if isinstance(outputs, torch.Tensor):
+        return outputs[start:end]
+    if isinstance(outputs, dict):
+        return {k: _slice(v, start, end) for k, v in outputs.items()}
+    if isinstance(outputs, (list, tuple)):
+        return type(outputs)(_slice(v, start, end) for v in outputs)
+    return outputs
+
+
+class InferenceScheduler:
+    """
+    Inference scheduler of the app: one ``MicroBatcher`` per resident network (tasks sharing a pooled network
+    share its batches), and per model request metrics (queue depth = requests in flight, latency).
+
+    ``network(network, data)`` is used by the infer tasks in ``_get_network``; it returns the network itself
+    when the scheduler is disabled or the request sets ``coalesce: false``.  ``track(model)`` wraps a request (run
+    in one thread): its metrics, and when it ends the batchers stop waiting for its calls.
+    Requests only overlap if the server runs them concurrently (see ``lib.endpoints.install_concurrent_infer``).
+    """
+
+    def __init__(self, enabled: bool = True, max_batch: int = 16, max_wait_ms: float = 10, workers: int = 1):
+        self.enabled = enabled
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.workers = workers
+        self._batchers: Dict[int, MicroBatcher] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._latency: Dict[str, Deque[float]] = {}
+        self._requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, **kwargs):
+        for k, v in kwargs.items():
+            if not hasattr(self, k):
+                raise ValueError(f"Unknown scheduler option: {k}")
+            setattr(self, k, v)
+
+    def network(self, network: Any, data: Optional[Dict[str, Any]] = None):
+        if network is None or not self.enabled or (data and str(data.get("coalesce", True)).lower() == "false"):
+            return network
+        with self._lock:
+            now = time.time()
+            for key, b in list(self._batchers.items()):
+                # networks replaced in the pool (new model / evicted) are released after a while
+                if b.network is not network and now - b.last_used > b.idle and not b.depth:
+                    b.close()
+                    del self._batchers[key]
+            batcher = self._batchers.get(id(network))
+            if batcher is None or batcher.network is not network:
+                batcher = MicroBatcher(network, self.max_batch, self.max_wait_ms, self.workers)
+                self._batchers[id(network)] = batcher
+            return batcher
+
+    @contextlib.contextmanager
+    def track(self, model: str):
+        with self._lock:
+            self._in_flight[model] = self._in_flight.get(model, 0) + 1
+            self._requests[model] = self._requests.get(model, 0) + 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight[model] -= 1
+                self._latency.setdefault(model, deque(maxlen=1000)).append(time.perf_counter() - start)
+                # the calls of the other requests no longer wait for this one
+                for batcher in self._batchers.values():
+                    batcher.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            models = {}
+            for model, count in self._requests.items():
+                latency = np.asarray(self._latency.get(model) or [0.0])
+                models[model] = {
+                    "queue_depth": self._in_flight.get(model, 0),
+                    "requests": count,
+                    "latency_s": {
+                        "mean": round(float(latency.mean()), 3),
+                        "p50": round(float(np.median(latency)), 3),
+                        "p95": round(float(np.percentile(latency, 95)), 3),
+                        "max": round(float(latency.max()), 3),
+                    },
+                }
+            batchers = {type(b.network).__name__ + f"@{k:x}": b.stats() for k, b in self._batchers.items()}
+        return {"enabled": self.enabled, "models": models, "batchers": batchers}
+
+
+_scheduler = InferenceScheduler()
+
+
+def inference_scheduler() -> InferenceScheduler:
+    """Process wide ``InferenceScheduler`` (configured by the app, e.g. ``--conf coalesce_max_batch``)."""
+    return _scheduler
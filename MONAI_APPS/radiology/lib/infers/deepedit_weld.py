@@ -0,0 +1,177 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+import logging
+import os
+
+import numpy as np
+from lib.inferers import AutocastInferer, SlidingWindowExplainInferer, inference_scheduler
+from lib.networks import WELD_CAM_LAYER, load_weld_model, model_pool, resolve_model, weld_unet
+from lib.transforms.transforms import DefectStatisticsd
+from monai.data import MetaTensor
+from monai.inferers import SlidingWindowInferer
+from monai.transforms import (
+    Activationsd,
+    AsDiscreted,
+    CopyItemsd,
+    EnsureChannelFirstd,
+    EnsureTyped,
+    Lambdad,
+    LoadImaged,
+    ScaleIntensityd,
+    SqueezeDimd,
+)
+
+from monailabel.interfaces.tasks.infer_v2 import InferType
+from monailabel.tasks.infer.basic_infer import BasicInferTask
+from monailabel.transform.writer import Writer
+from monailabel.utils.others.generic import strtobool
+
+logger = logging.getLogger(__name__)
+
+# Modelo del Anexo A (best_metric_model.pth); junto a él pueden estar los artefactos exportados
+# con scripts/export_model.py (.onnx / .ts) o scripts/quantize_model.py (.int8.onnx)
+DEFAULT_MODEL = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "model", "best_metric_model.pth")
+
+
+class DeepEditWeld(BasicInferTask):
+    """
+    This provides Inference Engine for the weld defect segmentation UNet (Annex A) on CPU.
+
+    The exported artifact next to the checkpoint (ONNX Runtime, or TorchScript optimized for oneDNN) is served when
+    present, the eager model otherwise; ``runtime`` (config or request) forces one of them, ``int8`` the quantized
+    ONNX model. ``precision=bf16`` autocasts the segmentation forward where the CPU supports it. Networks come from
+    the resident model pool, shared read-only between tasks, and the windows of concurrent requests are coalesced
+    into micro-batches by the inference scheduler.
+
+    With ``explain`` the defect probability and its Grad-CAM map come from the same sliding-window pass and are
+    written as extra outputs (``result["explain"]``). Per-defect statistics (``defect_stats``) are added to the
+    result json.
+    """
+
+    def __init__(self, path=None, runtime="auto", threads=0, roi_size=(64, 64, 64), precision="fp32"):
+        super().__init__(
+            path=path if path else DEFAULT_MODEL,
+            network=weld_unet(),
+            type=InferType.SEGMENTATION,
+            labels={"background": 0, "defect": 1},
+            dimension=3,
+            description="Segmentación de defectos en soldaduras (UNet del Anexo A, CPU optimizado)",
+            load_strict=False,
+            # runtime: auto | onnx | int8 | torchscript | eager (se puede cambiar por petición)
+            # explain: segmentación + probabilidad + Grad-CAM del defecto en una sola pasada
+            # defect_stats: estadísticas por defecto (volumen, bbox, distancia a la superficie) en el json
+            # precision: fp32 | bf16 | auto (autocast bf16 en CPUs con AVX512-BF16/AMX, si no fp32)
+            config={
+                "runtime": runtime,
+                "threads": threads,
+                "precision": precision,
+                "explain": False,
+                "explain_defect_only": True,
+                "defect_stats": True,
+            },
+        )
+        self.roi_size = roi_size
+        logger.info("✅ DeepEditWeld inicializado correctamente")
+
+    def pre_transforms(self, data=None):
+        return [
+            LoadImaged(keys="image"),
+            EnsureChannelFirstd(keys="image"),
+            ScaleIntensityd(keys="image"),
+            EnsureTyped(keys="image", device=data.get("device") if data else None),
+        ]
+
+    def _explain(self, data):
+        return strtobool(data.get("explain", False)) if data else False
+
+    def inferer(self, data=None):
+        if self._explain(data):
+            # Mismas ventanas que la inferencia; cada ventana pasa una sola vez por la red
+            inferer = SlidingWindowExplainInferer(
+                roi_size=self.roi_size,
+                target_layer=WELD_CAM_LAYER,
+                class_idx=self.labels["defect"],
+                sw_batch_size=4,
+                overlap=0.25,
+                defect_only=strtobool(data.get("explain_defect_only", True)),
+            )
+            data.setdefault(self.output_json_key, {})["explain"] = {"sliding_window": inferer.stats}
+            return inferer
+        # Grad-CAM siempre en fp32; bf16 solo para la segmentación
+        inferer = SlidingWindowInferer(roi_size=self.roi_size, sw_batch_size=4, overlap=0.25, mode="gaussian")
+        precision = data.get("precision", "fp32") if data else "fp32"
+        return AutocastInferer(inferer, precision, data.get("device") or "cpu") if precision != "fp32" else inferer
+
+    def run_inferer(self, data, convert_to_batch=True, device="cuda"):
+        data = super().run_inferer(data, convert_to_batch, device)
+        outputs = data[self.output_label_key]
+        if isinstance(outputs, dict):
+            # decollate_batch rompe el affine de las salidas (dict); se usa la geometría de la imagen
+            meta = data[self.input_key].meta
+            data[self.output_label_key] = MetaTensor(outputs["pred"].as_tensor(), meta=meta)
+            data["cam"] = MetaTensor(outputs["cam"].as_tensor(), meta=meta)
+        return data
+
+    def post_transforms(self, data=None):
+        t = [
+            EnsureTyped(keys="pred", device=data.get("device") if data else None),
+            Activationsd(keys="pred", softmax=True),
+        ]
+        if self._explain(data):
+            defect = self.labels["defect"]
+            t.extend(
+                [
+                    CopyItemsd(keys="pred", names="prob"),
+                    Lambdad(keys="prob", func=lambda p: p[defect]),
+                    SqueezeDimd(keys="cam", dim=0),
+                ]
+            )
+        t.append(AsDiscreted(keys="pred", argmax=True))
+        if data and strtobool(data.get("defect_stats", True)):
+            t.append(DefectStatisticsd(keys="pred", image_key="image", defect_label=self.labels["defect"]))
+        t.append(SqueezeDimd(keys="pred", dim=0))
+        return t
+
+    def writer(self, data, extension=None, dtype=None):
+        result_file, result_json = super().writer(data, extension, dtype)
+        if "cam" in data:
+            # Salidas extra: probabilidad del defecto y mapa Grad-CAM (float32, mismo espacio que la máscara)
+            d = dict(data, result_dtype=np.float32)
+            explain = result_json.setdefault("explain", {})
+            for key in ("prob", "cam"):
+                explain[key] = Writer(label=key, ref_image=self.output_label_key)(d)[0]
+        return result_file, result_json
+
+    def _get_network(self, device, data):
+        # Artefacto exportado (ONNX Runtime / TorchScript + oneDNN) si existe; si no, el modelo eager.
+        # Grad-CAM necesita el modelo eager (hooks y gradientes)
+        runtime = data.get("runtime", "auto") if data else "auto"
+        runtime = "eager" if self._explain(data) else runtime
+        runtime, artifact = resolve_model(self.path[0], device, runtime)
+        if not os.path.exists(artifact):
+            raise FileNotFoundError(f"Modelo no encontrado: {artifact}")
+
+        # Pool de modelos residentes: una sola copia por artefacto/runtime/dispositivo compartida (solo lectura)
+        # entre tareas y peticiones
+        threads = int(data.get("threads", 0)) if data else 0
+        key = ("weld", os.path.realpath(artifact), runtime, str(device), threads)
+        network = model_pool().get(
+            key,
+            lambda: load_weld_model(artifact, device=device, runtime=runtime, threads=threads, strict=self.load_strict),
+            artifact,
+        )
+        # Grad-CAM registra hooks y calcula gradientes: cada petición explain usa su propia copia del modelo
+        if self._explain(data):
+            return copy.deepcopy(network)
+        # Planificador: las ventanas de peticiones concurrentes (varios operadores) se agrupan en micro-batches
+        return inference_scheduler().network(network, data)
@@ -10,7 +10,6 @@
 # limitations under the License.
 
 import logging
-import os
 from typing import Callable, Sequence
 
 import numpy as np
@@ -27,21 +26,26 @@ from monai.inferers import Inferer, SimpleInferer
 from monai.transforms import (
     AsChannelLastd,
     EnsureChannelFirstd,
-    LoadImage,
     LoadImaged,
     NormalizeIntensityd,
     Resized,
     Spacingd,
-    Transpose,
     Transposed,
 )
+from monai.utils import optional_import
 
 from monailabel.interfaces.tasks.infer_v2 import InferTask, InferType
 from monailabel.tasks.infer.basic_infer import BasicInferTask
 from monailabel.transform.post import BoundingBoxd, LargestCCd
 
+ndimage, _ = optional_import("scipy.ndimage")
+
 logger = logging.getLogger(__name__)
 
+# 2D (in slice) neighbourhoods of a (slice, H, W) volume: 4-connectivity (LargestCCd) and chessboard distance
+IN_SLICE_CONNECTIVITY = np.array([np.zeros((3, 3)), [[0, 1, 0], [1, 1, 1], [0, 1, 0]], np.zeros((3, 3))], dtype=bool)
+IN_SLICE_CHESSBOARD = np.array([np.zeros((3, 3)), np.ones((3, 3)), np.zeros((3, 3))], dtype=bool)
+
 
 class InferDeepgrowPipeline(BasicInferTask):
     def __init__(
@@ -81,6 +85,7 @@ class InferDeepgrowPipeline(BasicInferTask):
         self.output_largest_cc = output_largest_cc
 
     def pre_transforms(self, data=None) -> Sequence[Callable]:
+        model_size = data.get("model_size", self.model_size) if data else self.model_size
         t = [
             LoadImaged(keys="image", image_only=False),
             Transposed(keys="image", indices=[2, 0, 1]),
@@ -88,7 +93,7 @@ class InferDeepgrowPipeline(BasicInferTask):
             AddGuidanceFromPointsd(ref_image="image", guidance="guidance", spatial_dims=3),
             EnsureChannelFirstd(keys="image", channel_dim="no_channel"),
             SpatialCropGuidanced(keys="image", guidance="guidance", spatial_size=self.spatial_size),
-            Resized(keys="image", spatial_size=self.model_size, mode="area"),
+            Resized(keys="image", spatial_size=model_size, mode="area"),
             ResizeGuidanced(guidance="guidance", ref_image="image"),
             NormalizeIntensityd(keys="image", subtrahend=208, divisor=388),
             AddGuidanceSignald(image="image", guidance="guidance"),
@@ -107,23 +112,19 @@ class InferDeepgrowPipeline(BasicInferTask):
         ]
 
     def __call__(self, request):
-        result_file, result_json = self.model_3d(request)
-
-        label = LoadImage(image_only=True)(result_file)
-        label = Transpose(indices=[2, 0, 1])(label)
+        # 3D prediction kept in memory: the writer returns the label array instead of a file
+        result, result_json = self.model_3d({**request, "result_write_to_file": False})
+        label = result.cpu().numpy() if isinstance(result, torch.Tensor) else np.asarray(result)
+        label = np.transpose(label, (2, 0, 1))
         logger.debug(f"Label shape: {label.shape}")
 
         foreground, slices = self.get_slices_points(label, request.get("foreground", []))
-        if os.path.exists(result_file):
-            os.unlink(result_file)
-
-        request["foreground"] = foreground
-        request["slices"] = slices
 
-        # TODO:: fix multi-thread issue
-        self.model_size = (label.shape[0], self.model_size[-2], self.model_size[-1])
-        logger.info(f"Model Size: {self.model_size}")
+        # request scoped: concurrent requests of other sizes do not share it
+        model_size = (label.shape[0], self.model_size[-2], self.model_size[-1])
+        logger.info(f"Model Size: {model_size}")
 
+        request = {**request, "foreground": foreground, "slices": slices, "model_size": model_size}
         result_file, j = super().__call__(request)
         result_json.update(j)
         return result_file, result_json
@@ -145,13 +146,13 @@ class InferDeepgrowPipeline(BasicInferTask):
             batched_data.append(img)
             batched_slices.append(slice_idx)
             if 0 < self.batch_size == len(batched_data):
-                self.run_batch(super().run_inferer, batched_data, batched_slices, pred)
+                self.run_batch(super().run_inferer, batched_data, batched_slices, pred, device)
                 batched_data = []
                 batched_slices = []
 
         # Last batch
         if len(batched_data):
-            self.run_batch(super().run_inferer, batched_data, batched_slices, pred)
+            self.run_batch(super().run_inferer, batched_data, batched_slices, pred, device)
 
         pred = pred[np.newaxis]
         logger.debug(f"Prediction: {pred.shape}; sum: {np.sum(pred)}")
@@ -159,62 +160,72 @@ class InferDeepgrowPipeline(BasicInferTask):
         data[self.output_label_key] = pred
         return data
 
-    def run_batch(self, run_inferer_method, batched_data, batched_slices, pred):
+    def run_batch(self, run_inferer_method, batched_data, batched_slices, pred, device="cuda"):
         bdata = {self.input_key: torch.as_tensor(batched_data)}
-        outputs = run_inferer_method(bdata, False)
+        outputs = run_inferer_method(bdata, False, device)
         for i, s in enumerate(batched_slices):
             p = torch.sigmoid(outputs[self.output_label_key][i]).detach().cpu().numpy()
             p[p > 0.5] = 1
             pred[s] = LargestCCd.get_largest_cc(p) if self.output_largest_cc else p
 
-    def get_random_points(self, label):
-        points = []
-        count = min(self.max_random_points, int(np.sum(label) // self.random_point_density))
-        if count:
-            label_idx = np.where(label > 0.5)
-            for _ in range(count):
-                seed = np.random.randint(0, len(label_idx[0]))
-                points.append([label_idx[0][seed], label_idx[1][seed]])
-        return points
-
     def get_slices_points(self, label, initial_foreground):
+        """
+        Foreground points of every slice (first axis) of the 3D label, computed for all slices at once.
+
+        Per slice: largest 4-connected component (``LargestCCd``); slices where it has less than
+        ``min_point_density`` voxels are skipped.  One seed drawn with probability ``exp(distance) - 1`` (chessboard
+        distance to the component border, as ``AddInitialSeedPointd``) plus up to ``max_random_points`` uniform
+        points (one per ``random_point_density`` voxels).
+        """
         if isinstance(label, torch.Tensor):
-            label = label.numpy()
+            label = label.cpu().numpy()
+        label = np.asarray(label) > 0.5
         logger.debug(f"Label shape: {label.shape}")
 
-        foreground_all = initial_foreground
-        max_slices = label.shape[0]
-        for i in range(max_slices):
-            lab = label[i, :, :]
-            if np.sum(lab) == 0:
-                continue
-
-            lab = lab[np.newaxis]
-            foreground = []
-
-            # get largest cc
-            lab = LargestCCd.get_largest_cc(lab)
-            if np.sum(lab) < self.min_point_density:
-                logger.debug(f"Ignoring this slice: {i}; min existing points: {self.min_point_density}")
-                continue
-
-            # Add initial point  based on CDT/Distance
-            t = AddInitialSeedPointd()
-            guidance = t._apply(lab, None)
-            for point in guidance[0]:
-                if np.any(np.asarray(point) < 0):
-                    continue
-                foreground.append([point[-2], point[-1]])
-                foreground_all.append([point[-2], point[-1], i])
-
-            # Add Random points
-            points = self.get_random_points(lab[0])
-            for point in points:
-                foreground.append([point[-2], point[-1]])
-                foreground_all.append([point[-2], point[-1], i])
-            # logger.debug('Slice: {}; Sum: {}; Foreground Points: {}'.format(i, np.sum(lab), foreground))
+        # in slice components, numbered in raster order: the ones of slice i follow the ones of slice i - 1
+        components, n = ndimage.label(label, structure=IN_SLICE_CONNECTIVITY)
+        sizes = np.bincount(components.ravel(), minlength=n + 1)[1:]
+        last = np.maximum.accumulate(components.reshape(len(components), -1).max(axis=1))
+        component_slice = np.searchsorted(last, np.arange(1, n + 1))
+
+        # largest component per slice (lowest id on ties, as LargestCCd)
+        order = np.lexsort((np.arange(n), -sizes, component_slice))
+        slices, first = np.unique(component_slice[order], return_index=True)
+        largest = order[first]
+        dense = sizes[largest] >= self.min_point_density
+        logger.debug(f"Ignoring slices: {slices[~dense].tolist()}; min existing points: {self.min_point_density}")
+        slices, largest, sizes = slices[dense], largest[dense] + 1, sizes[largest[dense]]
 
+        points = self._slice_points(components, slices, largest, sizes) if len(slices) else np.zeros((0, 3), dtype=int)
+
+        foreground_all = list(initial_foreground) + points.tolist()
         logger.info(f"Total Foreground Points: {len(foreground_all)}")
-        slices = list(set((np.array(foreground_all)[:, 2]).astype(int).tolist()))
-        logger.info(f"Total slices: {len(slices)}; min: {min(slices)}; max: {max(slices)}")
+        slices = sorted({int(p[2]) for p in foreground_all})
+        if slices:
+            logger.info(f"Total slices: {len(slices)}; min: {min(slices)}; max: {max(slices)}")
         return foreground_all, slices
+
+    def _slice_points(self, components, slices, largest, sizes):
+        lut = np.zeros(components.max() + 1, dtype=bool)
+        lut[largest] = True
+        mask = lut[components[slices]]
+        rows = np.arange(len(slices))
+        voxels = np.flatnonzero(mask)  # grouped by slice
+        offsets = np.cumsum(sizes) - sizes
+
+        # initial seed (AddInitialSeedPointd), drawn from the per slice normalized cumulative weights
+        distance = ndimage.distance_transform_cdt(mask, metric=IN_SLICE_CHESSBOARD).ravel()[voxels]
+        weights = np.exp(distance) - 1.0
+        weights /= np.repeat(np.add.reduceat(weights, offsets), sizes)
+        cumulative = np.cumsum(weights)
+        draw = rows + np.random.random_sample(len(slices))
+        seeds = np.clip(np.searchsorted(cumulative, draw, side="right"), offsets, offsets + sizes - 1)
+
+        # random points, uniform over the component voxels
+        counts = np.minimum(self.max_random_points, sizes // self.random_point_density)
+        owner = np.repeat(rows, counts)
+        picks = offsets[owner] + (np.random.random_sample(len(owner)) * sizes[owner]).astype(int)
+
+        rows = np.concatenate([rows, owner])
+        x, y = np.unravel_index(voxels[np.concatenate([seeds, picks])] % mask[0].size, mask.shape[1:])
+        return np.stack([x, y, slices[rows]], axis=1)[np.argsort(rows, kind="stable")]
@@ -9,8 +9,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import logging
+import os
 from typing import Callable, Sequence
 
+from lib.inferers import AutocastInferer, inference_scheduler
+from lib.networks import load_exported, model_pool, pooled_network, resolve_model
 from lib.transforms.transforms import GetCentroidsd
 from monai.inferers import Inferer, SlidingWindowInferer
 from monai.transforms import (
@@ -30,6 +34,9 @@ from monai.transforms import (
 from monailabel.interfaces.tasks.infer_v2 import InferType
 from monailabel.tasks.infer.basic_infer import BasicInferTask
 from monailabel.transform.post import Restored
+from monailabel.utils.others.generic import strtobool
+
+logger = logging.getLogger(__name__)
 
 
 class Segmentation(BasicInferTask):
@@ -62,7 +69,7 @@ class Segmentation(BasicInferTask):
 
     def pre_transforms(self, data=None) -> Sequence[Callable]:
         t = [
-            LoadImaged(keys="image"),
+            self._loader(data),
             EnsureTyped(keys="image", device=data.get("device") if data else None),
             EnsureChannelFirstd(keys="image"),
             Orientationd(keys="image", axcodes="RAS"),
@@ -73,14 +80,26 @@ class Segmentation(BasicInferTask):
         ]
         return t
 
+    def _loader(self, data):
+        # chunked_store: read image.zarr (scripts/convert_chunked.py) next to the image when it exists; full
+        # resolution level, so the result is restored on the original grid
+        if data and strtobool(data.get("chunked_store", False)):
+            from lib.datastore.chunked import LoadChunkedd
+
+            return LoadChunkedd(keys="image", level=0)
+        return LoadImaged(keys="image")
+
     def inferer(self, data=None) -> Inferer:
-        return SlidingWindowInferer(
+        inferer = SlidingWindowInferer(
             roi_size=self.roi_size,
             sw_batch_size=2,
             overlap=0.4,
             padding_mode="replicate",
             mode="gaussian",
         )
+        # precision: fp32 | bf16 | auto (bf16 autocast where the device supports it)
+        precision = data.get("precision", "fp32") if data else "fp32"
+        return AutocastInferer(inferer, precision, data.get("device") or "cpu") if precision != "fp32" else inferer
 
     def inverse_transforms(self, data=None):
         return []
@@ -105,3 +124,20 @@ class Segmentation(BasicInferTask):
             ]
         )
         return t
+
+    def _get_network(self, device, data):
+        # runtime: eager (default) | onnx | int8 | torchscript; exported artifacts live next to the checkpoint
+        # networks come from the resident model pool: tasks with the same checkpoint share one (read-only) copy
+        path = self.get_path()
+        runtime = data.get("runtime", "eager") if data else "eager"
+        if path and runtime != "eager":
+            runtime, artifact = resolve_model(path, device, runtime)
+        if not path or runtime == "eager":
+            network = pooled_network(self, device, data)
+            network = network if network is not None else super()._get_network(device, data)
+        else:
+            logger.info(f"Infer model path: {artifact} ({runtime})")
+            key = (runtime, os.path.realpath(artifact), str(device))
+            network = model_pool().get(key, lambda: load_exported(artifact, runtime, device), artifact)
+        # sliding windows of concurrent requests are coalesced into micro-batches
+        return inference_scheduler().network(network, data)
@@ -0,0 +1,225 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+from lib.inferers.incremental import Box
+from lib.transforms.transforms import LABELS_KEY, AddGuidanceSignal, get_guidance_tensor_for_key_label
+from monai.data import MetaTensor
+
+logger = logging.getLogger(__name__)
+
+
+def sparse_box(idx: torch.Tensor) -> Box:
+    """``[start, end)`` bounding box of voxel indices (N, dims)."""
+    return idx.min(dim=0).values.tolist(), (idx.max(dim=0).values + 1).tolist()
+
+
+def changed_voxels(old: Tuple[torch.Tensor, torch.Tensor], new: Tuple[torch.Tensor, torch.Tensor]) -> torch.Tensor:
+    """Voxels (N, dims) whose value differs between two sparse signals (indices, values)."""
+    idx = torch.cat([old[0], new[0]])
+    if not len(idx):
+        return idx
+    voxels, inverse = torch.unique(idx, dim=0, return_inverse=True)
+    before = torch.zeros(len(voxels), dtype=torch.float64).index_put_((inverse[: len(old[0])],), old[1].double().cpu())
+    after = torch.zeros(len(voxels), dtype=torch.float64).index_put_((inverse[len(old[0]) :],), new[1].double().cpu())
+    return voxels[before != after]
+
+
+def target_box(box: Box, source_shape: Sequence[int], to_target: np.ndarray, target_shape: Sequence[int]) -> Box:
+    """
+    Voxels of the target grid whose (linear, border padded) resampling reads a source voxel in ``box``.
+    ``to_target`` maps source voxel coordinates to target voxel coordinates.
+    """
+    # trilinear reads floor(x) and floor(x) + 1; voxels past the border read the border voxel
+    low = [s - 1 if s > 0 else -1e6 for s in box[0]]
+    high = [e if e < n else 1e6 for e, n in zip(box[1], source_shape)]
+    corners = np.array(np.meshgrid(*zip(low, high), indexing="ij")).reshape(len(low), -1)
+    mapped = to_target[:3, :3] @ corners + to_target[:3, 3:4]
+    start = np.clip(np.floor(mapped.min(axis=1)), 0, target_shape).astype(int)
+    end = np.clip(np.ceil(mapped.max(axis=1)) + 1, 0, target_shape).astype(int)
+    return start.tolist(), end.tolist()
+
+
+def resample_sparse(
+    signal: Tuple[torch.Tensor, torch.Tensor], source_shape: Sequence[int], to_source: np.ndarray, box: Box
+) -> torch.Tensor:
+    """
+    Linear (border padded) resampling of a sparse source signal on the target voxels of ``box``, same as
+    ``Orientationd`` + ``Spacingd`` on the dense signal.  ``to_source`` maps target to source voxel coordinates.
+    """
+    start, end = box
+    grid = torch.meshgrid(*[torch.arange(s, e, dtype=torch.float64) for s, e in zip(start, end)], indexing="ij")
+    points = torch.stack([g.reshape(-1) for g in grid], dim=1)
+    m = torch.as_tensor(to_source, dtype=torch.float64)
+    size = torch.tensor(source_shape)
+    coords = torch.minimum(torch.clamp(points @ m[:3, :3].T + m[:3, 3], min=0), (size - 1).double())
+
+    # dense canvas of the source region read by these voxels
+    lo = coords.floor().long().min(dim=0).values
+    hi = torch.minimum(coords.floor().long().max(dim=0).values + 2, size)
+    canvas = torch.zeros(tuple((hi - lo).tolist()), dtype=torch.float64)
+    idx, values = signal[0].cpu(), signal[1].cpu().double()
+    inside = torch.all((idx >= lo) & (idx < hi), dim=1)
+    canvas[tuple((idx[inside] - lo).T)] = values[inside]
+
+    i0 = coords.floor().long()
+    frac = coords - i0
+    i1 = torch.minimum(i0 + 1, size - 1)
+    out = torch.zeros(len(points), dtype=torch.float64)
+    for corner in range(8):
+        bits = [(corner >> d) & 1 for d in range(3)]
+        weight = torch.ones(len(points), dtype=torch.float64)
+        for d in range(3):
+            weight *= frac[:, d] if bits[d] else 1 - frac[:, d]
+        at = [(i1[:, d] if bits[d] else i0[:, d]) - lo[d] for d in range(3)]
+        out += weight * canvas[at[0], at[1], at[2]]
+    return out.reshape([e - s for s, e in zip(start, end)])
+
+
+class InteractiveSession:
+    """
+    Preprocessed network input of one image, kept between the clicks of an interactive session.
+
+    ``data`` holds what the pre-transforms produced (the ``image`` input with intensity + guidance channels in
+    the network grid, its meta dict); ``clicks`` the clicks already rasterized in it; ``windows`` the sliding
+    window outputs computed on it (see ``IncrementalSlidingWindowInferer``) and ``changed`` the boxes of the
+    input changed by clicks since those windows were computed.
+    """
+
+    def __init__(
+        self,
+        signature: Dict[str, Any],
+        data: Dict[str, Any],
+        clicks: Dict[str, Any],
+        source_shape: Sequence[int],
+        source_affine: np.ndarray,
+    ):
+        self.signature = signature
+        self.data = data
+        self.clicks = clicks
+        self.source_shape = tuple(source_shape)
+        self.source_affine = np.asarray(source_affine, dtype=np.float64)
+        self.windows: Dict[Tuple[int, ...], torch.Tensor] = {}
+        self.window_signature: Optional[Dict[str, Any]] = None
+        self.changed: Optional[List[Box]] = None
+
+        # ids of the pre-transforms of this request; invert transforms of the next ones run with new instances
+        for op in self.image.applied_operations:
+            op["id"] = "none"
+
+    @property
+    def image(self) -> MetaTensor:
+        return self.data["image"]
+
+    def restore(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Puts the cached pre-transform output in ``data``; the image shares the cached storage (read only)."""
+        data.update(self.data)
+        image = self.image
+        data["image"] = MetaTensor(
+            image.as_tensor(),
+            meta=copy.deepcopy(image.meta),
+            applied_operations=copy.deepcopy(image.applied_operations),
+        )
+        return data
+
+    def update(self, data: Dict[str, Any], guidance: AddGuidanceSignal) -> List[Box]:
+        """
+        Re-rasterizes only the clicks that changed (per label) and resamples the guidance channels only around
+        them.  Returns the changed boxes of the network input.
+        """
+        image = self.image
+        target_shape = tuple(image.shape[1:])
+        to_source = np.linalg.inv(self.source_affine) @ np.asarray(image.affine, dtype=np.float64)
+        to_target = np.linalg.inv(to_source)
+
+        boxes = []
+        for i, label in enumerate(data[LABELS_KEY]):
+            clicks = data.get(label, [])
+            if clicks == self.clicks.get(label, []):
+                continue
+            old = get_guidance_tensor_for_key_label(self.clicks, label, "cpu")
+            new = get_guidance_tensor_for_key_label(data, label, "cpu")
+            old = guidance.sparse_signal(self.source_shape, old, "cpu") if old.numel() else _empty()
+            new = guidance.sparse_signal(self.source_shape, new, "cpu") if new.numel() else _empty()
+            self.clicks[label] = copy.deepcopy(clicks)
+
+            voxels = changed_voxels(old, new)
+            if not len(voxels):
+                continue
+            box = target_box(sparse_box(voxels), self.source_shape, to_target, target_shape)
+            if any(e <= s for s, e in zip(*box)):
+                continue
+            values = resample_sparse(new, self.source_shape, to_source, box)
+            region = (guidance.number_intensity_ch + i, *[slice(s, e) for s, e in zip(*box)])
+            image.as_tensor()[region] = torch.as_tensor(values, dtype=image.dtype, device=image.device)
+            boxes.append(box)
+
+        if self.changed is not None:
+            self.changed.extend(boxes)
+        return boxes
+
+
+def _empty():
+    return torch.zeros((0, 3), dtype=torch.long), torch.zeros(0)
+
+
+class InteractiveSessions:
+    """
+    Per image ``InteractiveSession`` store: least recently used sessions are dropped beyond ``max_sessions``,
+    and sessions not used for ``ttl`` seconds are dropped.  ``lock(key)`` serializes the requests of one image.
+    """
+
+    def __init__(self, max_sessions: int = 2, ttl: float = 1200):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, Tuple[float, InteractiveSession]]" = OrderedDict()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, key: str) -> Optional[InteractiveSession]:
+        with self._lock:
+            self._expire()
+            if key not in self._sessions:
+                return None
+            self._sessions.move_to_end(key)
+            session = self._sessions[key][1]
+            self._sessions[key] = (time.time(), session)
+            return session
+
+    def put(self, key: str, session: InteractiveSession):
+        with self._lock:
+            self._sessions[key] = (time.time(), session)
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > max(self.max_sessions, 0):
+                dropped, _ = self._sessions.popitem(last=False)
+                logger.info(f"Interactive session dropped (max sessions: {self.max_sessions}): {dropped}")
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+    def _expire(self):
+        now = time.time()
+        for key in [k for k, (t, _) in self._sessions.items() if now - t > self.ttl]:
+            del self._sessions[key]
+            logger.info(f"Interactive session expired: {key}")
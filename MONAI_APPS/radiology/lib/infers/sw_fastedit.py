@@ -9,6 +9,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
 import json
 import logging
 import os
@@ -20,7 +21,15 @@ from typing import Callable, Sequence, Union
 import nibabel as nib
 import numpy as np
 import torch
-from lib.transforms.transforms import AddEmptySignalChannels, AddGuidanceSignal
+from lib.inferers import (
+    AutocastInferer,
+    ForegroundSlidingWindowInferer,
+    IncrementalSlidingWindowInferer,
+    inference_scheduler,
+)
+from lib.infers.session import InteractiveSession, InteractiveSessions
+from lib.networks import pooled_network
+from lib.transforms.transforms import LABELS_KEY, AddEmptySignalChannels, AddGuidanceSignal, ChannelBuffer
 from monai.inferers import Inferer, SlidingWindowInferer
 from monai.transforms import (
     Activationsd,
@@ -40,6 +49,7 @@ from monai.utils import set_determinism
 
 from monailabel.interfaces.tasks.infer_v2 import InferType
 from monailabel.tasks.infer.basic_infer import BasicInferTask, CallBackTypes
+from monailabel.utils.others.generic import strtobool
 
 # monai_version = pkg_resources.get_distribution("monai").version
 # if not pkg_resources.parse_version(monai_version) >= pkg_resources.parse_version("1.3.0"):
@@ -78,6 +88,7 @@ class SWFastEdit(BasicInferTask):
         set_determinism(42)
         self.model_state_dict = "net"
         self.load_strict = True
+        # torch.cuda.amp does nothing on CPU; mixed precision is the "precision" request option (bf16 autocast)
         self._amp = True
         # Either no crop with None or crop like (128,128,128), sliding window does not need this parameter unless
         # too much memory is used for the stitching of the output windows
@@ -94,12 +105,73 @@ class SWFastEdit(BasicInferTask):
         # Reduce this if you run into OOMs
         self.val_sw_batch_size = 16
 
+        # Interactive sessions: preprocessed input + window outputs per image, updated click by click
+        self.sessions = InteractiveSessions(
+            max_sessions=int(self._config.get("interactive_sessions", 2)),
+            ttl=float(self._config.get("cache_transforms_ttl", 1200)),
+        )
+        # network input (image + guidance channels) reused across requests; not with sessions, they keep it
+        self.channel_buffer = ChannelBuffer()
+
     def __call__(self, request, callbacks=None):
         if callbacks is None:
             callbacks = {}
         callbacks[CallBackTypes.POST_TRANSFORMS] = post_callback
 
-        return super().__call__(request, callbacks)
+        if not self._interactive(request):
+            with self.channel_buffer.lease():
+                return super().__call__(request, callbacks)
+        # the session of an image is updated in place: one request per image at a time
+        with self.sessions.lock(request["image"]):
+            return super().__call__(request, callbacks)
+
+    def _interactive(self, data) -> bool:
+        enabled = data.get("interactive_session", self._config.get("interactive_session", False))
+        return bool(strtobool(enabled)) and isinstance(data.get("image_path", data.get("image")), str)
+
+    def _channel_buffer(self, data):
+        # the input must not outlive the request: kept by a session or returned with skip_writer
+        if self._interactive(data) or strtobool(data.get("skip_writer", False)):
+            return None
+        return self.channel_buffer
+
+    def _session(self, data):
+        return self.sessions.get(data["image_path"]) if data and self._interactive(data) else None
+
+    def _session_signature(self, data):
+        stat = os.stat(data["image_path"])
+        return {
+            "image": (data["image_path"], stat.st_size, stat.st_mtime_ns),
+            "label_names": dict(self.label_names),
+            "target_spacing": tuple(self.target_spacing),
+            "val_crop_size": self.val_crop_size,
+            "device": str(data.get("device")),
+        }
+
+    def run_pre_transforms(self, data, transforms):
+        if not self._interactive(data):
+            return super().run_pre_transforms(data, transforms)
+
+        signature = self._session_signature(data)
+        session = self.sessions.get(data["image_path"])
+        guidance = next(t for t in transforms if isinstance(t, AddGuidanceSignal))
+        if session is not None and session.signature == signature:
+            boxes = session.update(data, guidance)
+            logger.info(f"Interactive session: {len(boxes)} guidance region(s) updated")
+            return session.restore(data)
+
+        # Full preprocessing; the intensity image right before the guidance channels is the grid the clicks
+        # are given in
+        split = next(i for i, t in enumerate(transforms) if isinstance(t, AddEmptySignalChannels))
+        data = super().run_pre_transforms(data, transforms[:split])
+        source_shape, source_affine = data["image"].shape[1:], data["image"].affine.clone()
+        data = super().run_pre_transforms(data, transforms[split:])
+
+        cached = {k: data[k] for k in ("image", "image_meta_dict") if k in data}
+        clicks = {label: copy.deepcopy(data.get(label, [])) for label in data[LABELS_KEY]}
+        session = InteractiveSession(signature, cached, clicks, source_shape, source_affine.numpy())
+        self.sessions.put(data["image_path"], session)
+        return session.restore(data)
 
     def pre_transforms(self, data=None) -> Sequence[Callable]:
         # print("#########################################")
@@ -130,7 +202,7 @@ class SWFastEdit(BasicInferTask):
         t.extend(t_val_1)
         # self.add_cache_transform(t, data)
         t_val_2 = [
-            AddEmptySignalChannels(keys=input_keys, device=device),
+            AddEmptySignalChannels(keys=input_keys, device=device, buffer=self._channel_buffer(data)),
             AddGuidanceSignal(
                 keys=input_keys,
                 sigma=1,
@@ -156,9 +228,57 @@ class SWFastEdit(BasicInferTask):
             "cache_roi_weight_map": False,
             "overlap": self.sw_overlap,
         }
-        eval_inferer = SlidingWindowInferer(sw_batch_size=self.val_sw_batch_size, **sw_params)
+        session = self._session(data)
+        if session is not None:
+            # Only windows touched by the new clicks are recomputed (every window on the first request)
+            path = self.get_path()
+            signature = {
+                "model": (path, os.stat(path).st_mtime_ns) if path else None,
+                "model_filename": data.get("model_filename"),
+                "precision": data.get("precision", "fp32"),
+                "sw_params": sw_params,
+            }
+            if session.window_signature != signature:
+                session.windows.clear()
+                session.changed = None
+                session.window_signature = signature
+            eval_inferer = IncrementalSlidingWindowInferer(
+                sw_batch_size=self.val_sw_batch_size, windows=session.windows, changed=session.changed, **sw_params
+            )
+            data.setdefault(self.output_json_key, {})["sliding_window"] = eval_inferer.stats
+        elif data and strtobool(data.get("sw_skip_empty", False)):
+            # Skip windows without metal (or clicks); guidance channels are part of the occupancy map
+            eval_inferer = ForegroundSlidingWindowInferer(
+                sw_batch_size=self.val_sw_batch_size,
+                threshold=float(data.get("sw_skip_threshold", 0.5)),
+                source=data.get("sw_skip_source", "threshold"),
+                margin=int(data.get("sw_skip_margin", 8)),
+                background_index=self.label_names["background"],
+                **sw_params,
+            )
+            data.setdefault(self.output_json_key, {})["sliding_window"] = eval_inferer.stats
+        else:
+            eval_inferer = SlidingWindowInferer(sw_batch_size=self.val_sw_batch_size, **sw_params)
+
+        precision = data.get("precision", "fp32") if data else "fp32"
+        if precision != "fp32":
+            eval_inferer = AutocastInferer(eval_inferer, precision, data.get("device") or "cpu")
         return eval_inferer
 
+    def _get_network(self, device, data):
+        # one resident (read-only) copy per checkpoint and device, shared with the other tasks (model pool);
+        # sliding windows of concurrent requests are coalesced into micro-batches
+        network = pooled_network(self, device, data)
+        network = network if network is not None else super()._get_network(device, data)
+        return inference_scheduler().network(network, data)
+
+    def run_inferer(self, data, convert_to_batch=True, device="cuda"):
+        data = super().run_inferer(data, convert_to_batch, device)
+        session = self._session(data)
+        if session is not None:
+            session.changed = []  # window outputs are up to date with the input
+        return data
+
     def inverse_transforms(self, data=None) -> Union[None, Sequence[Callable]]:
         return []  # Self-determine from the list of pre-transforms provided
 
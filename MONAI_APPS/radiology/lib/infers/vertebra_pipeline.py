@@ -14,6 +14,7 @@ import time
 from typing import Callable, Sequence
 
 import torch
+from lib.transforms.transforms import CropAndCreateSignald
 from tqdm import tqdm
 
 from monailabel.interfaces.tasks.infer_v2 import InferTask, InferType
@@ -32,6 +33,7 @@ class InferVertebraPipeline(BasicInferTask):
         task_loc_spine: InferTask,
         task_loc_vertebra: InferTask,
         task_seg_vertebra: InferTask,
+        crop_batch_size=8,
         type=InferType.SEGMENTATION,
         description="Combines three stages for vertebra segmentation",
         **kwargs,
@@ -39,6 +41,7 @@ class InferVertebraPipeline(BasicInferTask):
         self.task_loc_spine = task_loc_spine
         self.task_loc_vertebra = task_loc_vertebra
         self.task_seg_vertebra = task_seg_vertebra
+        self.crop_batch_size = crop_batch_size
 
         super().__init__(
             path=None,
@@ -83,54 +86,71 @@ class InferVertebraPipeline(BasicInferTask):
         return d, r, self._latencies(r)
 
     def segment_vertebra(self, request, image, centroids):
-        original_size = list(image.shape)
-        result_mask = None
-
-        l = None
-        image_cached = None
-        count = 0
-        for centroid in tqdm(centroids):
-            # For Debuging - select few label...
-            # logger.info(f"Centroid: {centroid}")
-            # lkey = list(centroid.keys())[0]
-            # if lkey not in ("label_20", "label_22", "label_24"):
-            #     continue
-
-            req = copy.deepcopy(request)
-            req.update(
-                {
-                    "image": image,
-                    "image_cached": image_cached,
-                    "original_size": original_size,
-                    "centroids": [centroid],
-                    "pipeline_mode": True,
-                    "logging": "ERROR" if count > 1 else "INFO",
-                }
-            )
-
-            d, r = self.task_seg_vertebra(req)
-            l = self._latencies(r, l)
-
-            image = d["image"]
-            image_cached = image
-
-            # Paste/Merge each mask
-            v = d["current_label"]
-            s = d["slices_cropped"]
-            m = d["pred"]
-            m[m > 0] = v
-
-            mask = torch.zeros_like(image)
-            mask[:, s[-3][0] : s[-3][1], s[-2][0] : s[-2][1], s[-1][0] : s[-1][1]] = m
-
-            if result_mask is None:
-                result_mask = mask
-            else:
-                result_mask = result_mask + mask
-                result_mask[result_mask > v] = v
-
-            count = count + 1
+        """
+        Third stage: one crop (+ centroid signal) per centroid, segmented in batches of ``crop_batch_size``.
+
+        The whole image pre-transforms (spacing, intensity) run once; per centroid only the crop transforms and
+        the post-transforms run, on the crop.  Every crop result is written in place in a single mask (later
+        centroids win where crops overlap).
+        """
+        task = self.task_seg_vertebra
+        device = request["device"]
+        batch_size = max(1, int(request.get("crop_batch_size", self.crop_batch_size)))
+        l = {"pre": 0, "infer": 0, "invert": 0, "post": 0, "write": 0, "total": 0}
+        begin = time.time()
+
+        data = copy.deepcopy(task._config)
+        data.update(copy.deepcopy({k: v for k, v in request.items() if k != "image"}))
+        data.update(
+            {
+                "image": image,
+                "image_cached": None,
+                "original_size": list(image.shape),
+                "centroids": centroids[:1],
+                "pipeline_mode": True,
+            }
+        )
 
+        # image level transforms once; crop transforms (from CropAndCreateSignald) per centroid
+        pre_transforms = task.pre_transforms(data)
+        split = next(i for i, t in enumerate(pre_transforms) if isinstance(t, CropAndCreateSignald))
+        start = time.time()
+        data = run_transforms(data, pre_transforms[:split], log_prefix="PRE(P)")
+        image = data["image_cached"]
+        data.pop("latencies", None)
+        l["pre"] += time.time() - start
+
+        result_mask = torch.zeros_like(image)
+        network = task._get_network(device, data)
+        inferer = task.inferer(data)
+        for first in tqdm(range(0, len(centroids), batch_size)):
+            start = time.time()
+            crops = []
+            for i, centroid in enumerate(centroids[first : first + batch_size], start=first):
+                d = dict(data)
+                d.update({"image": image, "centroids": [centroid], "logging": "ERROR" if i > 1 else "INFO"})
+                crops.append(run_transforms(d, pre_transforms[split:], log_prefix="PRE(C)"))
+            inputs = torch.stack([torch.as_tensor(d["image"]) for d in crops]).to(torch.device(device))
+            l["pre"] += time.time() - start
+
+            start = time.time()
+            with torch.no_grad():
+                outputs = inferer(inputs, network)
+            l["infer"] += time.time() - start
+
+            start = time.time()
+            for d, pred in zip(crops, outputs):
+                d[task.output_label_key] = pred
+                d = run_transforms(d, task.post_transforms(d), log_prefix="POST(C)")
+
+                # Paste each mask in its crop
+                s = d["slices_cropped"]
+                region = result_mask[:, s[-3][0] : s[-3][1], s[-2][0] : s[-2][1], s[-1][0] : s[-1][1]]
+                region[torch.as_tensor(d["pred"], device=region.device) > 0] = d["current_label"]
+            l["post"] += time.time() - start
+
+        l = {k: round(v, 2) for k, v in l.items()}
+        l["total"] = round(time.time() - begin, 2)
         return result_mask, l
 
     def __call__(self, request):
@@ -0,0 +1,23 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from .export import (
+    OnnxRuntimeNetwork,
+    export_onnx,
+    export_torchscript,
+    load_exported,
+    load_weld_model,
+    parity_check,
+    resolve_model,
+)
+from .pool import ModelPool, example_input, model_pool, network_signature, pooled_network, preload
+from .quantize import CalibrationReader, calibration_rois, int8_path, quantize_network, quantize_onnx
+from .weld import WELD_CAM_LAYER, load_checkpoint, load_weld_unet, weld_unet
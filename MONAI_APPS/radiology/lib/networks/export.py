@@ -0,0 +1,221 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import inspect
+import logging
+import os
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+from lib.networks.weld import load_weld_unet
+from monai.utils import optional_import
+
+ort, has_ort = optional_import("onnxruntime")
+
+logger = logging.getLogger(__name__)
+
+RUNTIMES = ("auto", "onnx", "int8", "torchscript", "eager")
+ONNX_EXT = ".onnx"
+INT8_EXT = ".int8.onnx"
+TORCHSCRIPT_EXT = ".ts"
+
+
+class OnnxRuntimeNetwork:
+    """
+    Wraps an ONNX Runtime session so it can be used as ``network`` by MONAI inferers
+    (torch tensor in, torch tensor out).
+    """
+
+    def __init__(self, path: str, device="cpu", threads: int = 0):
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+
+        providers = ["CPUExecutionProvider"]
+        if str(device).startswith("cuda") and "CUDAExecutionProvider" in ort.get_available_providers():
+            providers.insert(0, "CUDAExecutionProvider")
+
+        self.path = path
+        self.session = ort.InferenceSession(path, sess_options=options, providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        inputs = x.detach().cpu().numpy().astype(np.float32, copy=False)
+        outputs = self.session.run(None, {self.input_name: inputs})[0]
+        return torch.from_numpy(outputs).to(x.device)
+
+    # nn.Module like interface used by BasicInferTask
+    def eval(self):
+        return self
+
+    def train(self, mode=True):
+        if mode:
+            raise ValueError("ONNX Runtime network can not be trained")
+        return self
+
+    def to(self, *args, **kwargs):
+        return self
+
+
+def _example_input(roi_size: Sequence[int], in_channels: int, batch_size: int = 1) -> torch.Tensor:
+    return torch.rand(batch_size, in_channels, *roi_size)
+
+
+def export_torchscript(network: torch.nn.Module, path: str, roi_size=(64, 64, 64), in_channels=1) -> str:
+    """
+    Trace and freeze the network into a TorchScript artifact.
+    oneDNN specific optimizations are not serializable, they are applied when loading (see ``load_torchscript``).
+    """
+    network.eval()
+    with torch.no_grad():
+        frozen = torch.jit.freeze(torch.jit.trace(network, _example_input(roi_size, in_channels)))
+    frozen.save(path)
+    logger.info(f"TorchScript model saved to: {path}")
+    return path
+
+
+def export_onnx(network: torch.nn.Module, path: str, roi_size=(64, 64, 64), in_channels=1, opset=17) -> str:
+    """
+    Export the network to ONNX with a dynamic batch axis (sliding window batches) and fixed ROI size.
+    """
+    kwargs: Dict[str, Any] = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        kwargs["dynamo"] = False  # TorchScript based exporter, no onnxscript needed
+
+    network.eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            network,
+            (_example_input(roi_size, in_channels),),
+            path,
+            input_names=["image"],
+            output_names=["pred"],
+            dynamic_axes={"image": {0: "batch"}, "pred": {0: "batch"}},
+            opset_version=opset,
+            **kwargs,
+        )
+    logger.info(f"ONNX model saved to: {path}")
+    return path
+
+
+def load_torchscript(path: str, device="cpu"):
+    network = torch.jit.load(path, map_location=torch.device(device))
+    network.eval()
+    if not str(device).startswith("cuda") and torch.backends.mkldnn.is_available():
+        # conv/bn folding + oneDNN (MKLDNN) layouts for CPU
+        network = torch.jit.optimize_for_inference(network)
+    return network
+
+
+def resolve_model(path: str, device="cpu", runtime="auto") -> Tuple[str, str]:
+    """
+    Pick the artifact to serve for a given checkpoint.
+
+    ``path`` can point to the eager checkpoint (``best_metric_model.pth``) or to an exported artifact.
+    With ``runtime="auto"`` on CPU, an ONNX artifact next to the checkpoint is preferred when ONNX Runtime is
+    installed, then a frozen TorchScript one, then the eager checkpoint.
+    The int8 artifact (``scripts/quantize_model.py``) is never picked automatically; use ``runtime="int8"``.
+
+    Returns: (runtime, artifact path)
+    """
+    if runtime not in RUNTIMES:
+        raise ValueError(f"runtime should be one of {RUNTIMES}, got {runtime}")
+
+    if path.endswith(INT8_EXT):
+        return "int8", path
+    base, ext = os.path.splitext(path)
+    if ext == ONNX_EXT:
+        return "onnx", path
+    if ext == TORCHSCRIPT_EXT:
+        return "torchscript", path
+
+    candidates = []
+    if runtime == "int8" and has_ort:
+        candidates.append(("int8", base + INT8_EXT))
+    if runtime in ("auto", "onnx") and has_ort and (runtime == "onnx" or not str(device).startswith("cuda")):
+        candidates.append(("onnx", base + ONNX_EXT))
+    if runtime in ("auto", "torchscript"):
+        candidates.append(("torchscript", base + TORCHSCRIPT_EXT))
+
+    for r, p in candidates:
+        if os.path.exists(p):
+            return r, p
+
+    if runtime != "auto" and runtime != "eager":
+        logger.warning(f"No {runtime} artifact found for {path} (onnxruntime: {has_ort}); falling back to eager")
+    return "eager", path
+
+
+def load_exported(artifact: str, runtime: str, device="cpu", threads: int = 0):
+    """
+    Load an exported artifact (``onnx``, ``int8`` or ``torchscript`` runtime, see ``resolve_model``).
+    """
+    if runtime in ("onnx", "int8"):
+        return OnnxRuntimeNetwork(artifact, device=device, threads=threads)
+    if runtime == "torchscript":
+        return load_torchscript(artifact, device)
+    raise ValueError(f"{runtime} is not an exported runtime")
+
+
+def load_weld_model(path: str, device="cpu", runtime="auto", threads: int = 0, **kwargs):
+    """
+    Load the weld UNet for inference using the fastest available runtime (see ``resolve_model``).
+    """
+    runtime, artifact = resolve_model(path, device, runtime)
+    if runtime == "eager":
+        network = load_weld_unet(artifact, device=device, **kwargs)
+    else:
+        network = load_exported(artifact, runtime, device, threads)
+
+    logger.info(f"Weld model runtime: {runtime} => {artifact} (oneDNN: {torch.backends.mkldnn.is_available()})")
+    return network
+
+
+def _latency(network, x: torch.Tensor, repeats: int) -> float:
+    with torch.no_grad():
+        network(x)  # warm-up (kernel selection, allocator)
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            network(x)
+            timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def parity_check(
+    reference,
+    candidate,
+    inputs: Optional[torch.Tensor] = None,
+    roi_size=(64, 64, 64),
+    in_channels=1,
+    batch_size=1,
+    repeats=5,
+) -> Dict[str, Any]:
+    """
+    Compare an exported network against the eager one on the same input and measure the speedup.
+    """
+    x = inputs if inputs is not None else _example_input(roi_size, in_channels, batch_size)
+    with torch.no_grad():
+        expected = reference(x)
+        actual = candidate(x)
+
+    eager = _latency(reference, x, repeats)
+    exported = _latency(candidate, x, repeats)
+    return {
+        "max_abs_diff": float((expected - actual).abs().max()),
+        "argmax_agreement": float((expected.argmax(1) == actual.argmax(1)).float().mean()),
+        "eager_ms": round(eager * 1000, 2),
+        "exported_ms": round(exported * 1000, 2),
+        "speedup": round(eager / exported, 2) if exported else None,
+    }
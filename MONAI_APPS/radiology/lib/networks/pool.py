@@ -0,0 +1,220 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+import torch
+
+from .weld import load_checkpoint
+
+logger = logging.getLogger(__name__)
+
+
+def file_stamp(path: Optional[str]) -> Optional[Tuple[int, int]]:
+    """(size, mtime) of a checkpoint/artifact: a published model replaces the pooled one."""
+    if not path or not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def network_nbytes(network: Any, path: Optional[str] = None) -> int:
+    """Resident size of a network: parameters + buffers, or the artifact size (e.g. ONNX Runtime sessions)."""
+    if isinstance(network, torch.nn.Module):
+        tensors = list(network.parameters()) + list(network.buffers())
+        if tensors:
+            return sum(t.numel() * t.element_size() for t in tensors)
+    return os.path.getsize(path) if path and os.path.exists(path) else 0
+
+
+def network_signature(network: torch.nn.Module) -> str:
+    """Architecture of a network (class, parameter names and shapes): tasks share weights only if it matches."""
+    h = hashlib.sha1(type(network).__qualname__.encode())
+    for name, value in network.state_dict().items():
+        h.update(f"{name}:{tuple(value.shape)}".encode())
+    return h.hexdigest()
+
+
+class ModelPool:
+    """
+    Resident networks shared by the infer tasks of the app.
+
+    ``get(key, loader, path)`` returns the pooled network of ``key`` (e.g. checkpoint + runtime + device), loading
+    it once with ``loader`` even under concurrent requests; a pooled network is reloaded when ``path`` changes
+    (new model published).  Networks are shared read-only (eval mode): tasks must not modify them.  When the
+    resident size goes over ``budget_mb`` (0: no limit) the least recently used networks are dropped from the pool
+    (requests running with them keep their reference); the network just loaded is kept even if over budget.
+
+    Args:
+        budget_mb: memory budget of the resident networks, in MB.
+    """
+
+    def __init__(self, budget_mb: float = 0):
+        self.budget_mb = budget_mb
+        self._entries: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._loading: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(e["nbytes"] for e in self._entries.values())
+
+    def get(self, key: Hashable, loader: Callable[[], Any], path: Optional[str] = None):
+        stamp = file_stamp(path)
+        network = self._lookup(key, stamp)
+        if network is not None:
+            return network
+
+        with self._lock:
+            loading = self._loading.setdefault(key, threading.Lock())
+        with loading:
+            network = self._lookup(key, stamp, count=False)
+            if network is not None:
+                return network
+
+            start = time.time()
+            network = loader()
+            nbytes = network_nbytes(network, path)
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = {"network": network, "stamp": stamp, "nbytes": nbytes, "used": time.time()}
+                self._entries.move_to_end(key)
+                self._evict(keep=key)
+            logger.info(f"Model pool: loaded {key} ({nbytes / 2**20:.1f} MB) in {time.time() - start:.2f}s")
+            return network
+
+    def warmup(self, network: Any, inputs: torch.Tensor):
+        """Dummy forward: kernel selection (oneDNN / cuDNN) and allocator warm-up before the first request."""
+        start = time.time()
+        with torch.no_grad():
+            network(inputs)
+        logger.info(f"Model pool: warm-up {tuple(inputs.shape)} in {time.time() - start:.2f}s")
+
+    def evict(self, key: Hashable):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "models": len(self._entries),
+                "nbytes": sum(e["nbytes"] for e in self._entries.values()),
+                "budget_mb": self.budget_mb,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _lookup(self, key, stamp, count=True):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry["stamp"] != stamp:
+                logger.info(f"Model pool: {key} changed on disk; reloading")
+                del self._entries[key]
+                return None
+            entry["used"] = time.time()
+            self._entries.move_to_end(key)
+            self.hits += count
+            return entry["network"]
+
+    def _evict(self, keep: Hashable):
+        budget = self.budget_mb * 2**20
+        total = sum(e["nbytes"] for e in self._entries.values())
+        for key in list(self._entries):
+            if not budget or total <= budget:
+                break
+            if key == keep:
+                continue
+            total -= self._entries.pop(key)["nbytes"]
+            self.evictions += 1
+            logger.info(f"Model pool: evicted {key} (LRU; budget {self.budget_mb} MB)")
+
+
+_pool = ModelPool()
+
+
+def model_pool() -> ModelPool:
+    """Process wide ``ModelPool`` (budget set by the app, e.g. ``--conf model_pool_budget_mb``)."""
+    return _pool
+
+
+def pooled_network(task, device, data=None, pool: Optional[ModelPool] = None):
+    """
+    Eager network of a ``BasicInferTask`` (``task.network`` + checkpoint of ``task.get_path()``, or the user
+    ``model_filename``) from the pool; tasks with the same checkpoint and architecture share it.
+    Returns None if the task has no network or checkpoint (``BasicInferTask._get_network`` handles it).
+    """
+    path = task.get_path()
+    if data and task._config.get("model_filename") and data.get("model_filename"):
+        model_filename = data["model_filename"]
+        model_filename = model_filename if isinstance(model_filename, str) else model_filename[0]
+        user_path = os.path.join(os.path.dirname(task.path[0]), model_filename)
+        path = user_path if os.path.exists(user_path) else path
+    if not path or task.network is None:
+        return None
+
+    signature = getattr(task, "_network_signature", None)
+    if signature is None:
+        signature = task._network_signature = network_signature(task.network)
+
+    pool = pool if pool is not None else model_pool()
+    key = ("eager", os.path.realpath(path), signature, str(device))
+    return pool.get(
+        key,
+        lambda: load_checkpoint(copy.deepcopy(task.network), path, device, task.model_state_dict, task.load_strict),
+        path,
+    )
+
+
+def example_input(network: Any, roi_size: Sequence[int], in_channels: Optional[int] = None) -> Optional[torch.Tensor]:
+    """Random ``(1, C, *roi_size)`` input; ``C`` from the first convolution of the network if not given."""
+    if in_channels is None and isinstance(network, torch.nn.Module):
+        weight = next((p for p in network.parameters() if p.ndim == len(roi_size) + 2), None)
+        in_channels = int(weight.shape[1]) if weight is not None else None
+    if in_channels is None and hasattr(network, "session"):
+        shape = network.session.get_inputs()[0].shape
+        in_channels = shape[1] if isinstance(shape[1], int) else None
+    return torch.rand(1, in_channels, *roi_size) if in_channels else None
+
+
+def preload(task, device="cpu", warmup=True, pool: Optional[ModelPool] = None):
+    """
+    Loads the network of an infer task in the pool (``task._get_network``) and, with ``warmup``, runs a dummy
+    forward of one window (``sw_roi_size`` / ``roi_size`` / ``spatial_size`` of the task).
+    """
+    pool = pool if pool is not None else model_pool()
+    network = task._get_network(device, {**getattr(task, "_config", {}), "device": device})
+    roi_size = next((getattr(task, a) for a in ("sw_roi_size", "roi_size", "spatial_size") if hasattr(task, a)), None)
+    if not warmup or network is None or not roi_size:
+        return network
+
+    inputs = example_input(network, roi_size)
+    if inputs is None:
+        logger.info(f"Model pool: no warm-up for {type(task).__name__} (unknown input channels)")
+        return network
+    pool.warmup(network, inputs.to(torch.device(device)))
+    return network
@@ -0,0 +1,124 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import os
+import tempfile
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import torch
+from lib.networks.export import INT8_EXT, ONNX_EXT, export_onnx
+from monai.transforms import RandWeightedCrop, SpatialPad
+from monai.utils import optional_import
+
+quantization, has_ort_quantization = optional_import("onnxruntime.quantization")
+
+logger = logging.getLogger(__name__)
+
+
+def int8_path(path: str) -> str:
+    """``best_metric_model.pth`` => ``best_metric_model.int8.onnx`` (where ``resolve_model`` looks for it)"""
+    base = path[: -len(INT8_EXT)] if path.endswith(INT8_EXT) else os.path.splitext(path)[0]
+    return base + INT8_EXT
+
+
+class CalibrationReader:
+    """
+    Feeds calibration ROIs to ONNX Runtime (``CalibrationDataReader`` protocol), one window at a time.
+    """
+
+    def __init__(self, rois: Sequence[np.ndarray], input_name: str = "image"):
+        self.rois = rois
+        self.input_name = input_name
+        self._iter = iter(self.rois)
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        roi = next(self._iter, None)
+        return None if roi is None else {self.input_name: roi}
+
+    def rewind(self):
+        self._iter = iter(self.rois)
+
+
+def calibration_rois(
+    images: Iterable[torch.Tensor], roi_size: Sequence[int], samples_per_volume: int = 4, seed: int = 0
+) -> List[np.ndarray]:
+    """
+    Sample sliding-window sized ROIs from preprocessed (C, H, W, D) volumes.
+
+    Crops are drawn with probability proportional to the (shifted) intensity, so the metal/seam region,
+    where activation ranges matter, dominates the calibration set instead of air.
+    """
+    pad = SpatialPad(roi_size)
+    cropper = RandWeightedCrop(roi_size, num_samples=samples_per_volume)
+    cropper.set_random_state(seed)
+
+    rois = []
+    for image in images:
+        image = pad(torch.as_tensor(image, dtype=torch.float32))
+        weight = image[:1] - image[:1].min()
+        for roi in cropper(image, weight_map=weight):
+            rois.append(np.asarray(roi, dtype=np.float32)[None])
+    return rois
+
+
+def quantize_onnx(
+    model_path: str,
+    output_path: str,
+    rois: Sequence[np.ndarray],
+    op_types: Sequence[str] = ("Conv",),
+    per_channel: bool = True,
+    calibrate_method: str = "MinMax",
+) -> str:
+    """
+    Static (calibration based) int8 quantization of an fp32 ONNX model.
+
+    Only ``op_types`` are quantized (QDQ format, uint8 activations / int8 weights); normalization and PReLU
+    layers stay in fp32, which keeps the Dice drop small for the instance-norm based 3D networks.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        prepared = os.path.join(tmp, "prepared" + ONNX_EXT)
+        try:
+            quantization.shape_inference.quant_pre_process(model_path, prepared)
+        except Exception as e:
+            # e.g. SegResNet: symbolic shape inference gives up on some upsampling nodes; ONNX one is enough
+            logger.info(f"Symbolic shape inference failed ({e}); using ONNX shape inference")
+            quantization.shape_inference.quant_pre_process(model_path, prepared, skip_symbolic_shape=True)
+        quantization.quantize_static(
+            prepared,
+            output_path,
+            CalibrationReader(rois),
+            quant_format=quantization.QuantFormat.QDQ,
+            op_types_to_quantize=list(op_types),
+            per_channel=per_channel,
+            activation_type=quantization.QuantType.QUInt8,
+            weight_type=quantization.QuantType.QInt8,
+            calibrate_method=getattr(quantization.CalibrationMethod, calibrate_method),
+        )
+    logger.info(f"int8 model saved to: {output_path} (calibration windows: {len(rois)})")
+    return output_path
+
+
+def quantize_network(
+    network: torch.nn.Module,
+    output_path: str,
+    rois: Sequence[np.ndarray],
+    roi_size=(64, 64, 64),
+    in_channels=1,
+    **kwargs,
+) -> str:
+    """
+    Export ``network`` to fp32 ONNX and quantize it (see ``quantize_onnx``).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        fp32 = export_onnx(network, os.path.join(tmp, "fp32" + ONNX_EXT), roi_size, in_channels)
+        return quantize_onnx(fp32, output_path, rois, **kwargs)
@@ -0,0 +1,63 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+
+import torch
+from monai.networks.nets import UNet
+
+logger = logging.getLogger(__name__)
+
+# Deepest encoder block (bottleneck) of ``weld_unet``; Grad-CAM target layer as in Annex B
+WELD_CAM_LAYER = "model.1.submodule.1.submodule.1.submodule.1.submodule"
+
+
+def weld_unet(in_channels=1, out_channels=2) -> UNet:
+    """
+    3D UNet used for weld defect segmentation (same topology as Annex A).
+    """
+    return UNet(
+        spatial_dims=3,
+        in_channels=in_channels,
+        out_channels=out_channels,
+        channels=(16, 32, 64, 128, 256),
+        strides=(2, 2, 2, 2),
+        num_res_units=2,
+    )
+
+
+def load_checkpoint(network: torch.nn.Module, path, device="cpu", model_state_dict="model", strict=True):
+    """
+    Load weights into ``network`` and put it in eval mode on ``device``.
+
+    :param network: network to load the weights into
+    :param path: checkpoint file; either a plain state dict (``best_metric_model.pth``) or a
+        MONAI Label checkpoint where the weights are stored under ``model_state_dict``
+    :param device: device to place the network on
+    :param model_state_dict: key for loading the model state from checkpoint
+    :param strict: load model in strict mode
+    """
+    checkpoint = torch.load(path, map_location=torch.device(device))
+    if isinstance(checkpoint, dict):
+        checkpoint = checkpoint.get(model_state_dict, checkpoint)
+    network.load_state_dict(checkpoint, strict=strict)
+    network.to(torch.device(device))
+    network.eval()
+    return network
+
+
+def load_weld_unet(path, device="cpu", model_state_dict="model", strict=True, **kwargs) -> UNet:
+    """
+    Build the weld UNet and load its weights once (see ``load_checkpoint``).
+    """
+    network = load_checkpoint(weld_unet(**kwargs), path, device, model_state_dict, strict)
+    logger.info(f"Weld UNet loaded from: {path}")
+    return network
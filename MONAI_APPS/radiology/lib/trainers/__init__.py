@@ -10,6 +10,7 @@
 # limitations under the License.
 
 from .deepedit import DeepEdit
+from .deepedit_weld import DeepEditWeld
 from .deepgrow import Deepgrow
 from .localization_spine import LocalizationSpine
 from .localization_vertebra import LocalizationVertebra
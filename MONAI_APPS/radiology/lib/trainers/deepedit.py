@@ -12,6 +12,8 @@
 import logging
 
 import torch
+from lib.inferers import AutocastInferer
+from lib.trainers.distributed import CpuDistributedTrainTask
 from lib.transforms.transforms import NormalizeLabelsInDatasetd
 from monai.apps.deepedit.interaction import Interaction
 from monai.apps.deepedit.transforms import (
@@ -31,23 +33,25 @@ from monai.transforms import (
     EnsureChannelFirstd,
     LoadImaged,
     Orientationd,
+    RandCropByLabelClassesd,
     RandFlipd,
     RandRotate90d,
     RandShiftIntensityd,
     Resized,
     ScaleIntensityRanged,
     SelectItemsd,
+    SpatialPadd,
     ToNumpyd,
     ToTensord,
 )
 
 from monailabel.deepedit.handlers import TensorBoardImageHandler
-from monailabel.tasks.train.basic_train import BasicTrainTask, Context
+from monailabel.tasks.train.basic_train import Context
 
 logger = logging.getLogger(__name__)
 
 
-class DeepEdit(BasicTrainTask):
+class DeepEdit(CpuDistributedTrainTask):
     def __init__(
         self,
         model_dir,
@@ -59,8 +63,22 @@ class DeepEdit(BasicTrainTask):
         deepgrow_probability_train=0.4,
         deepgrow_probability_val=1.0,
         debug_mode=False,
+        sampling="resize",
+        num_samples=4,
+        crop_ratios=None,
+        precision="fp32",
         **kwargs,
     ):
+        """
+        :param sampling: ``resize`` = whole volume resized to ``spatial_size``, as done by validation and by the
+            DeepEdit infer task; ``label`` = ``num_samples`` label-balanced crops of ``spatial_size`` per loaded
+            volume at native resolution (thin weld seams are not resized away), only for models served with a
+            native spacing sliding window inferer
+        :param num_samples: crops drawn per loaded volume (``sampling="label"``)
+        :param crop_ratios: crop center ratio per class (background first); default equal per class
+        :param precision: ``fp32`` | ``bf16`` | ``auto``: bf16 autocast of the network forward (train and validation)
+            where the device supports it (``amp`` only applies to CUDA)
+        """
         self._network = network
         self.spatial_size = spatial_size
         self.target_spacing = target_spacing
@@ -68,8 +86,12 @@ class DeepEdit(BasicTrainTask):
         self.deepgrow_probability_train = deepgrow_probability_train
         self.deepgrow_probability_val = deepgrow_probability_val
         self.debug_mode = debug_mode
+        self.sampling = sampling
+        self.num_samples = num_samples
+        self.crop_ratios = crop_ratios
 
         super().__init__(model_dir, description, **kwargs)
+        self._config["precision"] = precision
 
     def network(self, context: Context):
         return self._network
@@ -106,12 +128,12 @@ class DeepEdit(BasicTrainTask):
             Orientationd(keys=["image", "label"], axcodes="RAS"),
             # This transform may not work well for MR images
             ScaleIntensityRanged(keys="image", a_min=-175, a_max=250, b_min=0.0, b_max=1.0, clip=True),
+            *self._crop_transforms(),
             RandFlipd(keys=("image", "label"), spatial_axis=[0], prob=0.10),
             RandFlipd(keys=("image", "label"), spatial_axis=[1], prob=0.10),
             RandFlipd(keys=("image", "label"), spatial_axis=[2], prob=0.10),
             RandRotate90d(keys=("image", "label"), prob=0.10, max_k=3),
             RandShiftIntensityd(keys="image", offsets=0.10, prob=0.50),
-            Resized(keys=("image", "label"), spatial_size=self.spatial_size, mode=("area", "nearest")),
             # Transforms for click simulation
             FindAllValidSlicesMissingLabelsd(keys="label", sids="sids"),
             AddInitialSeedPointMissingLabelsd(keys="label", guidance="guidance", sids="sids"),
@@ -121,6 +143,24 @@ class DeepEdit(BasicTrainTask):
             SelectItemsd(keys=("image", "label", "guidance", "label_names")),
         ]
 
+    def _crop_transforms(self):
+        if self.sampling == "resize":
+            return [Resized(keys=("image", "label"), spatial_size=self.spatial_size, mode=("area", "nearest"))]
+
+        # Crops first: flips/rotations/clicks then run on the ROIs only
+        return [
+            SpatialPadd(keys=("image", "label"), spatial_size=self.spatial_size),
+            RandCropByLabelClassesd(
+                keys=("image", "label"),
+                label_key="label",
+                spatial_size=self.spatial_size,
+                ratios=self.crop_ratios,
+                num_classes=len([k for k in self._labels if k != "background"]) + 1,
+                num_samples=self.num_samples,
+                warn=False,
+            ),
+        ]
+
     def train_post_transforms(self, context: Context):
         return [
             Activationsd(keys="pred", softmax=True),
@@ -150,8 +190,11 @@ class DeepEdit(BasicTrainTask):
             SelectItemsd(keys=("image", "label", "guidance", "label_names")),
         ]
 
+    def train_inferer(self, context: Context):
+        return AutocastInferer(super().train_inferer(context), context.request.get("precision"), context.device)
+
     def val_inferer(self, context: Context):
-        return SimpleInferer()
+        return AutocastInferer(SimpleInferer(), context.request.get("precision"), context.device)
 
     def train_iteration_update(self, context: Context):
         return Interaction(
@@ -0,0 +1,55 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+
+from lib.inferers import AutocastInferer
+from lib.trainers.segmentation import Segmentation
+from lib.transforms.transforms import NormalizeLabelsInDatasetd
+from monai.inferers import SlidingWindowInferer
+from monai.transforms import EnsureChannelFirstd, EnsureTyped, LoadImaged, ScaleIntensityd, SelectItemsd
+
+from monailabel.tasks.train.basic_train import Context
+
+logger = logging.getLogger(__name__)
+
+
+class DeepEditWeld(Segmentation):
+    """
+    Trainer of the weld UNet: same preprocessing as the ``DeepEditWeld`` infer task (native resolution, intensity
+    scaled to [0, 1]), label-balanced ROI crops and sliding window validation.
+    """
+
+    def train_pre_transforms(self, context: Context):
+        return [
+            LoadImaged(keys=("image", "label")),
+            NormalizeLabelsInDatasetd(keys="label", label_names=self._labels),
+            EnsureChannelFirstd(keys=("image", "label")),
+            EnsureTyped(keys=("image", "label"), device=context.device),
+            ScaleIntensityd(keys="image"),
+            *self._crop_transforms(),
+            SelectItemsd(keys=("image", "label")),
+        ]
+
+    def val_pre_transforms(self, context: Context):
+        return [
+            LoadImaged(keys=("image", "label")),
+            NormalizeLabelsInDatasetd(keys="label", label_names=self._labels),
+            EnsureChannelFirstd(keys=("image", "label")),
+            EnsureTyped(keys=("image", "label")),
+            ScaleIntensityd(keys="image"),
+            SelectItemsd(keys=("image", "label")),
+        ]
+
+    def val_inferer(self, context: Context):
+        # same windows as the infer task
+        inferer = SlidingWindowInferer(roi_size=self.roi_size, sw_batch_size=4, overlap=0.25, mode="gaussian")
+        return AutocastInferer(inferer, context.request.get("precision"), context.device)
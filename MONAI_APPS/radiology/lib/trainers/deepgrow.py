@@ -16,6 +16,7 @@ import shutil
 from typing import Any, List
 
 import torch
+from lib.trainers.distributed import CpuDistributedTrainTask
 from monai.apps.deepgrow.dataset import create_dataset
 from monai.apps.deepgrow.interaction import Interaction
 from monai.apps.deepgrow.transforms import (
@@ -42,12 +43,12 @@ from monai.transforms import (
 )
 
 from monailabel.interfaces.datastore import Datastore
-from monailabel.tasks.train.basic_train import BasicTrainTask, Context
+from monailabel.tasks.train.basic_train import Context
 
 logger = logging.getLogger(__name__)
 
 
-class Deepgrow(BasicTrainTask):
+class Deepgrow(CpuDistributedTrainTask):
     def __init__(
         self,
         model_dir,
@@ -0,0 +1,161 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import torch
+from ignite.engine import Events
+from monai.handlers import CheckpointLoader
+
+from monailabel.interfaces.datastore import Datastore
+from monailabel.tasks.train.basic_train import BasicTrainTask, Context, main_worker
+from monailabel.utils.others.generic import remove_file
+
+logger = logging.getLogger(__name__)
+
+
+def worker_threads(workers: int) -> int:
+    """Intra-op threads per worker so that ``workers`` processes do not oversubscribe the cores."""
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+class ThroughputHandler:
+    """
+    Training samples/sec of every epoch, summed over all ranks (collective: attached on every rank) and logged
+    on rank 0.  The last value is kept in ``engine.state.metrics["samples_per_sec"]``.
+    """
+
+    def __init__(self, world_size: int = 1):
+        self.world_size = world_size
+        self._start = 0.0
+        self._samples = 0
+
+    def attach(self, engine):
+        engine.add_event_handler(Events.EPOCH_STARTED, self._epoch_started)
+        engine.add_event_handler(Events.ITERATION_COMPLETED, self._iteration_completed)
+        engine.add_event_handler(Events.EPOCH_COMPLETED, self._epoch_completed)
+
+    def _epoch_started(self, engine):
+        self._start, self._samples = time.perf_counter(), 0
+
+    def _iteration_completed(self, engine):
+        output = engine.state.output
+        self._samples += len(output) if isinstance(output, (list, tuple)) else 1
+
+    def _epoch_completed(self, engine):
+        rate = torch.tensor([self._samples / max(time.perf_counter() - self._start, 1e-9)], dtype=torch.float64)
+        if self.world_size > 1 and torch.distributed.is_initialized():
+            torch.distributed.all_reduce(rate)
+        engine.state.metrics["samples_per_sec"] = float(rate)
+        if torch.distributed.is_initialized() and torch.distributed.get_rank() != 0:
+            return
+        logger.info(f"Epoch {engine.state.epoch} => {float(rate):.2f} samples/sec ({self.world_size} workers)")
+
+
+class CpuDistributedTrainTask(BasicTrainTask):
+    """
+    ``BasicTrainTask`` with a data parallel mode for CPU only servers.
+
+    With ``cpu_workers`` > 1 (train request / app conf) ``cpu_workers`` processes are spawned and joined in a gloo
+    process group; ``BasicTrainTask`` then shards the datalist per rank, wraps the network in
+    ``DistributedDataParallel`` and reduces the ignite metrics, with stats/checkpoints published by rank 0.
+    Every worker gets ``cpu_count // cpu_workers`` intra-op threads.  The summed samples/sec of every epoch is
+    logged (``ThroughputHandler``).
+    """
+
+    def __init__(self, model_dir, description=None, cpu_workers=0, **kwargs):
+        super().__init__(model_dir, description, **kwargs)
+        self._config["cpu_workers"] = cpu_workers
+
+    def __call__(self, request, datastore: Datastore):
+        workers = int(request.get("cpu_workers", self._config.get("cpu_workers", 0)) or 0)
+        if workers < 2:
+            return super().__call__(request, datastore)
+
+        req = copy.deepcopy(self._config)
+        req.update(copy.deepcopy(request))
+        req["run_id"] = datetime.now().strftime("%Y%m%d_%H%M%S")
+        req["device"] = torch.device("cpu")
+        req["multi_gpu"] = True  # BasicTrainTask distributed code path, on gloo
+        req["cpu_workers"] = workers
+        req["distributed_backend"] = "gloo"
+
+        tfile = tempfile.NamedTemporaryFile().name
+        req["distributed_url"] = f"file://{tfile}"
+
+        datalist = self.pre_process(req, datastore)
+        logger.info(f"Distributed CPU Training (gloo) = TRUE; workers: {workers}; threads: {worker_threads(workers)}")
+
+        # children inherit it: OpenMP pools are sized before torch.set_num_threads runs; the server keeps its own
+        omp_threads = os.environ.get("OMP_NUM_THREADS")
+        os.environ["OMP_NUM_THREADS"] = str(worker_threads(workers))
+        try:
+            torch.multiprocessing.spawn(main_worker, nprocs=workers, args=(workers, req, datalist, self))
+        finally:
+            if omp_threads is None:
+                os.environ.pop("OMP_NUM_THREADS", None)
+            else:
+                os.environ["OMP_NUM_THREADS"] = omp_threads
+            remove_file(tfile)
+
+        self.cleanup(req)
+        if os.path.exists(self._stats_path):
+            with open(self._stats_path) as f:
+                return json.load(f)
+        return {}
+
+    def train(self, rank, world_size, request, datalist):
+        if request.get("cpu_workers", 0) and request.get("multi_gpu"):
+            torch.set_num_threads(worker_threads(world_size))
+        return super().train(rank, world_size, request, datalist)
+
+    def _cpu_distributed(self, context: Context) -> bool:
+        return bool(context.multi_gpu and context.request.get("cpu_workers"))
+
+    def _device(self, context: Context):
+        if self._cpu_distributed(context):
+            logger.info(f"++++ Rank:{context.local_rank} => Using CPU ({torch.get_num_threads()} threads)")
+            return torch.device("cpu")
+        return super()._device(context)
+
+    def _create_network_and_optimizer(self, context: Context):
+        if not self._cpu_distributed(context):
+            return super()._create_network_and_optimizer(context)
+
+        network = self.network(context).to(context.device)
+        context.network = network
+        optimizer = self.optimizer(context)
+        network = torch.nn.parallel.DistributedDataParallel(
+            network, find_unused_parameters=self._find_unused_parameters
+        )
+        return network, optimizer
+
+    def _load_checkpoint(self, context, train_handlers):
+        if not self._cpu_distributed(context):
+            return super()._load_checkpoint(context, train_handlers)
+
+        load_path = self.load_path(context.output_dir, context.pretrained)
+        if load_path and os.path.exists(load_path):
+            logger.info(f"{context.local_rank} - Load Path {load_path}")
+            load_dict = {self._model_dict_key: context.network} if self._load_dict is None else self._load_dict
+            train_handlers.append(CheckpointLoader(load_path, load_dict, map_location="cpu", strict=self._load_strict))
+
+    def train_handlers(self, context: Context):
+        # first, so validation run at the end of the epoch is not counted
+        handlers = super().train_handlers(context)
+        handlers.insert(0, ThroughputHandler(context.world_size if context.multi_gpu else 1))
+        return handlers
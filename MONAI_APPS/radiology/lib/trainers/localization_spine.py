@@ -12,6 +12,7 @@
 import logging
 
 import torch
+from lib.trainers.distributed import CpuDistributedTrainTask
 from lib.transforms.transforms import NormalizeLabelsInDatasetd
 from monai.handlers import TensorBoardImageHandler, from_engine
 from monai.inferers import SlidingWindowInferer
@@ -30,13 +31,13 @@ from monai.transforms import (
     Spacingd,
 )
 
-from monailabel.tasks.train.basic_train import BasicTrainTask, Context
+from monailabel.tasks.train.basic_train import Context
 from monailabel.tasks.train.utils import region_wise_metrics
 
 logger = logging.getLogger(__name__)
 
 
-class LocalizationSpine(BasicTrainTask):
+class LocalizationSpine(CpuDistributedTrainTask):
     def __init__(
         self,
         model_dir,
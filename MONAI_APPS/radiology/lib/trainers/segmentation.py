@@ -10,8 +10,12 @@
 # limitations under the License.
 
 import logging
+import os
 
 import torch
+from lib.datastore.cache import PreprocessCacheDataset
+from lib.inferers import AutocastInferer
+from lib.trainers.distributed import CpuDistributedTrainTask
 from lib.transforms.transforms import NormalizeLabelsInDatasetd
 from monai.handlers import TensorBoardImageHandler, from_engine
 from monai.inferers import SlidingWindowInferer
@@ -19,6 +23,7 @@ from monai.losses import DiceCELoss
 from monai.transforms import (
     Activationsd,
     AsDiscreted,
+    ClassesToIndicesd,
     CropForegroundd,
     EnsureChannelFirstd,
     EnsureTyped,
@@ -26,19 +31,20 @@ from monai.transforms import (
     LoadImaged,
     NormalizeIntensityd,
     Orientationd,
+    RandCropByLabelClassesd,
     RandSpatialCropd,
     ScaleIntensityd,
     SelectItemsd,
     Spacingd,
 )
 
-from monailabel.tasks.train.basic_train import BasicTrainTask, Context
+from monailabel.tasks.train.basic_train import Context
 from monailabel.tasks.train.utils import region_wise_metrics
 
 logger = logging.getLogger(__name__)
 
 
-class Segmentation(BasicTrainTask):
+class Segmentation(CpuDistributedTrainTask):
     def __init__(
         self,
         model_dir,
@@ -47,13 +53,37 @@ class Segmentation(BasicTrainTask):
         target_spacing=(1.0, 1.0, 1.0),
         num_samples=4,
         description="Train Segmentation model",
+        preprocess_cache=None,
+        sampling="label",
+        crop_ratios=None,
+        max_samples_per_class=20000,
+        precision="fp32",
+        chunked_store=False,
         **kwargs,
     ):
+        """
+        :param num_samples: ROI crops drawn per loaded volume (``sampling="label"``)
+        :param sampling: ``label`` = ``num_samples`` label-balanced crops per volume (centered on each class with
+            ``crop_ratios``, default equal per class, so defects are sampled as often as background);
+            ``random`` = one uniform random crop per volume
+        :param crop_ratios: crop center ratio per class (background first)
+        :param max_samples_per_class: candidate centers kept per class (precomputed and cached with the volume)
+        :param precision: ``fp32`` | ``bf16`` | ``auto``: bf16 autocast of the network forward (train and validation)
+            where the device supports it (``amp`` only applies to CUDA)
+        :param chunked_store: load image/label from their chunked ``.zarr`` stores (scripts/convert_chunked.py) when
+            they exist, at the pyramid level closest to ``target_spacing``
+        """
         self._network = network
         self.roi_size = roi_size
         self.target_spacing = target_spacing
         self.num_samples = num_samples
+        self.preprocess_cache = preprocess_cache
+        self.sampling = sampling
+        self.crop_ratios = crop_ratios
+        self.max_samples_per_class = max_samples_per_class
+        self.chunked_store = chunked_store
         super().__init__(model_dir, description, **kwargs)
+        self._config["precision"] = precision
 
     def network(self, context: Context):
         return self._network
@@ -70,9 +100,27 @@ class Segmentation(BasicTrainTask):
     def train_data_loader(self, context, num_workers=0, shuffle=False):
         return super().train_data_loader(context, num_workers, True)
 
+    def _dataset(self, context, datalist, is_train, replace_rate=0.25):
+        dataset, datalist = super()._dataset(context, datalist, is_train, replace_rate)
+        if not self.preprocess_cache or context.dataset_type != "PersistentDataset":
+            return dataset, datalist
+
+        # the deterministic prefix (load -> spacing -> smoothing -> scaling) is persisted across runs and recomputed
+        # only when the files or the transform parameters change
+        params = {"labels": self._labels}
+        cache_dir = os.path.join(self.preprocess_cache, "train" if is_train else "val")
+        return PreprocessCacheDataset(datalist, dataset.transform, cache_dir, params), datalist
+
+    def _loader(self):
+        if self.chunked_store:
+            from lib.datastore.chunked import LoadChunkedd
+
+            return LoadChunkedd(keys=("image", "label"), spacing=self.target_spacing)
+        return LoadImaged(keys=("image", "label"))
+
     def train_pre_transforms(self, context: Context):
         return [
-            LoadImaged(keys=("image", "label")),
+            self._loader(),
             NormalizeLabelsInDatasetd(keys="label", label_names=self._labels),  # Specially for missing labels
             EnsureChannelFirstd(keys=("image", "label")),
             EnsureTyped(keys=("image", "label"), device=context.device),
@@ -87,12 +135,32 @@ class Segmentation(BasicTrainTask):
             ),
             GaussianSmoothd(keys="image", sigma=0.4),
             ScaleIntensityd(keys="image", minv=-1.0, maxv=1.0),
-            RandSpatialCropd(
+            *self._crop_transforms(),
+            SelectItemsd(keys=("image", "label")),
+        ]
+
+    def _crop_transforms(self):
+        roi_size = [self.roi_size[0], self.roi_size[1], self.roi_size[2]]
+        if self.sampling == "random":
+            return [RandSpatialCropd(keys=["image", "label"], roi_size=roi_size, random_size=False)]
+
+        # Candidate centers per class are deterministic => cached with the preprocessed volume; every load then
+        # gives num_samples crops (batch = train_batch_size x num_samples)
+        num_classes = len([k for k in self._labels if k != "background"]) + 1
+        return [
+            ClassesToIndicesd(
+                keys="label", num_classes=num_classes, max_samples_per_class=self.max_samples_per_class
+            ),
+            RandCropByLabelClassesd(
                 keys=["image", "label"],
-                roi_size=[self.roi_size[0], self.roi_size[1], self.roi_size[2]],
-                random_size=False,
+                label_key="label",
+                spatial_size=roi_size,
+                ratios=self.crop_ratios,
+                num_classes=num_classes,
+                num_samples=self.num_samples,
+                indices_key="label_cls_indices",
+                warn=False,
             ),
-            SelectItemsd(keys=("image", "label")),
         ]
 
     def train_post_transforms(self, context: Context):
@@ -108,7 +176,7 @@ class Segmentation(BasicTrainTask):
 
     def val_pre_transforms(self, context: Context):
         return [
-            LoadImaged(keys=("image", "label")),
+            self._loader(),
             NormalizeLabelsInDatasetd(keys="label", label_names=self._labels),  # Specially for missing labels
             EnsureTyped(keys=("image", "label")),
             EnsureChannelFirstd(keys=("image", "label")),
@@ -127,10 +195,14 @@ class Segmentation(BasicTrainTask):
             SelectItemsd(keys=("image", "label")),
         ]
 
+    def train_inferer(self, context: Context):
+        return AutocastInferer(super().train_inferer(context), context.request.get("precision"), context.device)
+
     def val_inferer(self, context: Context):
-        return SlidingWindowInferer(
+        inferer = SlidingWindowInferer(
             roi_size=self.roi_size, sw_batch_size=2, overlap=0.4, padding_mode="replicate", mode="gaussian"
         )
+        return AutocastInferer(inferer, context.request.get("precision"), context.device)
 
     def norm_labels(self):
         # This should be applied along with NormalizeLabelsInDatasetd transform
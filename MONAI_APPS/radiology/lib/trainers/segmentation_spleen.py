@@ -12,6 +12,7 @@
 import logging
 
 import torch
+from lib.trainers.distributed import CpuDistributedTrainTask
 from monai.apps.deepedit.transforms import NormalizeLabelsInDatasetd
 from monai.inferers import SlidingWindowInferer
 from monai.losses import DiceCELoss
@@ -30,12 +31,12 @@ from monai.transforms import (
     ToTensord,
 )
 
-from monailabel.tasks.train.basic_train import BasicTrainTask, Context
+from monailabel.tasks.train.basic_train import Context
 
 logger = logging.getLogger(__name__)
 
 
-class SegmentationSpleen(BasicTrainTask):
+class SegmentationSpleen(CpuDistributedTrainTask):
     def __init__(
         self,
         model_dir,
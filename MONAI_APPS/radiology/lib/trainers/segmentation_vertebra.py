@@ -12,6 +12,7 @@
 import logging
 
 import torch
+from lib.trainers.distributed import CpuDistributedTrainTask
 from lib.transforms.transforms import (
     ConcatenateROId,
     GaussianSmoothedCentroidd,
@@ -36,13 +37,13 @@ from monai.transforms import (
     SelectItemsd,
 )
 
-from monailabel.tasks.train.basic_train import BasicTrainTask, Context
+from monailabel.tasks.train.basic_train import Context
 from monailabel.tasks.train.utils import region_wise_metrics
 
 logger = logging.getLogger(__name__)
 
 
-class SegmentationVertebra(BasicTrainTask):
+class SegmentationVertebra(CpuDistributedTrainTask):
     def __init__(
         self,
         model_dir,
@@ -8,19 +8,24 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import contextlib
 import copy
 import logging
-from typing import Any, Dict, Hashable, Mapping
+import threading
+from typing import Any, Dict, Hashable, Mapping, Optional, Sequence, Tuple
 
 import numpy as np
 import torch
 from monai.config import KeysCollection, NdarrayOrTensor
 from monai.data import MetaTensor
-from monai.networks.layers import GaussianFilter
+from monai.networks.layers.convutils import gaussian_1d
 from monai.transforms import CropForeground, GaussianSmooth, Randomizable, Resize, ScaleIntensity, SpatialCrop
 from monai.transforms.transform import MapTransform, Transform
+from monai.utils import optional_import
 from monai.utils.enums import CommonKeys
 
+ndimage, _ = optional_import("scipy.ndimage")
+
 LABELS_KEY = "label_names"
 
 logger = logging.getLogger(__name__)
@@ -110,6 +115,57 @@ class SelectVertebraAndCroppingd(Randomizable, MapTransform):
         return d
 
 
+def label_centroids(label: NdarrayOrTensor, min_size: int = 0, slab: int = 16) -> Tuple[Any, Any, Any]:
+    """
+    Voxel count and centre of mass of every non zero label in one pass: per label sums of the voxel coordinates
+    (last 3 axes) with ``bincount``, slab by slab along the first spatial axis to bound the temporary memory.
+    Centres are truncated to voxel indices, as ``np.average(np.where(label == c)[axis]).astype(int)``.
+
+    Args:
+        label: label map (..., H, W, D) with non negative integer values; numpy or torch (kept on its device).
+        min_size: labels with less voxels are dropped.
+        slab: number of slices per ``bincount`` call.
+
+    Returns: labels (K,), voxel counts (K,) and centres (K, 3); numpy arrays or tensors like ``label``.
+    """
+    is_tensor = isinstance(label, torch.Tensor)
+    x = label.as_tensor() if isinstance(label, MetaTensor) else label
+    x = x.reshape(-1, *x.shape[-3:])
+    n = int(x.max()) + 1 if np.prod(x.shape) else 1
+
+    if is_tensor:
+        counts = torch.zeros(n, dtype=torch.float64, device=x.device)
+        sums = torch.zeros((3, n), dtype=torch.float64, device=x.device)
+        grids = [torch.arange(s, dtype=torch.float64, device=x.device) for s in x.shape[1:]]
+    else:
+        counts, sums = np.zeros(n), np.zeros((3, n))
+        grids = [np.arange(s, dtype=np.float64) for s in x.shape[1:]]
+
+    for start in range(0, x.shape[1], slab):
+        block = x[:, start : start + slab]
+        ids = block.reshape(-1).long() if is_tensor else block.reshape(-1).astype(np.int64)
+        shape = block.shape
+        for axis, grid in enumerate(grids):
+            coord = grid[start : start + shape[1]] if axis == 0 else grid
+            view = [1] * 4
+            view[axis + 1] = len(coord)
+            if is_tensor:
+                weights = coord.reshape(view).expand(shape).reshape(-1)
+                sums[axis] += torch.bincount(ids, weights=weights, minlength=n)
+            else:
+                weights = np.broadcast_to(coord.reshape(view), shape).reshape(-1)
+                sums[axis] += np.bincount(ids, weights=weights, minlength=n)
+        counts += torch.bincount(ids, minlength=n) if is_tensor else np.bincount(ids, minlength=n)
+
+    keep = counts >= max(min_size, 1)
+    keep[0] = False  # background
+    labels = torch.nonzero(keep)[:, 0] if is_tensor else np.flatnonzero(keep)
+    centres, counts = (sums[:, labels] / counts[labels]).T, counts[labels]
+    if is_tensor:
+        return labels, counts.long(), centres.long()
+    return labels, counts.astype(int), centres.astype(int)
+
+
 class GetCentroidsd(MapTransform):
     def __init__(self, keys: KeysCollection, centroids_key: str = "centroids", allow_missing_keys: bool = False):
         """
@@ -122,22 +178,9 @@ class GetCentroidsd(MapTransform):
         self.centroids_key = centroids_key
 
     def _get_centroids(self, label):
-        centroids = []
-        # loop over all segments
-        areas = []
-        for seg_class in np.unique(label):
-            c = {}
-            # skip background
-            if seg_class == 0:
-                continue
-            # get centre of mass (CoM)
-            centre = []
-            for indices in np.where(label == seg_class):
-                avg_indices = np.average(indices).astype(int)
-                centre.append(avg_indices)
-            c[f"label_{int(seg_class)}"] = [int(seg_class), centre[-3], centre[-2], centre[-1]]
-            centroids.append(c)
-        return centroids
+        # centre of mass (CoM) of every segment, background skipped
+        labels, _, centres = label_centroids(label)
+        return [{f"label_{c}": [c, *centre]} for c, centre in zip(labels.tolist(), centres.tolist())]
 
     def __call__(self, data):
         d: Dict = dict(data)
@@ -325,29 +368,9 @@ class VertebraLocalizationSegmentation(MapTransform):
         self.result = result
 
     def _get_centroids(self, label):
-        centroids = []
-        # loop over all segments
-        areas = []
-        for seg_class in torch.unique(label):
-            c = {}
-            # skip background
-            if seg_class == 0:
-                continue
-
-            # get centre of mass (CoM)
-            centre = []
-            for indices in torch.where(label == seg_class):
-                # most_indices = np.percentile(indices, 60).astype(int).tolist()
-                # centre.append(most_indices)
-                avg_indices = np.average(indices).astype(int).tolist()
-                centre.append(avg_indices)
-
-            if len(indices) < 1000:
-                continue
-
-            areas.append(len(indices))
-            c[f"label_{int(seg_class)}"] = [int(seg_class), centre[-3], centre[-2], centre[-1]]
-            centroids.append(c)
+        # centre of mass (CoM) of every segment with at least 1000 voxels, background skipped
+        labels, _, centres = label_centroids(label, min_size=1000)
+        centroids = [{f"label_{c}": [c, *centre]} for c, centre in zip(labels.tolist(), centres.tolist())]
 
         # Rules to discard centroids
         # 1/ Should we consider the distance between centroids?
@@ -501,16 +524,106 @@ class NormalizeLabelsInDatasetd(MapTransform):
         return d
 
 
+def _memory_range(x) -> Optional[Tuple[int, int]]:
+    if isinstance(x, torch.Tensor):
+        storage = x.untyped_storage()
+        return storage.data_ptr(), storage.data_ptr() + storage.nbytes()
+    if isinstance(x, np.ndarray):
+        return np.byte_bounds(x)
+    return None
+
+
+def shares_memory(a, b) -> bool:
+    """Whether two tensors/arrays (or views of each other) use overlapping memory."""
+    ra, rb = _memory_range(a), _memory_range(b)
+    return ra is not None and rb is not None and ra[0] < rb[1] and rb[0] < ra[1]
+
+
+def shared_copy(x):
+    """
+    Copy of ``x`` that shares its data: a new MetaTensor (own meta and applied operations) over the same storage,
+    a read-only view of a numpy array.
+    """
+    if isinstance(x, MetaTensor):
+        return MetaTensor(
+            x.as_tensor(), meta=copy.deepcopy(x.meta), applied_operations=copy.deepcopy(x.applied_operations)
+        )
+    if isinstance(x, np.ndarray):
+        view = x.view()
+        view.flags.writeable = False
+        return view
+    return x
+
+
+def writable(d: Dict, key: Hashable):
+    """
+    ``d[key]`` ready to be modified in place: copied first (copy-on-write) if it still shares memory with a cached
+    object (``<key>_cached`` of ``CacheObjectd``).
+    """
+    value = d[key]
+    cached = [v for k, v in d.items() if isinstance(k, str) and k.endswith("_cached") and v is not None]
+    if any(shares_memory(value, c) for c in cached):
+        d[key] = value = value.clone() if isinstance(value, torch.Tensor) else np.array(value)
+    return value
+
+
 class CacheObjectd(MapTransform):
+    """
+    Keeps the current value of ``keys`` as ``<key>_cached`` (e.g. the image before resampling) without copying it.
+
+    The cached object shares the data of ``d[key]``: transforms return new objects, so it is left untouched when
+    ``d[key]`` is replaced.  Transforms that write into ``d[key]`` in place take it with ``writable``, which only
+    copies it at that point.
+    """
+
     def __call__(self, data: Mapping[Hashable, NdarrayOrTensor]) -> Dict[Hashable, NdarrayOrTensor]:
         d: Dict = dict(data)
         for key in self.key_iterator(d):
             cache_key = f"{key}_cached"
             if d.get(cache_key) is None:
-                d[cache_key] = copy.deepcopy(d[key])
+                d[cache_key] = shared_copy(d[key])
         return d
 
 
+class ChannelBuffer:
+    """
+    Reusable tensor for the network input of ``AddEmptySignalChannels``: the same allocation is used by every
+    request as long as the shape does not change.
+
+    Only the thread holding the ``lease`` (one request at a time) gets the shared tensor; concurrent requests, or
+    a request whose input outlives it (e.g. kept by an interactive session), get a private one.
+    """
+
+    def __init__(self):
+        self._tensor: Optional[torch.Tensor] = None
+        self._owner: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def lease(self):
+        with self._lock:
+            owned = self._owner is None
+            if owned:
+                self._owner = threading.get_ident()
+        try:
+            yield owned
+        finally:
+            if owned:
+                with self._lock:
+                    self._owner = None
+
+    def get(self, shape: Sequence[int], dtype: torch.dtype, device=None) -> torch.Tensor:
+        """Uninitialized tensor of ``shape``."""
+        device = torch.device(device) if device is not None else torch.device("cpu")
+        if self._owner != threading.get_ident():
+            return torch.empty(tuple(shape), dtype=dtype, device=device)
+        t = self._tensor
+        if t is None or tuple(t.shape) != tuple(shape) or t.dtype != dtype or t.device != device:
+            self._tensor = None  # release the previous one first
+            self._tensor = torch.empty(tuple(shape), dtype=dtype, device=device)
+        return self._tensor
+
+
 def get_guidance_tensor_for_key_label(data, key_label, device) -> torch.Tensor:
     """Makes sure the guidance is in a tensor format."""
     tmp_gui = data.get(key_label, torch.tensor([], dtype=torch.int32, device=device))
@@ -526,11 +639,15 @@ class AddGuidanceSignal(MapTransform):
 
     Based on the "guidance" points, apply Gaussian to them and add them as new channel for input image.
 
+    The Gaussian (or disk) of a single click is computed once per transform and pasted around every click with
+    one indexed scatter-add, instead of filtering the whole volume; the result is the same as filtering the click
+    map, so the cost of a click does not depend on the volume size.  Runs on CPU or GPU.
+
     Args:
         sigma: standard deviation for Gaussian kernel.
         number_intensity_ch: channel index.
         disks: This paraemters fill spheres with a radius of sigma centered around each click.
-        device: device this transform shall run on.
+        device: device this transform shall run on (device of the image when None).
     """
 
     def __init__(
@@ -547,130 +664,129 @@ class AddGuidanceSignal(MapTransform):
         self.number_intensity_ch = number_intensity_ch
         self.disks = disks
         self.device = device
+        self._stamps: Dict[Any, Tuple[torch.Tensor, torch.Tensor]] = {}
+
+    def _stamp(self, dimensions: int, device) -> Tuple[torch.Tensor, torch.Tensor]:
+        """(offsets, values) of the filtered impulse: ``GaussianFilter(sigma)`` response to a single click."""
+        key = (dimensions, str(device))
+        if key not in self._stamps:
+            if self.sigma != 0:
+                kernel = gaussian_1d(torch.tensor(float(self.sigma)), truncated=4.0, approx="erf").to(device)
+            else:
+                kernel = torch.ones(1, device=device)
+            r = kernel.numel() // 2
+            grid = torch.meshgrid(*[torch.arange(-r, r + 1, device=device)] * dimensions, indexing="ij")
+            values = kernel
+            for _ in range(dimensions - 1):
+                values = values[..., None] * kernel
+            self._stamps[key] = (torch.stack([g.reshape(-1) for g in grid], dim=1), values.reshape(-1))
+        return self._stamps[key]
+
+    def sparse_signal(self, shape: Sequence[int], guidance: torch.Tensor, device=None) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Normalized signal of ``guidance`` for an image of spatial ``shape`` as (indices (N, dims), values): only
+        the voxels around the clicks, every other voxel is 0.  Both are empty if there is no valid click.
+        """
+        dimensions = len(shape)
+        device = device if device is not None else guidance.device
+        points = guidance.reshape(len(guidance), -1)
+        points = points[~torch.any(points < 0, dim=1)][:, -dimensions:].long()
+        if not len(points):
+            return torch.zeros((0, dimensions), dtype=torch.long, device=device), torch.zeros(0, device=device)
+        # Making sure points fall inside the image dimension; repeated clicks count once
+        upper = torch.tensor(shape, device=device) - 1
+        points = torch.unique(torch.minimum(points.to(device), upper), dim=0)
+
+        offsets, values = self._stamp(dimensions, device)
+        idx = (points[:, None, :] + offsets[None]).reshape(-1, dimensions)
+        inside = torch.all((idx >= 0) & (idx <= upper), dim=1)
+        strides = torch.tensor([int(np.prod(shape[d + 1 :])) for d in range(dimensions)], device=device)
+        voxels, inverse = torch.unique((idx[inside] * strides).sum(dim=1), return_inverse=True)
+        signal = torch.zeros(len(voxels), device=device).index_add_(0, inverse, values.repeat(len(points))[inside])
+
+        # min-max normalization: voxels away from every click are 0 (unless the clicks cover the whole image)
+        low = signal.min() if len(voxels) == int(np.prod(shape)) else 0
+        signal = (signal - low) / (signal.max() - low)
+        if self.disks:
+            signal = (signal > 0.1) * 1.0  # 0.1 with sigma=1 --> radius = 3, otherwise it is a cube
+        idx = torch.stack([torch.div(voxels, st, rounding_mode="floor") % n for st, n in zip(strides, shape)], dim=1)
+        return idx, signal
+
+    def _rasterize(self, signal: torch.Tensor, guidance: torch.Tensor) -> bool:
+        """Writes the normalized signal of ``guidance`` into ``signal`` (spatial, zero filled); False if no click."""
+        idx, values = self.sparse_signal(signal.shape, guidance, signal.device)
+        if not len(values):
+            return False
+        signal.index_put_(tuple(idx.T), values.to(signal.dtype))
+        return True
 
     def _get_corrective_signal(self, image, guidance, key_label):
-        dimensions = 3 if len(image.shape) > 3 else 2
         assert (
             type(guidance) is torch.Tensor or type(guidance) is MetaTensor
         ), f"guidance is {type(guidance)}, value {guidance}"
-
-        if guidance.size()[0]:
-            first_point_size = guidance[0].numel()
-            if dimensions == 3:
-                # Assume channel is first and depth is last CHWD
-                # Assuming the guidance has either shape (1, x, y , z) or (x, y, z)
-                assert (
-                    first_point_size == 4 or first_point_size == 3
-                ), f"first_point_size is {first_point_size}, first_point is {guidance[0]}"
-                signal = torch.zeros(
-                    (1, image.shape[-3], image.shape[-2], image.shape[-1]),
-                    device=self.device,
-                )
-            else:
-                assert first_point_size == 3, f"first_point_size is {first_point_size}, first_point is {guidance[0]}"
-                signal = torch.zeros((1, image.shape[-2], image.shape[-1]), device=self.device)
-
-            sshape = signal.shape
-
-            for point in guidance:
-                if torch.any(point < 0):
-                    continue
-                if dimensions == 3:
-                    # Making sure points fall inside the image dimension
-                    p1 = max(0, min(int(point[-3]), sshape[-3] - 1))
-                    p2 = max(0, min(int(point[-2]), sshape[-2] - 1))
-                    p3 = max(0, min(int(point[-1]), sshape[-1] - 1))
-                    signal[:, p1, p2, p3] = 1.0
-                else:
-                    p1 = max(0, min(int(point[-2]), sshape[-2] - 1))
-                    p2 = max(0, min(int(point[-1]), sshape[-1] - 1))
-                    signal[:, p1, p2] = 1.0
-
-            # Apply a Gaussian filter to the signal
-            if torch.max(signal[0]) > 0:
-                signal_tensor = signal[0]
-                if self.sigma != 0:
-                    pt_gaussian = GaussianFilter(len(signal_tensor.shape), sigma=self.sigma)
-                    signal_tensor = pt_gaussian(signal_tensor.unsqueeze(0).unsqueeze(0))
-                    signal_tensor = signal_tensor.squeeze(0).squeeze(0)
-
-                signal[0] = signal_tensor
-                signal[0] = (signal[0] - torch.min(signal[0])) / (torch.max(signal[0]) - torch.min(signal[0]))
-                if self.disks:
-                    signal[0] = (signal[0] > 0.1) * 1.0  # 0.1 with sigma=1 --> radius = 3, otherwise it is a cube
-
-            if not (torch.min(signal[0]).item() >= 0 and torch.max(signal[0]).item() <= 1.0):
-                raise UserWarning(
-                    "[WARNING] Bad signal values",
-                    torch.min(signal[0]),
-                    torch.max(signal[0]),
-                )
-            if signal is None:
-                raise UserWarning("[ERROR] Signal is None")
-            return signal
-        else:
-            if dimensions == 3:
-                signal = torch.zeros(
-                    (1, image.shape[-3], image.shape[-2], image.shape[-1]),
-                    device=self.device,
-                )
-            else:
-                signal = torch.zeros((1, image.shape[-2], image.shape[-1]), device=self.device)
-            if signal is None:
-                print("[ERROR] Signal is None")
-            return signal
+        dimensions = 3 if len(image.shape) > 3 else 2
+        device = self.device if self.device is not None else image.device
+        signal = torch.zeros((1, *image.shape[-dimensions:]), device=device)
+        if guidance.numel():
+            self._rasterize(signal[0], guidance)
+        return signal
 
     def __call__(self, data: Dict[Hashable, torch.Tensor]) -> Dict[Hashable, Any]:
         for key in self.key_iterator(data):
             if key == "image":
                 image = data[key]
-                assert image.is_cuda
-                tmp_image = image[0 : 0 + self.number_intensity_ch, ...]
+                device = self.device if self.device is not None else image.device
+                dimensions = 3 if len(image.shape) > 3 else 2
+                dtype = image.dtype if image.is_floating_point() else torch.float32
 
                 # e.g. {'spleen': '[[1, 202, 190, 192], [2, 224, 212, 192], [1, 242, 202, 192], [1, 256, 184, 192], [2.0, 258, 198, 118]]',
                 # 'background': '[[257, 0, 98, 118], [1.0, 223, 303, 86]]'}
 
-                for _, (label_key, _) in enumerate(data[LABELS_KEY].items()):
-                    # label_guidance = data[label_key]
-                    label_guidance = get_guidance_tensor_for_key_label(data, label_key, self.device)
+                # Intensity + one signal channel per label, filled in place; labels without clicks keep a zero
+                # channel.  The channels of AddEmptySignalChannels are reused when present.
+                label_keys = list(data[LABELS_KEY])
+                channels = self.number_intensity_ch + len(label_keys)
+                if image.shape[0] == channels and image.dtype == dtype and image.device == torch.device(device):
+                    tmp_image = writable(data, key)
+                    tmp_image = tmp_image.as_tensor() if isinstance(tmp_image, MetaTensor) else tmp_image
+                    tmp_image[self.number_intensity_ch :].zero_()
+                else:
+                    tmp_image = torch.zeros((channels, *image.shape[-dimensions:]), dtype=dtype, device=device)
+                    tmp_image[: self.number_intensity_ch] = torch.as_tensor(image[: self.number_intensity_ch]).to(
+                        device
+                    )
+                    data[key] = _replace_array(image, tmp_image)
+
+                for i, label_key in enumerate(label_keys):
+                    label_guidance = get_guidance_tensor_for_key_label(data, label_key, device)
                     logger.debug(f"Converting guidance for label {label_key}:{label_guidance} into a guidance signal..")
-
                     if label_guidance is not None and label_guidance.numel():
-                        signal = self._get_corrective_signal(
-                            image,
-                            label_guidance.to(device=self.device),
-                            key_label=label_key,
-                        )
-                        assert torch.sum(signal) > 0
-                    else:
-                        # TODO can speed this up here
-                        signal = self._get_corrective_signal(
-                            image,
-                            torch.Tensor([]).to(device=self.device),
-                            key_label=label_key,
-                        )
-
-                    assert signal.is_cuda
-                    assert tmp_image.is_cuda
-                    tmp_image = torch.cat([tmp_image, signal], dim=0)
-                    if isinstance(data[key], MetaTensor):
-                        data[key].array = tmp_image
-                    else:
-                        data[key] = tmp_image
+                        signal = tmp_image[self.number_intensity_ch + i]
+                        assert self._rasterize(signal, label_guidance), f"No valid click for label {label_key}"
                 return data
             else:
                 raise UserWarning("This transform only applies to image key")
         raise UserWarning("image key has not been been found")
 
 
+def _replace_array(image, array):
+    """``array`` with the meta of ``image`` (instead of ``MetaTensor.array =``, which copies into the same storage)."""
+    if isinstance(image, MetaTensor):
+        return MetaTensor(array, meta=image.meta, applied_operations=image.applied_operations)
+    return array
+
+
 class AddEmptySignalChannels(MapTransform):
-    def __init__(self, device, keys: KeysCollection = None):
+    def __init__(self, device, keys: KeysCollection = None, buffer: Optional[ChannelBuffer] = None):
         """
         Adds empty channels to the signal which will be filled with the guidance signal later.
         E.g. for two labels: 1x192x192x256 -> 3x192x192x256
+
+        With ``buffer`` the channels are written into its reusable tensor instead of a new allocation.
         """
         super().__init__(keys)
         self.device = device
+        self.buffer = buffer
 
     def __call__(self, data: Dict[Hashable, torch.Tensor]) -> Dict[Hashable, Any]:
         # Set up the initial batch data
@@ -682,11 +798,115 @@ class AddEmptySignalChannels(MapTransform):
         # Set the signal to 0 for all input images
         # image is on channel 0 of e.g. (1,128,128,128) and the signals get appended, so
         # e.g. (3,128,128,128) for two labels
-        inputs = torch.zeros(new_shape, device=self.device)
-        inputs[0] = data[CommonKeys.IMAGE][0]
-        if isinstance(data[CommonKeys.IMAGE], MetaTensor):
-            data[CommonKeys.IMAGE].array = inputs
+        if self.buffer is not None:
+            inputs = self.buffer.get(new_shape, torch.get_default_dtype(), self.device)
+            inputs[1:].zero_()
         else:
-            data[CommonKeys.IMAGE] = inputs
+            inputs = torch.zeros(new_shape, device=self.device)
+        inputs[0] = torch.as_tensor(data[CommonKeys.IMAGE][0])
+        data[CommonKeys.IMAGE] = _replace_array(data[CommonKeys.IMAGE], inputs)
 
         return data
+
+
+class DefectStatisticsd(MapTransform):
+    def __init__(
+        self,
+        keys: KeysCollection,
+        image_key: str = "image",
+        defect_label: int = 1,
+        seam_threshold: float = 0.5,
+        connectivity: int = 3,
+        result: str = "result",
+        stats_key: str = "defects",
+        allow_missing_keys: bool = False,
+    ):
+        """
+        Per-defect statistics of a discrete prediction (after ``AsDiscreted(argmax=True)``), saved in the result json.
+
+        Connected components are labelled once and voxel count, volume (mm3), bounding box, max dimension (mm),
+        centroid and distance to the seam surface are computed with reductions over the component voxels sorted by
+        component id (``reduceat``), so thousands of pores do not cost a Python loop each.  Values are columnar
+        (one list per statistic).  Spacing comes from the image affine (NIfTI header).  The seam is the image
+        foreground (``image > seam_threshold``) with its holes (pores) filled.
+
+        :param keys: The ``keys`` parameter will be used to get and set the actual data item to transform
+        :param image_key: (scaled) image used to find the seam and the spacing
+        :param defect_label: label value of the defects in the prediction
+        :param seam_threshold: intensity above which a voxel is metal
+        :param connectivity: 1 (6), 2 (18) or 3 (26 connected components)
+        :param result: result json key
+        :param stats_key: key of the statistics in the result json
+        """
+        super().__init__(keys, allow_missing_keys)
+        self.image_key = image_key
+        self.defect_label = defect_label
+        self.seam_threshold = seam_threshold
+        self.connectivity = connectivity
+        self.result = result
+        self.stats_key = stats_key
+
+    def _statistics(self, mask: np.ndarray, spacing: np.ndarray, image=None) -> Dict[str, Any]:
+        structure = ndimage.generate_binary_structure(mask.ndim, self.connectivity)
+        components, n = ndimage.label(mask, structure=structure)
+        voxel_mm3 = float(np.prod(spacing))
+        stats: Dict[str, Any] = {
+            "count": int(n),
+            "spacing": spacing.tolist(),
+            "total_mm3": float(mask.sum()) * voxel_mm3,
+        }
+        if not n:
+            return stats
+
+        # component voxels sorted by id => one contiguous run per component
+        flat = np.flatnonzero(components)
+        ids = components.ravel()[flat]
+        order = np.argsort(ids, kind="stable")
+        flat, ids = flat[order], ids[order]
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(ids)) + 1])
+
+        voxels = np.bincount(ids)[1:]
+        coords = np.stack(np.unravel_index(flat, mask.shape))
+        lo = np.minimum.reduceat(coords, starts, axis=1).T
+        hi = np.maximum.reduceat(coords, starts, axis=1).T
+        centroid = np.add.reduceat(coords, starts, axis=1).T / voxels[:, None]
+        extent = (hi - lo + 1) * spacing
+
+        stats.update(
+            {
+                "id": np.arange(1, n + 1).tolist(),
+                "voxels": voxels.tolist(),
+                "volume_mm3": (voxels * voxel_mm3).tolist(),
+                "bbox_min": lo.tolist(),
+                "bbox_max": hi.tolist(),
+                "max_dim_mm": extent.max(1).tolist(),
+                "centroid": np.round(centroid, 2).tolist(),
+            }
+        )
+        if image is not None:
+            seam = ndimage.binary_fill_holes((image > self.seam_threshold) | mask)
+            depth = ndimage.distance_transform_edt(seam, sampling=spacing).ravel()[flat]
+            stats["distance_to_surface_mm"] = np.minimum.reduceat(depth, starts).tolist()
+        return stats
+
+    def __call__(self, data):
+        d: Dict = dict(data)
+        for key in self.key_iterator(d):
+            pred = d[key]
+            mask = np.asarray(pred.detach().cpu() if torch.is_tensor(pred) else pred)
+            mask = (mask[0] if mask.ndim == 4 else mask) == self.defect_label
+
+            image = d.get(self.image_key)
+            spacing = np.ones(mask.ndim)
+            if isinstance(image, MetaTensor):
+                spacing = np.asarray(image.pixdim, dtype=np.float64)[: mask.ndim]
+            elif isinstance(pred, MetaTensor):
+                spacing = np.asarray(pred.pixdim, dtype=np.float64)[: mask.ndim]
+            if image is not None:
+                image = np.asarray(image.detach().cpu() if torch.is_tensor(image) else image)
+                image = image[0] if image.ndim == 4 else image
+
+            if d.get(self.result) is None:
+                d[self.result] = dict()
+            d[self.result][self.stats_key] = self._statistics(mask, spacing, image)
+        return d
@@ -2,21 +2,18 @@
 import json
 import logging
 import os
-import pkgutil
-import importlib
-import inspect
+import sys
+import threading
 from typing import Dict
 
 import lib.configs  # paquete local con los TaskConfig
 from lib.activelearning import Last
-from lib.infers.deepgrow_pipeline import InferDeepgrowPipeline
-from lib.infers.vertebra_pipeline import InferVertebraPipeline
+from lib.configs import LazyTask, LazyTaskConfig, TaskManifest, discover_configs, source_stamp, task_stamp
 
 import monailabel
 from monailabel.interfaces.app import MONAILabelApp
-from monailabel.interfaces.config import TaskConfig
 from monailabel.interfaces.datastore import Datastore
-from monailabel.interfaces.tasks.infer_v2 import InferTask
+from monailabel.interfaces.tasks.infer_v2 import InferTask, InferType
 from monailabel.interfaces.tasks.scoring import ScoringMethod
 from monailabel.interfaces.tasks.strategy import Strategy
 from monailabel.interfaces.tasks.train import TrainTask
@@ -45,32 +42,11 @@ class MyApp(MONAILabelApp):
         self.heuristic_planner = strtobool(conf.get("heuristic_planner", "false"))
         self.planner = HeuristicPlanner(spatial_size=spatial_size, target_spacing=target_spacing)
 
-        # --- Detectar TaskConfig dinámicamente desde lib.configs ---
+        # --- Detectar TaskConfig desde el código fuente de lib.configs (AST, sin importar los módulos) ---
         logger.info("+++ Detectando TaskConfig en lib.configs ...")
-        configs: Dict[str, type] = {}
-        try:
-            pkg = lib.configs
-            for modinfo in pkgutil.iter_modules(pkg.__path__):
-                modname = modinfo.name
-                try:
-                    module = importlib.import_module(f"{pkg.__name__}.{modname}")
-                except Exception as e:
-                    logger.warning(f"  -> No se pudo importar módulo {modname}: {e}")
-                    continue
-                # buscar clases que hereden TaskConfig
-                for _, obj in inspect.getmembers(module, inspect.isclass):
-                    if obj is TaskConfig:
-                        continue
-                    try:
-                        if issubclass(obj, TaskConfig):
-                            key = modname.lower()
-                            configs[key] = obj
-                            logger.info(f"  -> Encontrado config: {key} => {module.__name__}.{obj.__name__}")
-                    except Exception:
-                        # issubclass puede fallar si obj no viene del mismo contexto, ignorar
-                        continue
-        except Exception as e:
-            logger.exception(f"Error detectando configs: {e}")
+        configs = discover_configs(os.path.dirname(lib.configs.__file__), lib.configs.__name__)
+        for key, spec in configs.items():
+            logger.info(f"  -> Encontrado config: {key} => {spec.module}.{spec.cls}")
 
         logger.info(f"✅ Configs detectadas: {list(configs.keys())}")
 
@@ -94,42 +70,42 @@ class MyApp(MONAILabelApp):
             print("---------------------------------------------------------------------------------------\n")
             exit(-1)
 
-        # --- Instanciar modelos de forma robusta ---
+        # --- Modelos: cada TaskConfig se importa, instancia e init() al pedir su primera tarea ---
         self.scribbles = conf.get("scribbles", "true") == "true"
-        self.models: Dict[str, TaskConfig] = {}
+        self.models: Dict[str, LazyTaskConfig] = {}
 
         for req in requested_models:
-            for name, cls in configs.items():
-                if self.models.get(name):
-                    continue
-                if req != "all" and req != name:
-                    continue
-                logger.info(f"+++ Adding Model: {name} => {cls.__module__}.{cls.__name__}")
-                try:
-                    instance = cls()  # intento estándar
-                except TypeError as e:
-                    logger.error(f"❌ No se pudo instanciar {name}: {e}")
-                    continue
-                except Exception as e:
-                    logger.exception(f"❌ Error instanciando {name}: {e}")
+            for name, spec in configs.items():
+                if self.models.get(name) or (req != "all" and req != name):
                     continue
+                self.models[name] = LazyTaskConfig(name, spec, self.model_dir, conf, self.planner)
 
-                # llamar init() del TaskConfig (algunos módulos lo esperan)
+        # lazy_models=false: construir todo al arrancar (comportamiento anterior)
+        if not strtobool(conf.get("lazy_models", "true")):
+            for name in list(self.models):
                 try:
-                    # muchos TaskConfig implementan init(name, model_dir, conf, planner)
-                    if hasattr(instance, "init"):
-                        instance.init(name, self.model_dir, conf, self.planner)
+                    self.models[name].get()
                 except Exception as e:
                     logger.exception(f"❌ Error al inicializar {name}: {e}")
-                    continue
-
-                self.models[name] = instance
+                    self.models.pop(name)
 
         logger.info(f"+++ Using Models: {list(self.models.keys())}")
 
+        # --- Manifiesto: info()/is_valid() de las tareas guardados al construirlas; /info no construye nada ---
+        self.task_manifest = TaskManifest(os.path.join(self.model_dir, ".task_manifest.json"))
+        self.code_stamp = source_stamp(os.path.join(app_dir, "lib"), os.path.abspath(__file__))
+        self.app_stamp = task_stamp(self.code_stamp, self.model_dir, conf)  # scribbles, pipelines
+
         # --- Bundles (si existen en conf) ---
         self.bundles = get_bundle_models(app_dir, conf, conf_key="bundles") if conf.get("bundles") else None
 
+        # Peticiones /infer ejecutándose a la vez (el resto espera turno; cuentan en la cola del planificador)
+        self._infer_slots = threading.BoundedSemaphore(max(1, int(conf.get("infer_workers", "4"))))
+
+        # Caché de resultados de inferencia (se crea con la primera tarea que la usa)
+        self._results = None
+        self._result_cache_lock = threading.Lock()
+
         # SAM2 disabled por el momento
         self.sam = False
 
@@ -168,16 +144,11 @@ class MyApp(MONAILabelApp):
     def init_infers(self) -> Dict[str, InferTask]:
         infers: Dict[str, InferTask] = {}
 
-        # Models -> cada TaskConfig debe exponer .infer()
-        for n, task_config in self.models.items():
-            try:
-                c = task_config.infer()
-                c = c if isinstance(c, dict) else {n: c}
-                for k, v in c.items():
-                    logger.info(f"+++ Adding Inferer:: {k} => {v}")
-                    infers[k] = v
-            except Exception as e:
-                logger.error(f"Error al crear inferer para {n}: {e}")
+        # Models -> cada TaskConfig debe exponer .infer(); la tarea se crea en su primer uso
+        for n, m in self.models.items():
+            logger.info(f"+++ Adding Inferer:: {n} (lazy)")
+            factory = lambda n=n: self._cached_infer(n, self._model_infer(n))  # noqa: E731
+            infers[n] = self._lazy(n, factory, "infer", m.stamp(self.code_stamp), m.describe("infer"))
 
         # Bundles
         if self.bundles:
@@ -188,75 +159,133 @@ class MyApp(MONAILabelApp):
 
         # Scribbles (opcional)
         if self.scribbles:
-            from monailabel.scribbles.infer import GMMBasedGraphCut, HistogramBasedGraphCut
-
-            labels = list(self.models.values())[0].labels if self.models else {}
-
-            infers.update(
-                {
-                    "Histogram+GraphCut": HistogramBasedGraphCut(
-                        intensity_range=(-300, 200, 0.0, 1.0, True),
-                        pix_dim=(2.5, 2.5, 5.0),
-                        lamda=1.0,
-                        sigma=0.1,
-                        num_bins=64,
-                        labels=labels,
-                    ),
-                    "GMM+GraphCut": GMMBasedGraphCut(
-                        intensity_range=(-300, 200, 0.0, 1.0, True),
-                        pix_dim=(2.5, 2.5, 5.0),
-                        lamda=5.0,
-                        sigma=0.5,
-                        num_mixtures=20,
-                        labels=labels,
-                    ),
-                }
-            )
+            for n, factory in (("Histogram+GraphCut", self._histogram_graphcut), ("GMM+GraphCut", self._gmm_graphcut)):
+                infers[n] = self._lazy(n, factory, "infer", self.app_stamp, self._describe(InferType.SCRIBBLES, n))
 
         # Pipelines
-        if infers.get("deepgrow_2d") and infers.get("deepgrow_3d"):
-            try:
-                infers["deepgrow_pipeline"] = InferDeepgrowPipeline(
-                    path=self.models["deepgrow_2d"].path,
-                    network=self.models["deepgrow_2d"].network,
-                    model_3d=infers["deepgrow_3d"],
-                    description="Combines Deepgrow 2D and 3D models",
-                )
-            except Exception as e:
-                logger.warning(f"Couldn't create deepgrow_pipeline: {e}")
+        if "deepgrow_2d" in infers and "deepgrow_3d" in infers:
+            infers["deepgrow_pipeline"] = self._lazy(
+                "deepgrow_pipeline",
+                lambda: self._deepgrow_pipeline(infers),
+                "infer",
+                self.app_stamp,
+                self._describe(InferType.DEEPGROW, "Combines Deepgrow 2D and 3D models"),
+            )
 
-        if (
-            infers.get("localization_spine")
-            and infers.get("localization_vertebra")
-            and infers.get("segmentation_vertebra")
-        ):
-            try:
-                infers["vertebra_pipeline"] = InferVertebraPipeline(
-                    task_loc_spine=infers["localization_spine"],
-                    task_loc_vertebra=infers["localization_vertebra"],
-                    task_seg_vertebra=infers["segmentation_vertebra"],
-                    description="Three-stage vertebra segmentation pipeline",
-                )
-            except Exception as e:
-                logger.warning(f"Couldn't create vertebra_pipeline: {e}")
+        if all(k in infers for k in ("localization_spine", "localization_vertebra", "segmentation_vertebra")):
+            infers["vertebra_pipeline"] = self._lazy(
+                "vertebra_pipeline",
+                lambda: self._vertebra_pipeline(infers),
+                "infer",
+                self.app_stamp,
+                self._describe(InferType.SEGMENTATION, "Three-stage vertebra segmentation pipeline"),
+            )
 
         logger.info(infers)
         return infers
 
+    def _lazy(self, name, factory, kind, stamp, describe):
+        return LazyTask(name, factory, kind, self.task_manifest, stamp, describe)
+
+    @staticmethod
+    def _describe(infer_type, description):
+        # info() de una tarea sin manifiesto todavía (primer arranque)
+        return {"type": infer_type, "labels": [], "dimension": 3, "description": description, "config": {}}
+
+    def _model_infer(self, name):
+        c = self.models[name].infer()
+        if isinstance(c, dict):
+            extra = [k for k in c if k != name]
+            if extra:
+                logger.warning(f"Inferers {extra} of {name} are not exposed with lazy_models; use lazy_models=false")
+            c = c.get(name, next(iter(c.values()), None))
+        logger.info(f"+++ Adding Inferer:: {name} => {c}")
+        return c
+
+    def _cached_infer(self, name, task):
+        # Caché de resultados en disco (imagen + modelo + parámetros); se invalida al publicar un modelo nuevo
+        if task is None or not strtobool(self.conf.get("result_cache", "true")):
+            return task
+        from lib.datastore.results import CachedInferTask
+
+        return CachedInferTask(name, task, self._result_cache())
+
+    def _result_cache(self):
+        from lib.datastore.results import ResultCache
+
+        with self._result_cache_lock:
+            if self._results is None:
+                self._results = ResultCache(
+                    self.conf.get("result_cache_dir", os.path.join(self.model_dir, "result_cache")),
+                    max_mb=float(self.conf.get("result_cache_mb", "2048")),
+                )
+            return self._results
+
+    def _scribbles_labels(self):
+        return next(iter(self.models.values())).labels if self.models else {}
+
+    def _histogram_graphcut(self):
+        from monailabel.scribbles.infer import HistogramBasedGraphCut
+
+        return HistogramBasedGraphCut(
+            intensity_range=(-300, 200, 0.0, 1.0, True),
+            pix_dim=(2.5, 2.5, 5.0),
+            lamda=1.0,
+            sigma=0.1,
+            num_bins=64,
+            labels=self._scribbles_labels(),
+        )
+
+    def _gmm_graphcut(self):
+        from monailabel.scribbles.infer import GMMBasedGraphCut
+
+        return GMMBasedGraphCut(
+            intensity_range=(-300, 200, 0.0, 1.0, True),
+            pix_dim=(2.5, 2.5, 5.0),
+            lamda=5.0,
+            sigma=0.5,
+            num_mixtures=20,
+            labels=self._scribbles_labels(),
+        )
+
+    def _deepgrow_pipeline(self, infers):
+        from lib.infers.deepgrow_pipeline import InferDeepgrowPipeline
+
+        model_3d = infers["deepgrow_3d"].get()
+        if infers["deepgrow_2d"].get() is None or model_3d is None:
+            errors = {k: infers[k].error for k in ("deepgrow_2d", "deepgrow_3d")}
+            raise RuntimeError(f"Deepgrow pipeline stages not available: {errors}")
+        return InferDeepgrowPipeline(
+            path=self.models["deepgrow_2d"].path,
+            network=self.models["deepgrow_2d"].network,
+            model_3d=model_3d,
+            description="Combines Deepgrow 2D and 3D models",
+        )
+
+    def _vertebra_pipeline(self, infers):
+        from lib.infers.vertebra_pipeline import InferVertebraPipeline
+
+        names = ("localization_spine", "localization_vertebra", "segmentation_vertebra")
+        stages = [infers[k].get() for k in names]
+        if any(s is None for s in stages):
+            raise RuntimeError("; ".join(f"{k}: {infers[k].error}" for k, s in zip(names, stages) if s is None))
+        return InferVertebraPipeline(
+            task_loc_spine=stages[0],
+            task_loc_vertebra=stages[1],
+            task_seg_vertebra=stages[2],
+            crop_batch_size=int(self.conf.get("crop_batch_size", "8")),
+            description="Three-stage vertebra segmentation pipeline",
+        )
+
     def init_trainers(self) -> Dict[str, TrainTask]:
         trainers: Dict[str, TrainTask] = {}
         if strtobool(self.conf.get("skip_trainers", "false")):
             return trainers
 
-        for n, task_config in self.models.items():
-            try:
-                t = task_config.trainer()
-                if not t:
-                    continue
-                logger.info(f"+++ Adding Trainer:: {n} => {t}")
-                trainers[n] = t
-            except Exception as e:
-                logger.error(f"Error creando trainer para {n}: {e}")
+        for n, m in self.models.items():
+            logger.info(f"+++ Adding Trainer:: {n} (lazy)")
+            factory = lambda n=n: self.models[n].trainer()  # noqa: E731
+            trainers[n] = self._lazy(n, factory, "train", m.stamp(self.code_stamp), m.describe("train"))
 
         if self.bundles:
             for n, b in self.bundles.items():
@@ -267,6 +296,74 @@ class MyApp(MONAILabelApp):
                 trainers[n] = t
         return trainers
 
+    def info(self):
+        from lib.inferers import inference_scheduler
+
+        # info()/is_valid() de las tareas lazy salen del manifiesto sin construirlas; los errores de construcción
+        # se devuelven al pedir la tarea. Solo se quitan los trainers que el config no tiene (ya conocido)
+        self._trainers = {k: v for k, v in self._trainers.items() if not isinstance(v, LazyTask) or v.available}
+        info = super().info()
+        # métricas del planificador: peticiones en cola por modelo, latencias, tamaño medio de los micro-batches
+        info["scheduler"] = inference_scheduler().metrics()
+        if self._results is not None:
+            info["result_cache"] = self._results.stats()
+        return info
+
+    def infer(self, request, datastore=None):
+        from lib.inferers import inference_scheduler
+
+        with inference_scheduler().track(request.get("model") or ""), self._infer_slots:
+            return super().infer(request, datastore)
+
+    def on_init_complete(self):
+        super().on_init_complete()
+
+        # --- Pool de modelos residentes: precarga + warm-up en segundo plano (no retrasa el arranque) ---
+        from lib.inferers import inference_scheduler
+        from lib.networks import model_pool
+
+        model_pool().budget_mb = float(self.conf.get("model_pool_budget_mb", "0"))
+
+        # --- Planificador: micro-batches de ventanas entre peticiones concurrentes del mismo modelo ---
+        inference_scheduler().configure(
+            enabled=strtobool(self.conf.get("coalesce_infer", "true")),
+            max_batch=int(self.conf.get("coalesce_max_batch", "16")),
+            max_wait_ms=float(self.conf.get("coalesce_wait_ms", "10")),
+            workers=int(self.conf.get("coalesce_workers", "1")),
+        )
+
+        # --- /infer concurrente: el endpoint async de monailabel ejecuta la inferencia en el event loop y las
+        # peticiones HTTP llegan de una en una; se sirve desde el pool de hilos de FastAPI (infer_workers a la vez)
+        server = sys.modules.get("monailabel.app")
+        if server is not None and strtobool(self.conf.get("concurrent_infer", "true")):
+            from lib.endpoints import install_concurrent_infer
+
+            install_concurrent_infer(server.app)
+
+        preload = self.conf.get("preload_models", "")
+        names = list(self._infers) if preload == "all" else [n.strip() for n in preload.split(",") if n.strip()]
+        if names:
+            threading.Thread(target=self._preload_models, args=(names,), name="ModelPreload", daemon=True).start()
+
+    def _preload_models(self, names):
+        import torch
+        from lib.networks import model_pool, preload
+
+        device = self.conf.get("preload_device", "cuda" if torch.cuda.is_available() else "cpu")
+        warmup = strtobool(self.conf.get("preload_warmup", "true"))
+        for name in names:
+            task = self._infers.get(name)
+            task = task.get() if isinstance(task, LazyTask) else task
+            if task is None or not hasattr(task, "_get_network"):
+                logger.info(f"Preload: {name} no disponible / sin red; se omite")
+                continue
+            try:
+                preload(task, device, warmup)
+                logger.info(f"✅ Preload: {name} en {device}")
+            except Exception as e:
+                logger.warning(f"Preload de {name} falló: {e}")
+        logger.info(f"Model pool: {model_pool().stats()}")
+
     def init_strategies(self) -> Dict[str, Strategy]:
         strategies: Dict[str, Strategy] = {
             "random": Random(),
@@ -0,0 +1,230 @@
+"""
+Batch inference over a production lot of weld CT volumes (Annex A pipeline).
+
+The UNet is built and loaded once (the ONNX Runtime / TorchScript artifact when it was
+exported with export_model.py); a DataLoader worker pool loads and preprocesses
+volume N+1 while the sliding window runs on volume N, and masks are written by a
+background thread.  A throughput report (JSON) is written next to the masks.
+
+Example:
+    python scripts/batch_infer.py --input D:\\MONAI_STUDIES --model D:\\MONAI_MODELS\\best_metric_model.pth \\
+        --output-dir D:\\MONAI_RESULTS\\lote_01 --workers 4
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from glob import glob
+
+import numpy as np
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.inferers import ForegroundSlidingWindowInferer  # noqa: E402
+from lib.networks import load_weld_model, resolve_model  # noqa: E402
+from lib.networks.export import RUNTIMES  # noqa: E402
+from monai.data import DataLoader, Dataset, decollate_batch  # noqa: E402
+from monai.inferers import SlidingWindowInferer  # noqa: E402
+from monai.transforms import (  # noqa: E402
+    AsDiscreted,
+    Compose,
+    CropForegroundd,
+    EnsureChannelFirstd,
+    EnsureTyped,
+    Invertd,
+    LoadImaged,
+    SaveImaged,
+    ScaleIntensityd,
+)
+
+logger = logging.getLogger(__name__)
+
+NIFTI_EXT = (".nii", ".nii.gz")
+
+
+def read_manifest(path):
+    """
+    Returns the list of volumes to process.
+
+    ``path`` can be a folder (all NIfTI files, recursively), a text file with one volume per line,
+    or a JSON file: either a plain list or a ``dataset.json`` (``training``/``test`` entries).
+    """
+    if os.path.isdir(path):
+        files = glob(os.path.join(path, "**", "*.nii*"), recursive=True)
+        return sorted(f for f in files if f.endswith(NIFTI_EXT))
+
+    base = os.path.dirname(os.path.abspath(path))
+    if path.endswith(".json"):
+        with open(path) as fc:
+            items = json.load(fc)
+        if isinstance(items, dict):
+            items = items.get("training", []) + items.get("test", [])
+        items = [i["image"] if isinstance(i, dict) else i for i in items]
+    else:
+        with open(path) as fc:
+            items = [line.strip() for line in fc if line.strip() and not line.startswith("#")]
+
+    return [i if os.path.isabs(i) else os.path.normpath(os.path.join(base, i)) for i in items]
+
+
+def pre_transforms(keys=("image",)):
+    # Same preprocessing as Annex A (dictionary version, so the crop can be inverted);
+    # other keys (e.g. a mask) get the same crop
+    return Compose(
+        [
+            LoadImaged(keys=keys, image_only=True),
+            EnsureChannelFirstd(keys=keys),
+            ScaleIntensityd(keys="image"),
+            CropForegroundd(keys=keys, source_key="image"),
+            EnsureTyped(keys=keys),
+        ]
+    )
+
+
+def post_transforms(pre, output_dir):
+    return Compose(
+        [
+            AsDiscreted(keys="pred", argmax=True),
+            Invertd(keys="pred", transform=pre, orig_keys="image", nearest_interp=True),
+            SaveImaged(
+                keys="pred",
+                output_dir=output_dir,
+                output_postfix="seg",
+                output_ext=".nii.gz",
+                output_dtype=np.uint8,
+                resample=False,
+                separate_folder=False,
+                print_log=False,
+            ),
+        ]
+    )
+
+
+def write_result(post, item):
+    start = time.time()
+    post(item)
+    return time.time() - start
+
+
+def run(args):
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    device = torch.device(args.device)
+
+    images = read_manifest(args.input)
+    if not images:
+        raise SystemExit(f"No volumes found in: {args.input}")
+    os.makedirs(args.output_dir, exist_ok=True)
+    logger.info(f"Volumes to process: {len(images)}")
+
+    start = time.time()
+    runtime, artifact = resolve_model(args.model, device, args.runtime)
+    network = load_weld_model(artifact, device=device, runtime=runtime, threads=args.threads)
+    latency_model = time.time() - start
+
+    pre = pre_transforms()
+    post = post_transforms(pre, args.output_dir)
+    loader = DataLoader(
+        Dataset(data=[{"image": i} for i in images], transform=pre),
+        batch_size=1,
+        num_workers=args.workers,
+        prefetch_factor=2 if args.workers else None,
+        persistent_workers=False,
+    )
+    sw_params = {"roi_size": args.roi_size, "sw_batch_size": args.sw_batch_size, "overlap": args.overlap}
+    if args.skip_empty:
+        inferer = ForegroundSlidingWindowInferer(
+            threshold=args.skip_threshold, source=args.skip_source, margin=args.skip_margin, mode="gaussian", **sw_params
+        )
+    else:
+        inferer = SlidingWindowInferer(mode="gaussian", **sw_params)
+
+    rows = []
+    pending = []
+    begin = time.time()
+    wait_start = time.time()
+    with ThreadPoolExecutor(max_workers=1) as writer, torch.no_grad():
+        for batch in loader:
+            latency_load = time.time() - wait_start
+
+            start = time.time()
+            inputs = batch["image"].to(device)
+            batch["pred"] = inferer(inputs, network).cpu()
+            latency_infer = time.time() - start
+
+            for item in decollate_batch(batch):
+                image_path = item["image"].meta.get("filename_or_obj")
+                rows.append(
+                    {
+                        "image": image_path,
+                        "shape": list(item["image"].shape[1:]),
+                        "load_wait": round(latency_load, 3),
+                        "infer": round(latency_infer, 3),
+                    }
+                )
+                if args.skip_empty:
+                    rows[-1].update({"windows": inferer.stats["windows"], "skipped": inferer.stats["skipped"]})
+                pending.append((rows[-1], writer.submit(write_result, post, item)))
+                logger.info(f"{len(rows)}/{len(images)} => {image_path}; infer: {latency_infer:.2f}s")
+            wait_start = time.time()
+
+        for row, future in pending:
+            row["write"] = round(future.result(), 3)
+
+    total = time.time() - begin
+    voxels = sum(int(np.prod(r["shape"])) for r in rows)
+    summary = {
+        "volumes": len(rows),
+        "workers": args.workers,
+        "device": str(device),
+        "runtime": runtime,
+        "model_load": round(latency_model, 3),
+        "total": round(total, 3),
+        "volumes_per_sec": round(len(rows) / total, 4) if total else None,
+        "voxels_per_sec": round(voxels / total, 1) if total else None,
+        "mean_infer": round(float(np.mean([r["infer"] for r in rows])), 3),
+        "mean_load_wait": round(float(np.mean([r["load_wait"] for r in rows])), 3),
+    }
+    if args.skip_empty:
+        summary["windows"] = sum(r["windows"] for r in rows)
+        summary["skipped"] = sum(r["skipped"] for r in rows)
+
+    report = args.report if args.report else os.path.join(args.output_dir, "throughput_report.json")
+    with open(report, "w") as fc:
+        json.dump({"summary": summary, "volumes": rows}, fc, indent=2)
+
+    print(json.dumps(summary, indent=2))
+    print(f"✅ {len(rows)} volúmenes segmentados en: {args.output_dir}; reporte: {report}")
+    return summary
+
+
+def main():
+    p = argparse.ArgumentParser(description="Batch sliding-window inference for weld CT volumes")
+    p.add_argument("--input", required=True, help="Folder with NIfTI volumes or a manifest (.txt/.json)")
+    p.add_argument("--model", required=True, help="Trained weights (e.g. best_metric_model.pth)")
+    p.add_argument("--output-dir", required=True, help="Folder where the masks are written")
+    p.add_argument("--report", default=None, help="Throughput report path (default: <output-dir>/throughput_report.json)")
+    p.add_argument("--workers", type=int, default=2, help="Loader processes preparing the next volumes")
+    p.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
+    p.add_argument("--runtime", choices=RUNTIMES, default="auto", help="See export_model.py / quantize_model.py")
+    p.add_argument("--threads", type=int, default=0, help="torch intra-op threads (0 = torch default)")
+    p.add_argument("--roi-size", type=int, nargs=3, default=(64, 64, 64))
+    p.add_argument("--sw-batch-size", type=int, default=4)
+    p.add_argument("--overlap", type=float, default=0.25)
+    p.add_argument("--skip-empty", action="store_true", help="Skip sliding windows without metal (foreground)")
+    p.add_argument("--skip-threshold", type=float, default=0.5, help="Scaled intensity [0, 1] considered metal")
+    p.add_argument("--skip-source", choices=("threshold", "box"), default="threshold")
+    p.add_argument("--skip-margin", type=int, default=8, help="Margin (voxels) kept around the foreground")
+    args = p.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] [%(levelname)s] %(message)s")
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
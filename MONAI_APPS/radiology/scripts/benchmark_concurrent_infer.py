@@ -0,0 +1,193 @@
+"""
+Concurrent inference benchmark through the MONAI Label server: starts the app (``monailabel start_server``),
+sends the same infer requests first one at a time and then from ``--clients`` concurrent clients (several
+operators running the Annex C Slicer flow), and reports latency, throughput and the micro-batches of the
+inference scheduler read from ``/info`` (windows and requests per forward; ``shared_batches`` = forwards that
+served more than one request).
+
+Exits with an error if no forward served more than one request under concurrent load (``--no-check`` to only
+report).  Without ``--images`` random volumes of ``--size`` are used; the result cache is bypassed.
+
+Example:
+    python scripts/benchmark_concurrent_infer.py --model deepedit_weld --conf models deepedit_weld \\
+        --conf weld_model D:\\MONAI_MODELS\\best_metric_model.pth --images D:\\MONAI_STUDIES2 --clients 4 \\
+        --output D:\\MONAI_RESULTS\\concurrent_infer.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import nibabel as nib
+import numpy as np
+import requests
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def synthetic_images(folder, count, size):
+    os.makedirs(folder, exist_ok=True)
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"volume_{i:02d}.nii.gz")
+        nib.save(nib.Nifti1Image(rng.random(size, dtype=np.float32), np.eye(4)), path)
+        paths.append(path)
+    return paths
+
+
+def start_server(args, studies, log):
+    cmd = [sys.executable, "-m", "monailabel.main", "start_server", "--app", args.app, "--studies", studies]
+    cmd += ["--host", "127.0.0.1", "--port", str(args.port)]
+    for k, v in args.conf:
+        cmd += ["--conf", k, v]
+    server = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT)
+    url = f"http://127.0.0.1:{args.port}"
+    deadline = time.time() + args.startup_timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"Server exited with code {server.returncode}; see {log.name}")
+        try:
+            if requests.get(f"{url}/info/", timeout=5).ok:
+                return server, url
+        except requests.ConnectionError:
+            pass
+        time.sleep(1)
+    server.terminate()
+    raise SystemExit(f"Server not ready after {args.startup_timeout}s; see {log.name}")
+
+
+def infer(url, model, image, params):
+    start = time.perf_counter()
+    r = requests.post(
+        f"{url}/infer/{model}", params={"image": image, "output": "json"}, data={"params": json.dumps(params)}
+    )
+    r.raise_for_status()
+    return time.perf_counter() - start
+
+
+def run(url, model, images, params, clients):
+    """Every image once per client; returns latencies and wall time."""
+    jobs = [image for _ in range(clients) for image in images]
+    latencies, errors, lock = [], [], threading.Lock()
+
+    def client(worker):
+        for image in jobs[worker::clients]:
+            try:
+                latency = infer(url, model, image, params)
+                with lock:
+                    latencies.append(latency)
+            except requests.RequestException as e:
+                with lock:
+                    errors.append(str(e))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    if errors:
+        raise SystemExit(f"{len(errors)} requests failed: {errors[0]}")
+    return {
+        "requests": len(latencies),
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 3),
+        "latency_p50_s": round(statistics.median(latencies), 3),
+        "latency_max_s": round(max(latencies), 3),
+    }
+
+
+def batcher_stats(url):
+    scheduler = requests.get(f"{url}/info/").json().get("scheduler", {})
+    totals = {"calls": 0, "batches": 0, "windows": 0, "shared_batches": 0, "requests": 0.0}
+    for stats in scheduler.get("batchers", {}).values():
+        for key in ("calls", "batches", "windows", "shared_batches"):
+            totals[key] += stats[key]
+        totals["requests"] += stats["mean_requests"] * stats["batches"]
+    return totals
+
+
+def delta(after, before):
+    d = {k: after[k] - before[k] for k in after}
+    return {
+        "forwards": d["batches"],
+        "windows_per_forward": round(d["windows"] / d["batches"], 2) if d["batches"] else 0,
+        "requests_per_forward": round(d["requests"] / d["batches"], 2) if d["batches"] else 0,
+        "shared_batches": d["shared_batches"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent inference benchmark through the MONAI Label server")
+    parser.add_argument("--app", default=APP_DIR, help="app folder (default: this app)")
+    parser.add_argument("--model", required=True, help="infer task, e.g. deepedit_weld")
+    parser.add_argument("--conf", nargs=2, action="append", default=[], metavar=("KEY", "VALUE"))
+    parser.add_argument("--images", default=None, help="folder of images (*.nii.gz, labels excluded)")
+    parser.add_argument("--count", type=int, default=4, help="images used (random volumes without --images)")
+    parser.add_argument("--size", type=int, nargs=3, default=[96, 96, 96], help="size of the random volumes")
+    parser.add_argument("--clients", type=int, default=4, help="concurrent clients")
+    parser.add_argument("--params", default="{}", help="extra infer params (JSON)")
+    parser.add_argument("--port", type=int, default=8123)
+    parser.add_argument("--startup-timeout", type=int, default=300)
+    parser.add_argument("--output", default=None, help="JSON report")
+    parser.add_argument("--no-check", action="store_true", help="do not fail if no forward was shared")
+    args = parser.parse_args()
+    args.app = os.path.abspath(args.app)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.images:
+            images = sorted(f for f in glob.glob(os.path.join(args.images, "*.nii*")) if "_label" not in f)
+            images = [os.path.abspath(f) for f in images[: args.count]]
+        else:
+            images = synthetic_images(os.path.join(tmp, "images"), args.count, args.size)
+        params = {"result_cache": False, **json.loads(args.params)}
+
+        with open(os.path.join(tmp, "server.log"), "w") as log:
+            server, url = start_server(args, os.path.join(tmp, "studies"), log)
+            try:
+                infer(url, args.model, images[0], params)  # model load / warm-up
+
+                before = batcher_stats(url)
+                sequential = run(url, args.model, images, params, 1)
+                middle = batcher_stats(url)
+                concurrent = run(url, args.model, images, params, args.clients)
+                after = batcher_stats(url)
+            finally:
+                server.terminate()
+                server.wait(30)
+
+    report = {
+        "model": args.model,
+        "images": len(images),
+        "sequential": {**sequential, **delta(middle, before)},
+        f"concurrent_x{args.clients}": {**concurrent, **delta(after, middle)},
+    }
+    for name, r in list(report.items())[2:]:
+        print(
+            f"{name:<14} {r['requests']:3d} requests  {r['throughput_rps']:6.2f} req/s  p50 {r['latency_p50_s']:.2f}s  "
+            f"forwards {r['forwards']:4d}  windows/forward {r['windows_per_forward']:5.2f}  "
+            f"requests/forward {r['requests_per_forward']:4.2f}  shared {r['shared_batches']}"
+        )
+    speedup = report[f"concurrent_x{args.clients}"]["throughput_rps"] / max(sequential["throughput_rps"], 1e-9)
+    print(f"Throughput concurrent vs sequential: x{speedup:.2f}")
+
+    if args.output:
+        with open(args.output, "w") as fc:
+            json.dump(report, fc, indent=2)
+
+    if not args.no_check and not report[f"concurrent_x{args.clients}"]["shared_batches"]:
+        raise SystemExit("No forward served more than one request: requests are not coalesced")
+    print("✅ Benchmark de inferencia concurrente completado")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Scaling benchmark of the CPU data parallel training mode (gloo, conf cpu_workers; see
+lib/trainers/distributed.py): training samples/sec vs number of worker processes.
+
+Every run spawns N workers with cpu_count // N intra-op threads each, wraps the network in
+DistributedDataParallel and trains on random ROIs (no I/O, so only compute + gradient
+all-reduce is measured).  The table is printed and saved as JSON.
+
+Example:
+    python scripts/benchmark_cpu_ddp.py --network segmentation --workers 1 2 4 8 --output ddp_scaling.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.networks import weld_unet  # noqa: E402
+from lib.trainers.distributed import worker_threads  # noqa: E402
+from monai.losses import DiceCELoss  # noqa: E402
+from monai.networks.nets import SegResNet  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+def build_network(name):
+    if name == "weld":
+        return weld_unet(), 1, 2
+    # same as lib/configs/segmentation.py (25 labels + background)
+    network = SegResNet(
+        spatial_dims=3,
+        in_channels=1,
+        out_channels=26,
+        init_filters=32,
+        blocks_down=(1, 2, 2, 4),
+        blocks_up=(1, 1, 1),
+        dropout_prob=0.2,
+    )
+    return network, 1, 26
+
+
+def worker(rank, world_size, args, url, results):
+    torch.set_num_threads(worker_threads(world_size))
+    torch.distributed.init_process_group("gloo", init_method=url, world_size=world_size, rank=rank)
+    torch.manual_seed(rank)
+
+    network, in_channels, classes = build_network(args.network)
+    model = torch.nn.parallel.DistributedDataParallel(network)
+    optimizer = torch.optim.AdamW(model.parameters(), lr=1e-4)
+    loss_function = DiceCELoss(to_onehot_y=True, softmax=True)
+
+    x = torch.rand(args.batch_size, in_channels, *args.roi_size)
+    y = torch.randint(0, classes, (args.batch_size, 1, *args.roi_size))
+
+    def step():
+        optimizer.zero_grad(set_to_none=True)
+        loss = loss_function(model(x), y)
+        loss.backward()
+        optimizer.step()
+
+    for _ in range(args.warmup):
+        step()
+    torch.distributed.barrier()
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        step()
+    torch.distributed.barrier()
+    elapsed = time.perf_counter() - start
+
+    rate = torch.tensor([args.steps * args.batch_size / elapsed], dtype=torch.float64)
+    torch.distributed.all_reduce(rate)
+    if rank == 0:
+        results.put(float(rate))
+    torch.distributed.destroy_process_group()
+
+
+def run(args, workers):
+    ctx = torch.multiprocessing.get_context("spawn")
+    results = ctx.SimpleQueue()
+    os.environ["OMP_NUM_THREADS"] = str(worker_threads(workers))
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"file://{os.path.join(tmp, 'rendezvous')}"
+        torch.multiprocessing.spawn(worker, args=(workers, args, url, results), nprocs=workers)
+    return results.get()
+
+
+def main():
+    p = argparse.ArgumentParser(description="Samples/sec vs workers for gloo CPU data parallel training")
+    p.add_argument("--network", choices=("weld", "segmentation"), default="weld")
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    p.add_argument("--roi-size", type=int, nargs=3, default=(64, 64, 64))
+    p.add_argument("--batch-size", type=int, default=2, help="Per worker")
+    p.add_argument("--steps", type=int, default=10)
+    p.add_argument("--warmup", type=int, default=2)
+    p.add_argument("--output", default=None, help="JSON report")
+    args = p.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] [%(levelname)s] %(message)s")
+
+    rows = []
+    for workers in args.workers:
+        rate = run(args, workers)
+        first = rows[0] if rows else {"workers": workers, "samples_per_sec": rate}
+        speedup = rate / first["samples_per_sec"]
+        rows.append(
+            {
+                "workers": workers,
+                "threads_per_worker": worker_threads(workers),
+                "samples_per_sec": round(rate, 3),
+                "speedup": round(speedup, 3),
+                "efficiency": round(speedup * first["workers"] / workers, 3),
+            }
+        )
+        logger.info(f"{workers} workers => {rate:.2f} samples/sec")
+
+    print(f"{'workers':>8} {'threads':>8} {'samples/s':>10} {'speedup':>8} {'eff.':>6}")
+    for r in rows:
+        print(
+            f"{r['workers']:>8} {r['threads_per_worker']:>8} {r['samples_per_sec']:>10.2f} "
+            f"{r['speedup']:>8.2f} {r['efficiency']:>6.2f}"
+        )
+    if args.output:
+        report = {"network": args.network, "roi_size": list(args.roi_size), "cpu_count": os.cpu_count(), "runs": rows}
+        with open(args.output, "w") as fc:
+            json.dump(report, fc, indent=2)
+    print(f"✅ Benchmark de escalado completado ({os.cpu_count()} núcleos)")
+
+
+if __name__ == "__main__":
+    main()
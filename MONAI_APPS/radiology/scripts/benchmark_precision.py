@@ -0,0 +1,160 @@
+"""
+bf16 vs fp32 on CPU for the weld UNet (Annex A) and the radiology SegResNet: inference latency,
+training step time and Dice parity on the sample studies, so ``precision=bf16`` (conf / infer and
+train request option) can be turned on with evidence.
+
+Dice parity: agreement between the bf16 and fp32 segmentations of every volume (1.0 = identical)
+and, for <name>.nii.gz + <name>_label.nii.gz pairs (e.g. MONAI_STUDIES2), Dice of both against the label.
+
+Example:
+    python scripts/benchmark_precision.py --network weld --model D:\\MONAI_MODELS\\best_metric_model.pth \\
+        --images D:\\MONAI_STUDIES2 --output D:\\MONAI_RESULTS\\bf16_report.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from batch_infer import read_manifest  # noqa: E402
+from lib.inferers import AutocastInferer, autocast, bf16_supported  # noqa: E402
+from lib.networks import load_checkpoint  # noqa: E402
+from monai.data import decollate_batch, list_data_collate  # noqa: E402
+from monai.losses import DiceCELoss  # noqa: E402
+from monai.metrics import compute_dice  # noqa: E402
+from monai.networks.utils import one_hot  # noqa: E402
+from monai.transforms import AsDiscreted, Compose, EnsureChannelFirstd, Invertd, LoadImaged  # noqa: E402
+from quantize_model import LABEL_SUFFIX, eval_pairs, segmentation_spec, weld_spec  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+def predict(spec, network, image, precision):
+    pre = spec["pre"]
+    batch = list_data_collate([pre({"image": image})])
+    inferer = AutocastInferer(spec["inferer"], precision)
+    start = time.perf_counter()
+    with torch.no_grad():
+        batch["pred"] = inferer(batch["image"], network)
+    latency = time.perf_counter() - start
+
+    post = Compose(
+        [
+            AsDiscreted(keys="pred", argmax=True),
+            Invertd(keys="pred", transform=pre, orig_keys="image", nearest_interp=True),
+        ]
+    )
+    return post(decollate_batch(batch)[0])["pred"], latency
+
+
+def mean_dice(a, b, n):
+    score = compute_dice(one_hot(a[None].long(), n), one_hot(b[None].long(), n), include_background=False)
+    return float(np.nanmean(score.cpu().numpy()))
+
+
+def train_step_time(spec, network, precision, batch_size, repeats):
+    network.train()
+    optimizer = torch.optim.AdamW(network.parameters(), lr=1e-4)
+    loss_function = DiceCELoss(to_onehot_y=True, softmax=True)
+    x = torch.rand(batch_size, 1, *spec["roi_size"])
+    y = torch.randint(0, spec["num_classes"], (batch_size, 1, *spec["roi_size"]))
+
+    times = []
+    for i in range(repeats + 1):
+        start = time.perf_counter()
+        optimizer.zero_grad(set_to_none=True)
+        with autocast(precision):
+            outputs = network(x)
+        loss = loss_function(outputs.float(), y)
+        loss.backward()
+        optimizer.step()
+        if i:  # first step: allocator / oneDNN warm-up
+            times.append(time.perf_counter() - start)
+    network.eval()
+    return float(np.median(times))
+
+
+def main():
+    p = argparse.ArgumentParser(description="bf16 autocast vs fp32: latency and Dice parity")
+    p.add_argument("--network", choices=("weld", "segmentation"), default="weld")
+    p.add_argument("--model", required=True, help="fp32 checkpoint (best_metric_model.pth / segmentation.pt)")
+    p.add_argument("--images", required=True, help="Folder (e.g. MONAI_STUDIES2) or manifest of volumes")
+    p.add_argument("--max-volumes", type=int, default=8)
+    p.add_argument("--roi-size", type=int, nargs=3, default=None)
+    p.add_argument("--train-batch-size", type=int, default=2)
+    p.add_argument("--repeats", type=int, default=5, help="Training steps timed")
+    p.add_argument("--min-parity", type=float, default=0.99, help="Fail if the mean bf16/fp32 Dice is lower")
+    p.add_argument("--output", default=None, help="JSON report")
+    args = p.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] [%(levelname)s] %(message)s")
+
+    if not bf16_supported("cpu"):
+        raise SystemExit(f"bf16 is not supported on this CPU ({torch.backends.cpu.get_cpu_capability()})")
+
+    spec = weld_spec(args) if args.network == "weld" else segmentation_spec(args)
+    network = load_checkpoint(spec["network"], args.model, device="cpu", strict=False).eval()
+    n = spec["num_classes"]
+
+    volumes = [v for v in read_manifest(args.images) if LABEL_SUFFIX not in os.path.basename(v)][: args.max_volumes]
+    if not volumes:
+        raise SystemExit(f"No volumes found in: {args.images}")
+
+    labels = {os.path.abspath(i): y for i, y in eval_pairs(args.images)} if os.path.isdir(args.images) else {}
+    for precision in ("fp32", "bf16"):  # warm-up: oneDNN primitives are created on the first call
+        predict(spec, network, volumes[0], precision)
+
+    rows = []
+    for image in volumes:
+        fp32, t32 = predict(spec, network, image, "fp32")
+        bf16, t16 = predict(spec, network, image, "bf16")
+        row = {"image": image, "latency_fp32": t32, "latency_bf16": t16, "parity_dice": mean_dice(bf16, fp32, n)}
+
+        label = labels.get(os.path.abspath(image))
+        if label:
+            y = Compose([LoadImaged(keys="label", image_only=True), EnsureChannelFirstd(keys="label")])(
+                {"label": label}
+            )["label"]
+            row["dice_fp32"], row["dice_bf16"] = mean_dice(fp32, y, n), mean_dice(bf16, y, n)
+        rows.append(row)
+        logger.info(f"{image} => {t32:.2f}s fp32; {t16:.2f}s bf16; parity dice {row['parity_dice']:.4f}")
+
+    def mean(key):
+        values = [r[key] for r in rows if key in r]
+        return float(np.nanmean(values)) if values else None
+
+    step32 = train_step_time(spec, network, "fp32", args.train_batch_size, args.repeats)
+    step16 = train_step_time(spec, network, "bf16", args.train_batch_size, args.repeats)
+    report = {
+        "network": args.network,
+        "cpu_capability": torch.backends.cpu.get_cpu_capability(),
+        "threads": torch.get_num_threads(),
+        "inference": {
+            "latency_fp32": mean("latency_fp32"),
+            "latency_bf16": mean("latency_bf16"),
+            "speedup": mean("latency_fp32") / mean("latency_bf16"),
+        },
+        "train_step": {"fp32": step32, "bf16": step16, "speedup": step32 / step16},
+        "dice": {"parity": mean("parity_dice"), "fp32": mean("dice_fp32"), "bf16": mean("dice_bf16")},
+        "volumes": rows,
+    }
+
+    if args.output:
+        with open(args.output, "w") as fc:
+            json.dump(report, fc, indent=2)
+    print(json.dumps({k: v for k, v in report.items() if k != "volumes"}, indent=2))
+    if report["dice"]["parity"] < args.min_parity:
+        raise SystemExit(f"bf16/fp32 Dice {report['dice']['parity']:.4f} is below --min-parity {args.min_parity}")
+    print("✅ bf16 con paridad de Dice respecto a fp32")
+
+
+if __name__ == "__main__":
+    main()
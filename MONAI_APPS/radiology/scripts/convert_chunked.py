@@ -0,0 +1,66 @@
+"""
+Chunked volume store for the weld CTs: converts every <datastore>/**/*.nii.gz into a
+blosc/zstd compressed, chunked .zarr multiscale pyramid next to it (image.nii.gz -> image.zarr).
+
+ROIs of the converted volumes are then read with LoadChunkedd (lib/datastore/chunked.py),
+which only decompresses the chunks intersecting the requested box / pyramid level.
+
+Example:
+    python scripts/convert_chunked.py --datastore D:\\MONAI_STUDIES --levels 3 --chunks 64 64 64
+"""
+
+import argparse
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.datastore import chunked_path, write_chunked  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+LABEL_SUFFIX = "_label"
+
+
+def main():
+    p = argparse.ArgumentParser(description="Convert NIfTI volumes into chunked multiscale .zarr stores")
+    p.add_argument("--datastore", required=True, help="Studies folder (e.g. MONAI_STUDIES); searched recursively")
+    p.add_argument("--chunks", type=int, nargs=3, default=(64, 64, 64), help="Chunk size (voxels)")
+    p.add_argument("--levels", type=int, default=3, help="Pyramid levels (level k is 2**k times smaller)")
+    p.add_argument("--cname", default="zstd", choices=("zstd", "lz4", "lz4hc", "blosclz", "zlib"))
+    p.add_argument("--clevel", type=int, default=3, help="Compression level")
+    p.add_argument("--workers", type=int, default=os.cpu_count(), help="Volumes converted in parallel")
+    p.add_argument("--overwrite", action="store_true", help="Convert again volumes that already have a .zarr")
+    args = p.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] [%(levelname)s] %(message)s")
+
+    volumes = sorted(glob(os.path.join(args.datastore, "**", "*.nii*"), recursive=True))
+    volumes = [v for v in volumes if args.overwrite or not os.path.exists(chunked_path(v))]
+    if not volumes:
+        raise SystemExit(f"No volumes to convert in: {args.datastore}")
+    logger.info(f"Volumes to convert: {len(volumes)}")
+
+    done = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = []
+        for v in volumes:
+            label = LABEL_SUFFIX in os.path.basename(v)  # label maps: nearest downsampling
+            futures.append(
+                executor.submit(write_chunked, v, None, args.chunks, args.levels, args.cname, args.clevel, label)
+            )
+        for v, future in zip(volumes, futures):
+            try:
+                future.result()
+                done += 1
+            except Exception as e:
+                logger.error(f"{v} => {e}")
+
+    print(f"✅ {done} volúmenes convertidos a formato por bloques en: {args.datastore}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+DICOM -> NIfTI conversion service for the MONAI Label datastore (replaces Conversión_de_Metadatos.ipynb).
+
+Watches an incoming folder (scanner export / shared drive) and converts every new DICOM series,
+in a process pool, straight into <datastore>/case_NNN/image.nii.gz with its spacing, origin and
+orientation.  Series already converted (same content hash, see <datastore>/.dicom_index.json)
+are skipped, also when they are copied again under another folder name.
+
+Example:
+    python scripts/convert_dicom.py --incoming D:\\DICOM_ENTRANTE --datastore D:\\MONAI_STUDIES --watch
+"""
+
+import argparse
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.datastore import DicomConverter  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+def init_worker(threads):
+    # ITK threads per process: parallelism comes from the pool
+    import SimpleITK as sitk
+
+    sitk.ProcessObject.SetGlobalDefaultNumberOfThreads(threads)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Parallel DICOM to NIfTI conversion into the MONAI Label datastore")
+    p.add_argument("--incoming", required=True, help="Folder with DICOM series (any depth)")
+    p.add_argument("--datastore", required=True, help="Studies folder (e.g. MONAI_STUDIES)")
+    p.add_argument("--workers", type=int, default=os.cpu_count(), help="Series converted in parallel")
+    p.add_argument("--watch", action="store_true", help="Keep polling --incoming for new series")
+    p.add_argument("--interval", type=float, default=5.0, help="Seconds between scans with --watch")
+    p.add_argument("--settle", type=float, default=10.0, help="Seconds without changes before a series is converted")
+    args = p.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] [%(levelname)s] %(message)s")
+
+    workers = max(1, args.workers)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(threads,)) as executor:
+        converter = DicomConverter(args.datastore, executor, settle=args.settle if args.watch else 0)
+        if args.watch:
+            logger.info(f"Watching {args.incoming} => {args.datastore} (Ctrl+C to stop)")
+            try:
+                converter.watch(args.incoming, args.interval)
+            except KeyboardInterrupt:
+                pass
+        else:
+            added = converter.scan(args.incoming)
+            print(f"✅ {len(added)} series convertidas en: {args.datastore}")
+
+
+if __name__ == "__main__":
+    main()
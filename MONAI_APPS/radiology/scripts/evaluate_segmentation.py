@@ -0,0 +1,98 @@
+"""
+Validation metrics for weld segmentations (replaces the global Dice of Annex D).
+
+Every prediction is matched with its reference label by sample name
+(segmentation_sample11.nii <=> sample11_label.nii.gz) and evaluated in parallel;
+volumes are streamed slab by slab in their native dtype.  One CSV row per (case, label):
+Dice, IoU, volume difference, HD95, ASSD and connected-component detection rate.
+
+Example:
+    python scripts/evaluate_segmentation.py --pred "D:\\MONAI_RESULTS\\segmentation_sample*.nii" \\
+        --labels D:\\MONAI_STUDIES2 --output D:\\MONAI_RESULTS\\metrics.csv
+"""
+
+import argparse
+import csv
+import logging
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.metrics import evaluate_pair  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+LABEL_SUFFIX = "_label"
+
+
+def case_name(path, prefix):
+    name = re.sub(r"\.nii(\.gz)?$", "", os.path.basename(path))
+    return name[len(prefix) :] if prefix and name.startswith(prefix) else name
+
+
+def match_pairs(pred_pattern, label_dir, prefix):
+    labels = {}
+    for label in glob(os.path.join(label_dir, f"*{LABEL_SUFFIX}.nii*")):
+        labels[case_name(label, "")[: -len(LABEL_SUFFIX)]] = label
+
+    pairs = []
+    for pred in sorted(glob(pred_pattern)):
+        label = labels.get(case_name(pred, prefix))
+        if label:
+            pairs.append((pred, label))
+        else:
+            logger.warning(f"No label found for: {pred}")
+    return pairs
+
+
+def main():
+    p = argparse.ArgumentParser(description="Per-label segmentation metrics (Dice, IoU, HD95, ASSD, detection)")
+    p.add_argument("--pred", required=True, help="Glob of predicted segmentations (quote it)")
+    p.add_argument("--labels", required=True, help="Folder with <case>_label.nii.gz references")
+    p.add_argument("--prefix", default="segmentation_", help="Prefix removed from prediction names to get <case>")
+    p.add_argument("--output", required=True, help="CSV file")
+    p.add_argument("--workers", type=int, default=os.cpu_count(), help="Cases evaluated in parallel")
+    p.add_argument("--slab", type=int, default=32, help="Slices read at a time")
+    p.add_argument("--connectivity", type=int, choices=(1, 2, 3), default=3, help="3 = 26-connected components")
+    args = p.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] [%(levelname)s] %(message)s")
+
+    pairs = match_pairs(args.pred, args.labels, args.prefix)
+    if not pairs:
+        raise SystemExit(f"No (prediction, label) pairs found for: {args.pred} / {args.labels}")
+    logger.info(f"Cases to evaluate: {len(pairs)}")
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = [executor.submit(evaluate_pair, pred, label, args.slab, args.connectivity) for pred, label in pairs]
+        for (pred, _), future in zip(pairs, futures):
+            case = case_name(pred, args.prefix)
+            try:
+                rows.extend(dict(case=case, **r) for r in future.result())
+            except Exception as e:
+                logger.error(f"{case} => {e}")
+
+    if not rows:
+        raise SystemExit("No metrics computed")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", newline="") as fc:
+        writer = csv.DictWriter(fc, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+    for lbl in sorted({r["label"] for r in rows}):
+        dice = [r["dice"] for r in rows if r["label"] == lbl]
+        logger.info(f"Label {lbl} => mean Dice: {np.nanmean(dice):.4f} ({len(dice)} cases)")
+    print(f"✅ {len(pairs)} casos evaluados; métricas en: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
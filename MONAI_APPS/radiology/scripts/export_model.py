@@ -0,0 +1,107 @@
+"""
+Export the trained weld UNet (best_metric_model.pth) for CPU inspection stations.
+
+Writes a frozen TorchScript (<name>.ts) and/or ONNX (<name>.onnx) artifact next to the
+checkpoint (or in --output-dir) and checks them against the eager model: max absolute
+difference, argmax agreement and measured latency/speedup are saved in export_report.json.
+batch_infer.py and the DeepEditWeld infer task pick these artifacts up automatically.
+
+Example:
+    python scripts/export_model.py --model D:\\MONAI_MODELS\\best_metric_model.pth --sample D:\\MONAI_STUDIES\\case_001\\image.nii.gz
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.networks import (  # noqa: E402
+    export_onnx,
+    export_torchscript,
+    load_weld_model,
+    load_weld_unet,
+    parity_check,
+)
+from monai.transforms import CenterSpatialCrop, SpatialPad  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+def sample_input(path, roi_size):
+    """Center ROI of a real volume, preprocessed as in Annex A (more meaningful than random noise)."""
+    if not path:
+        return None
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from batch_infer import pre_transforms
+
+    image = pre_transforms()({"image": path})["image"]
+    image = SpatialPad(roi_size)(CenterSpatialCrop(roi_size)(image))
+    return image.as_tensor()[None].float()
+
+
+def main():
+    p = argparse.ArgumentParser(description="Export weld UNet to TorchScript/ONNX with parity check")
+    p.add_argument("--model", required=True, help="Trained weights (e.g. best_metric_model.pth)")
+    p.add_argument("--output-dir", default=None, help="Default: same folder as --model")
+    p.add_argument("--format", choices=("torchscript", "onnx", "all"), default="all")
+    p.add_argument("--roi-size", type=int, nargs=3, default=(64, 64, 64), help="Sliding window ROI")
+    p.add_argument("--sample", default=None, help="Volume used for the parity check (default: random input)")
+    p.add_argument("--batch-size", type=int, default=1, help="Batch size used for the latency benchmark")
+    p.add_argument("--repeats", type=int, default=10)
+    p.add_argument("--tolerance", type=float, default=1e-3, help="Max abs difference accepted vs eager")
+    args = p.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] [%(levelname)s] %(message)s")
+
+    output_dir = args.output_dir if args.output_dir else os.path.dirname(os.path.abspath(args.model))
+    os.makedirs(output_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(args.model))[0]
+
+    eager = load_weld_unet(args.model, device="cpu")
+    inputs = sample_input(args.sample, args.roi_size)
+    if inputs is not None and args.batch_size > 1:
+        inputs = inputs.repeat(args.batch_size, 1, 1, 1, 1)
+
+    exported = []
+    if args.format in ("torchscript", "all"):
+        exported.append(("torchscript", export_torchscript(eager, os.path.join(output_dir, f"{name}.ts"), args.roi_size)))
+    if args.format in ("onnx", "all"):
+        exported.append(("onnx", export_onnx(eager, os.path.join(output_dir, f"{name}.onnx"), args.roi_size)))
+
+    report = {"model": args.model, "roi_size": list(args.roi_size), "threads": torch.get_num_threads()}
+    failed = []
+    for runtime, path in exported:
+        try:
+            candidate = load_weld_model(path, device="cpu")
+        except Exception as e:
+            logger.warning(f"Could not load {runtime} artifact ({path}): {e}")
+            report[runtime] = {"path": path, "error": str(e)}
+            continue
+
+        result = parity_check(
+            eager, candidate, inputs=inputs, roi_size=args.roi_size, batch_size=args.batch_size, repeats=args.repeats
+        )
+        result["path"] = path
+        result["parity"] = result["max_abs_diff"] <= args.tolerance
+        report[runtime] = result
+        if not result["parity"]:
+            failed.append(runtime)
+
+    report_path = os.path.join(output_dir, f"{name}_export_report.json")
+    with open(report_path, "w") as fc:
+        json.dump(report, fc, indent=2)
+
+    print(json.dumps(report, indent=2))
+    if failed:
+        raise SystemExit(f"Parity check failed for: {failed} (tolerance: {args.tolerance})")
+    print(f"✅ Modelo exportado en: {output_dir}; reporte: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
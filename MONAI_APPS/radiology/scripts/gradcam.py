@@ -0,0 +1,96 @@
+"""
+Windowed Grad-CAM 3D (Annex B) for full resolution weld CT volumes.
+
+The CAM of the defect class is computed per sliding window ROI (same windowing as
+batch_infer.py) and blended with Gaussian weights, so memory does not grow with the
+volume size.  With --mask (segmentation written by batch_infer.py) only the windows
+containing predicted defects are explained.
+
+Example:
+    python scripts/gradcam.py --image D:\\MONAI_STUDIES\\case_001\\image.nii.gz \\
+        --model D:\\MONAI_MODELS\\best_metric_model.pth --mask D:\\MONAI_RESULTS\\lote_01\\image_seg.nii.gz \\
+        --output-dir D:\\MONAI_RESULTS\\xai
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from batch_infer import pre_transforms  # noqa: E402
+from lib.inferers import SlidingWindowGradCAM  # noqa: E402
+from lib.networks import WELD_CAM_LAYER, load_weld_unet  # noqa: E402
+from monai.data import decollate_batch, list_data_collate  # noqa: E402
+from monai.transforms import Compose, Invertd, SaveImaged  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Sliding-window Grad-CAM for weld CT volumes")
+    p.add_argument("--image", required=True, help="NIfTI volume")
+    p.add_argument("--model", required=True, help="Trained weights (e.g. best_metric_model.pth)")
+    p.add_argument("--output-dir", required=True)
+    p.add_argument("--mask", default=None, help="Predicted segmentation; only windows with defects are explained")
+    p.add_argument("--defect-only", action="store_true", help="Skip windows whose own prediction has no defect")
+    p.add_argument("--target-layer", default=WELD_CAM_LAYER)
+    p.add_argument("--class-idx", type=int, default=1)
+    p.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
+    p.add_argument("--roi-size", type=int, nargs=3, default=(64, 64, 64))
+    p.add_argument("--sw-batch-size", type=int, default=2)
+    p.add_argument("--overlap", type=float, default=0.25)
+    args = p.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] [%(levelname)s] %(message)s")
+
+    keys = ("image", "mask") if args.mask else ("image",)
+    pre = pre_transforms(keys)
+    batch = list_data_collate([pre({"image": args.image, "mask": args.mask} if args.mask else {"image": args.image})])
+
+    network = load_weld_unet(args.model, device=args.device)
+    engine = SlidingWindowGradCAM(
+        roi_size=args.roi_size,
+        target_layer=args.target_layer,
+        class_idx=args.class_idx,
+        sw_batch_size=args.sw_batch_size,
+        overlap=args.overlap,
+        defect_only=args.defect_only,
+        device="cpu",  # blended map is accumulated on CPU
+    )
+
+    start = time.time()
+    mask = batch["mask"].to(args.device) if args.mask else None
+    batch["cam"] = engine(batch["image"].to(args.device), network, mask=mask).cpu()
+    latency = time.time() - start
+
+    post = Compose(
+        [
+            Invertd(keys="cam", transform=pre, orig_keys="image", nearest_interp=False),
+            SaveImaged(
+                keys="cam",
+                output_dir=args.output_dir,
+                output_postfix="gradcam",
+                output_dtype=np.float32,
+                resample=False,
+                separate_folder=False,
+                print_log=False,
+            ),
+        ]
+    )
+    post(decollate_batch(batch)[0])
+
+    summary = dict(engine.stats, latency=round(latency, 3))
+    print(json.dumps(summary, indent=2))
+    print(f"✅ Mapa Grad-CAM guardado en: {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
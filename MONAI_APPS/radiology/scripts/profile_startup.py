@@ -0,0 +1,277 @@
+"""
+Cold start profiler of MONAI Label apps (radiology, endoscopy, pathology, ...): time of every import and of
+every MONAILabelApp init phase (app / model configs, datastore, infers, trainers, strategies, scoring, batch
+infer), then of the first ``info()`` (what the client asks first; lazy tasks must not be built there) and,
+with ``--first-infer``, of the first inference, each app in a fresh process.
+
+Imports are timed with a sys.meta_path hook (cumulative and self time per module, as ``python -X importtime``);
+the report lists the phases, the slowest modules and the self time per package.  ``--repeats`` runs every app
+several times (median).  With ``--baseline`` (an ``--output`` of a previous run) it is a regression benchmark:
+exits with an error if the total, the import, the first info() / infer or a phase got slower than ``--tolerance``
+(and ``--min-delta``).
+
+Example:
+    python scripts/profile_startup.py --app . --app ../sample-apps/endoscopy --app ../sample-apps/pathology \\
+        --conf models all --repeats 3 --output startup.json
+    python scripts/profile_startup.py --app . --conf models all --baseline startup.json
+    python scripts/profile_startup.py --app . --conf models deepedit_weld --first-infer deepedit_weld /data/weld.nii.gz
+"""
+
+import argparse
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PHASES = {
+    "datastore": "init_datastore",
+    "infers": "init_infers",
+    "trainers": "init_trainers",
+    "strategies": "init_strategies",
+    "scoring": "init_scoring_methods",
+    "batch_infer": "init_batch_infer",
+}
+
+# timed after the app is created (not part of the cold start total)
+FIRST_USE = ("first_info", "first_infer")
+
+
+class ImportTimer:
+    """sys.meta_path hook: wraps ``exec_module`` of every module loader to time it (cumulative and self)."""
+
+    def __init__(self):
+        self.modules = {}
+        self._stack = []
+
+    def install(self):
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        loader = spec.loader
+        # builtin/frozen importers are classes shared by every module
+        if loader is None or isinstance(loader, type) or not hasattr(loader, "exec_module"):
+            return spec
+        exec_module = loader.exec_module
+
+        def timed_exec_module(module):
+            self._stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                total = time.perf_counter() - start
+                children = self._stack.pop()
+                if self._stack:
+                    self._stack[-1] += total
+                self.modules[name] = (total, total - children)
+
+        loader.exec_module = timed_exec_module
+        return spec
+
+    def report(self, top):
+        rows = sorted(self.modules.items(), key=lambda kv: -kv[1][0])
+        packages = {}
+        for name, (_, own) in self.modules.items():
+            parts = name.split(".")
+            package = ".".join(parts[:2]) if parts[0] == "lib" else parts[0]
+            packages[package] = packages.get(package, 0.0) + own
+        return {
+            "modules": [[name, round(total, 4), round(own, 4)] for name, (total, own) in rows[:top]],
+            "packages": dict(sorted(((k, round(v, 4)) for k, v in packages.items()), key=lambda kv: -kv[1])[:top]),
+        }
+
+
+def profile_app(app_dir, studies, conf, top, first_infer=None):
+    """
+    Imports ``main`` of ``app_dir`` and creates its MyApp, timing the imports and the init phases, then the first
+    ``info()`` and (``first_infer`` = (model, image)) the first inference.
+    """
+    timer = ImportTimer()
+    timer.install()
+    sys.path.insert(0, app_dir)
+
+    start = time.perf_counter()
+    main = importlib.import_module("main")
+    import_time = time.perf_counter() - start
+
+    phases = {}
+    for phase, method in PHASES.items():
+        original = getattr(main.MyApp, method, None)
+        if original is None:
+            continue
+
+        def timed(self, *args, _original=original, _phase=phase, **kwargs):
+            begin = time.perf_counter()
+            try:
+                return _original(self, *args, **kwargs)
+            finally:
+                phases[_phase] = phases.get(_phase, 0.0) + time.perf_counter() - begin
+
+        setattr(main.MyApp, method, timed)
+
+    start = time.perf_counter()
+    app = main.MyApp(app_dir, studies, conf)
+    init_time = time.perf_counter() - start
+
+    # model configs, planner, ... of MyApp.__init__ before MONAILabelApp.__init__
+    phases["app"] = init_time - sum(phases.values())
+
+    # imports made by lazy tasks built on first use are part of the report too
+    start = time.perf_counter()
+    app.info()
+    report = {"first_info": time.perf_counter() - start}
+    if first_infer:
+        model, image = first_infer
+        start = time.perf_counter()
+        app.infer({"model": model, "image": image, "result_cache": False})
+        report["first_infer"] = time.perf_counter() - start
+    timer.uninstall()
+
+    return {
+        "import": import_time,
+        "init": init_time,
+        "total": import_time + init_time,
+        **report,
+        "phases": phases,
+        **timer.report(top),
+    }
+
+
+def run_child(app_dir, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "profile.json")
+        studies = args.studies or os.path.join(tmp, "studies")
+        os.makedirs(studies, exist_ok=True)
+        cmd = [sys.executable, os.path.abspath(__file__), "--child", app_dir, "--child-output", output]
+        cmd += ["--studies", studies, "--top", str(args.top)]
+        if args.first_infer:
+            cmd += ["--first-infer", args.first_infer[0], os.path.abspath(args.first_infer[1])]
+        for k, v in args.conf:
+            cmd += ["--conf", k, v]
+        result = subprocess.run(cmd, cwd=app_dir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if result.returncode or not os.path.exists(output):
+            print(f"\n=== {app_dir}: profiling failed\n{result.stderr[-2000:]}")
+            return None
+        with open(output) as fc:
+            return json.load(fc)
+
+
+def aggregate(runs):
+    """Median of the timings of several runs; import lists of the median run."""
+    median = statistics.median
+    report = {key: median(r[key] for r in runs) for key in FIRST_USE + ("import", "init", "total") if key in runs[0]}
+    phases = sorted({p for r in runs for p in r["phases"]})
+    report["phases"] = {p: median(r["phases"].get(p, 0.0) for r in runs) for p in phases}
+    middle = sorted(runs, key=lambda r: r["total"])[len(runs) // 2]
+    report.update({"modules": middle["modules"], "packages": middle["packages"], "runs": [r["total"] for r in runs]})
+    return report
+
+
+def print_report(name, report, top):
+    print(f"\n=== {name}: total {report['total']:.2f}s (import {report['import']:.2f}s; init {report['init']:.2f}s)")
+    for key in FIRST_USE:
+        if key in report:
+            print(f"  {key.replace('_', ' ')}: {report[key]:.3f}s")
+    print("  Phases:")
+    for phase, seconds in sorted(report["phases"].items(), key=lambda kv: -kv[1]):
+        print(f"    {phase:<14} {seconds:8.3f}s")
+    print(f"  Slowest imports (cumulative / self, top {top}):")
+    for module, total, own in report["modules"][:top]:
+        print(f"    {total:8.3f}s {own:8.3f}s  {module}")
+    print("  Self import time per package:")
+    for package, seconds in list(report["packages"].items())[:top]:
+        print(f"    {seconds:8.3f}s  {package}")
+
+
+def regressions(report, baseline, tolerance, min_delta):
+    keys = ("total", "import", "init") + tuple(k for k in FIRST_USE if k in report and k in baseline)
+    checks = {key: (report[key], baseline[key]) for key in keys}
+    for phase, seconds in report["phases"].items():
+        checks[f"phase:{phase}"] = (seconds, baseline["phases"].get(phase, 0.0))
+    return [
+        f"{key}: {now:.3f}s vs {before:.3f}s"
+        for key, (now, before) in checks.items()
+        if now - before > max(min_delta, tolerance * before)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start profiler / benchmark of MONAI Label apps")
+    parser.add_argument("--app", action="append", default=[], help="app folder (with main.py); repeatable")
+    parser.add_argument("--studies", default=None, help="datastore folder (default: empty temporary folder)")
+    parser.add_argument("--conf", nargs=2, action="append", default=[], metavar=("KEY", "VALUE"))
+    parser.add_argument("--repeats", type=int, default=1, help="fresh processes per app (median)")
+    parser.add_argument("--top", type=int, default=20, help="modules / packages listed")
+    parser.add_argument(
+        "--first-infer", nargs=2, default=None, metavar=("MODEL", "IMAGE"), help="also time a first inference"
+    )
+    parser.add_argument("--output", default=None, help="JSON report")
+    parser.add_argument("--baseline", default=None, help="JSON report of a previous run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (fraction)")
+    parser.add_argument("--min-delta", type=float, default=0.2, help="slowdowns below these seconds are ignored")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--child-output", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        report = profile_app(os.path.abspath(args.child), args.studies, dict(args.conf), args.top, args.first_infer)
+        with open(args.child_output, "w") as fc:
+            json.dump(report, fc)
+        return
+
+    apps = args.app or [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))]
+    reports, failed_apps = {}, []
+    for app in apps:
+        app_dir = os.path.abspath(app)
+        name = os.path.basename(app_dir.rstrip(os.sep))
+        runs = []
+        for _ in range(max(1, args.repeats)):
+            runs.append(run_child(app_dir, args))
+            if runs[-1] is None:
+                failed_apps.append(name)
+                break
+        else:
+            reports[name] = aggregate(runs)
+            print_report(name, reports[name], args.top)
+
+    if args.output:
+        with open(args.output, "w") as fc:
+            json.dump(reports, fc, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fc:
+            baseline = json.load(fc)
+        failed = {
+            name: regressions(report, baseline[name], args.tolerance, args.min_delta)
+            for name, report in reports.items()
+            if name in baseline
+        }
+        failed = {k: v for k, v in failed.items() if v}
+        if failed:
+            raise SystemExit(f"Cold start regression vs {args.baseline}: {json.dumps(failed, indent=2)}")
+        print(f"\nSin regresiones respecto a {args.baseline}")
+
+    if failed_apps:
+        raise SystemExit(f"Profiling failed for: {failed_apps}")
+    print("✅ Perfil de arranque completado")
+
+
+if __name__ == "__main__":
+    main()
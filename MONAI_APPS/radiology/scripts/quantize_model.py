@@ -0,0 +1,186 @@
+"""
+Post-training int8 quantization (ONNX Runtime, calibration based) for the weld UNet (Annex A)
+and the radiology SegResNet (lib/configs/segmentation.py).
+
+A few MONAI_STUDIES volumes are used as calibration set; the int8 model is written next to the
+checkpoint (<name>.int8.onnx) and compared against the fp32 model: Dice on labelled volumes
+(<image>.nii.gz + <image>_label.nii.gz, e.g. MONAI_STUDIES2), latency and model size.
+Serve it with ``runtime=int8`` (infer task config, batch_infer.py --runtime int8).
+
+Example:
+    python scripts/quantize_model.py --network weld --model D:\\MONAI_MODELS\\best_metric_model.pth \\
+        --calibration D:\\MONAI_STUDIES --eval D:\\MONAI_STUDIES2
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from glob import glob
+
+import numpy as np
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from batch_infer import pre_transforms, read_manifest  # noqa: E402
+from lib.networks import (  # noqa: E402
+    OnnxRuntimeNetwork,
+    calibration_rois,
+    int8_path,
+    load_checkpoint,
+    parity_check,
+    quantize_network,
+    weld_unet,
+)
+from monai.data import decollate_batch, list_data_collate  # noqa: E402
+from monai.inferers import SlidingWindowInferer  # noqa: E402
+from monai.metrics import compute_dice  # noqa: E402
+from monai.networks.utils import one_hot  # noqa: E402
+from monai.transforms import AsDiscreted, Compose, EnsureChannelFirstd, Invertd, LoadImaged  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+LABEL_SUFFIX = "_label"
+
+
+def weld_spec(args):
+    roi_size = tuple(args.roi_size) if args.roi_size else (64, 64, 64)
+    return {
+        "network": weld_unet(),
+        "roi_size": roi_size,
+        "pre": pre_transforms(),
+        "inferer": SlidingWindowInferer(roi_size=roi_size, sw_batch_size=4, overlap=0.25, mode="gaussian"),
+        "num_classes": 2,
+    }
+
+
+def segmentation_spec(args):
+    # Same network/preprocessing as the Segmentation TaskConfig (no pretrained download)
+    from lib.configs.segmentation import Segmentation
+
+    config = Segmentation()
+    config.init("segmentation", os.path.dirname(os.path.abspath(args.model)), {"use_pretrained_model": "false"}, None)
+    if args.roi_size:
+        config.roi_size = tuple(args.roi_size)
+    task = config.infer()
+    return {
+        "network": config.network,
+        "roi_size": config.roi_size,
+        "pre": Compose(task.pre_transforms()),
+        "inferer": task.inferer(),
+        "num_classes": len(config.labels) + 1,
+    }
+
+
+def eval_pairs(path):
+    labels = sorted(glob(os.path.join(path, f"*{LABEL_SUFFIX}.nii*")))
+    pairs = []
+    for label in labels:
+        image = os.path.join(os.path.dirname(label), os.path.basename(label).replace(LABEL_SUFFIX, ""))
+        if os.path.exists(image):
+            pairs.append((image, label))
+    return pairs
+
+
+def dice(spec, network, image, label):
+    pre = spec["pre"]
+    batch = list_data_collate([pre({"image": image})])
+    with torch.no_grad():
+        batch["pred"] = spec["inferer"](batch["image"], network)
+
+    post = Compose(
+        [
+            AsDiscreted(keys="pred", argmax=True),
+            Invertd(keys="pred", transform=pre, orig_keys="image", nearest_interp=True),
+        ]
+    )
+    pred = post(decollate_batch(batch)[0])["pred"]
+    y = Compose([LoadImaged(keys="label", image_only=True), EnsureChannelFirstd(keys="label")])({"label": label})["label"]
+
+    n = spec["num_classes"]
+    score = compute_dice(one_hot(pred[None].long(), n), one_hot(y[None].long(), n), include_background=False)
+    return float(np.nanmean(score.cpu().numpy()))
+
+
+def main():
+    p = argparse.ArgumentParser(description="Post-training int8 quantization with Dice check")
+    p.add_argument("--network", choices=("weld", "segmentation"), default="weld")
+    p.add_argument("--model", required=True, help="fp32 checkpoint (best_metric_model.pth / segmentation.pt)")
+    p.add_argument("--output", default=None, help="Default: <model>.int8.onnx")
+    p.add_argument("--calibration", required=True, help="Calibration volumes: folder (e.g. MONAI_STUDIES) or manifest")
+    p.add_argument("--num-calibration", type=int, default=8, help="Number of calibration volumes")
+    p.add_argument("--samples-per-volume", type=int, default=4, help="ROIs sampled per calibration volume")
+    p.add_argument("--eval", default=None, help="Folder with <name>.nii.gz + <name>_label.nii.gz (e.g. MONAI_STUDIES2)")
+    p.add_argument("--roi-size", type=int, nargs=3, default=None)
+    p.add_argument("--op-types", nargs="+", default=["Conv"], help="ONNX ops to quantize")
+    p.add_argument("--calibrate-method", choices=("MinMax", "Entropy", "Percentile"), default="MinMax")
+    p.add_argument("--max-dice-drop", type=float, default=0.01, help="Fail if fp32 - int8 mean Dice is larger")
+    p.add_argument("--repeats", type=int, default=10)
+    args = p.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] [%(levelname)s] %(message)s")
+
+    spec = weld_spec(args) if args.network == "weld" else segmentation_spec(args)
+    fp32 = load_checkpoint(spec["network"], args.model, device="cpu", strict=False)
+
+    volumes = read_manifest(args.calibration)[: args.num_calibration]
+    if not volumes:
+        raise SystemExit(f"No calibration volumes found in: {args.calibration}")
+    logger.info(f"Calibration volumes: {len(volumes)}")
+    images = (spec["pre"]({"image": v})["image"] for v in volumes)
+    rois = calibration_rois(images, spec["roi_size"], args.samples_per_volume)
+
+    output = args.output if args.output else int8_path(args.model)
+    quantize_network(
+        fp32, output, rois, spec["roi_size"], op_types=args.op_types, calibrate_method=args.calibrate_method
+    )
+    int8 = OnnxRuntimeNetwork(output)
+
+    fp32_bytes = sum(t.numel() * t.element_size() for t in fp32.state_dict().values())
+    report = {
+        "network": args.network,
+        "model": args.model,
+        "int8": output,
+        "calibration": volumes,
+        "calibration_windows": len(rois),
+        "size_mb": {"fp32": round(fp32_bytes / 2**20, 2), "int8": round(os.path.getsize(output) / 2**20, 2)},
+        "latency": parity_check(fp32, int8, inputs=torch.from_numpy(rois[0]), repeats=args.repeats),
+        "threads": torch.get_num_threads(),
+    }
+
+    failed = False
+    if args.eval:
+        rows = []
+        for image, label in eval_pairs(args.eval):
+            row = {"image": image, "fp32": dice(spec, fp32, image, label), "int8": dice(spec, int8, image, label)}
+            row["drop"] = row["fp32"] - row["int8"]
+            rows.append(row)
+            logger.info(f"{image} => dice fp32: {row['fp32']:.4f}; int8: {row['int8']:.4f}")
+
+        if rows:
+            drop = float(np.nanmean([r["drop"] for r in rows]))
+            report["dice"] = {
+                "fp32": float(np.nanmean([r["fp32"] for r in rows])),
+                "int8": float(np.nanmean([r["int8"] for r in rows])),
+                "drop": drop,
+                "volumes": rows,
+            }
+            failed = drop > args.max_dice_drop
+        else:
+            logger.warning(f"No <name>{LABEL_SUFFIX}.nii.gz pairs found in: {args.eval}")
+
+    report_path = os.path.splitext(output)[0] + "_report.json"
+    with open(report_path, "w") as fc:
+        json.dump(report, fc, indent=2)
+
+    print(json.dumps({k: v for k, v in report.items() if k != "calibration"}, indent=2))
+    if failed:
+        raise SystemExit(f"Dice drop {report['dice']['drop']:.4f} is above --max-dice-drop {args.max_dice_drop}")
+    print(f"✅ Modelo int8 en: {output}; reporte: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
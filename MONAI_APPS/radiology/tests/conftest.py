@@ -0,0 +1,44 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+
+import nibabel as nib
+import numpy as np
+import pytest
+
+# the app is imported as ``lib`` (as monailabel does when it loads main.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def save_nifti(tmp_path):
+    """Saves an array as NIfTI in the test folder and returns its path."""
+
+    def save(array, name, spacing=(1.0, 1.0, 1.0)):
+        path = str(tmp_path / name)
+        nib.save(nib.Nifti1Image(array, np.diag([*spacing, 1.0])), path)
+        return path
+
+    return save
+
+
+def random_blobs(shape, labels=2, blobs=6, seed=0):
+    """Label map with a few random boxes per label (several components, some touching the border)."""
+    rng = np.random.default_rng(seed)
+    out = np.zeros(shape, dtype=np.uint8)
+    for lbl in range(1, labels + 1):
+        for _ in range(blobs):
+            size = rng.integers(2, max(3, min(shape) // 3), 3)
+            start = [rng.integers(0, s - 1) for s in shape]
+            out[tuple(slice(a, a + b) for a, b in zip(start, size))] = lbl
+    return out
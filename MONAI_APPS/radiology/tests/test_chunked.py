@@ -0,0 +1,101 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+import torch
+from conftest import random_blobs
+from monai.transforms import LoadImaged
+
+pytest.importorskip("zarr", "3")
+
+from lib.datastore import ChunkedVolume, LoadChunkedd, chunked_path, write_chunked  # noqa: E402
+from lib.datastore.chunked import downsample  # noqa: E402
+
+SPACING = (0.8, 0.6, 1.2)
+
+
+@pytest.fixture
+def image(save_nifti):
+    array = np.random.default_rng(5).integers(0, 3000, (45, 38, 29)).astype(np.int16)
+    return array, save_nifti(array, "case.nii.gz", SPACING)
+
+
+def test_chunked_path():
+    assert chunked_path("/data/case_001/image.nii.gz") == "/data/case_001/image.zarr"
+    assert chunked_path("weld.nii") == "weld.zarr"
+
+
+def test_round_trip(image):
+    array, path = image
+    store = write_chunked(path, chunks=(16, 16, 8), levels=3)
+    assert store == chunked_path(path)
+
+    volume = ChunkedVolume(store)
+    data, affine = volume.read()
+    assert data.dtype == array.dtype
+    np.testing.assert_array_equal(data, array)
+    np.testing.assert_allclose(affine, np.diag([*SPACING, 1.0]))
+
+    # level k is the block mean of level k - 1 (edge padded), with centered voxels
+    previous = array
+    for k in (1, 2):
+        data, affine = volume.read(level=k)
+        np.testing.assert_array_equal(data, downsample(previous))
+        np.testing.assert_allclose(np.diag(affine)[:3], np.asarray(SPACING) * 2**k)
+        np.testing.assert_allclose(affine[:3, 3], np.asarray(SPACING) * (2**k - 1) / 2)
+        previous = data
+    assert volume.level_for_spacing([2.5, 2.5, 2.5]) == 1
+
+
+def test_read_box(image):
+    array, path = image
+    volume = ChunkedVolume(write_chunked(path, chunks=(16, 16, 8), levels=2))
+    box = [[5, 17, 3], [30, 38, 20]]
+    data, affine = volume.read(box)
+    np.testing.assert_array_equal(data, array[5:30, 17:38, 3:20])
+    np.testing.assert_allclose(affine[:3, 3], np.multiply(box[0], SPACING))
+
+    # level 1: the box is widened to whole level voxels
+    data, affine = volume.read(box, level=1)
+    np.testing.assert_array_equal(data, volume.read(level=1)[0][2:15, 8:19, 1:10])
+
+
+def test_label_levels_are_nearest(save_nifti):
+    label = random_blobs((33, 30, 20), labels=3, seed=6)
+    store = write_chunked(save_nifti(label, "case_label.nii.gz", SPACING), chunks=(8, 8, 8), label=True)
+    data, affine = ChunkedVolume(store).read(level=1)
+    np.testing.assert_array_equal(data, label[::2, ::2, ::2])
+    np.testing.assert_allclose(affine[:3, 3], 0.0)
+
+
+def test_load_chunked_matches_load_image(image):
+    array, path = image
+    reference = LoadImaged(keys="image", image_only=True)({"image": path})["image"]
+
+    # no store yet: LoadImaged fallback
+    loader = LoadChunkedd(keys="image")
+    fallback = loader({"image": path})["image"]
+    torch.testing.assert_close(fallback.as_tensor(), reference.as_tensor())
+
+    write_chunked(path, chunks=(16, 16, 8))
+    loaded = loader({"image": path})["image"]
+    assert loaded.meta["filename_or_obj"] == path and loaded.meta["level"] == 0
+    np.testing.assert_array_equal(loaded.numpy(), reference.numpy())
+    torch.testing.assert_close(loaded.affine, reference.affine)
+
+    # the region affine is the image affine; original_affine stays the one of the whole volume
+    roi = loader({"image": path, "roi": [[4, 4, 4], [20, 12, 28]]})["image"]
+    np.testing.assert_array_equal(roi.numpy(), array[4:20, 4:12, 4:28])
+    torch.testing.assert_close(roi.affine[:3, 3], torch.tensor(np.multiply(4, SPACING)), check_dtype=False)
+    np.testing.assert_allclose(roi.meta["original_affine"], reference.meta["original_affine"])
+    coarse = loader({"image": path, "roi": [[4, 4, 4], [20, 12, 28]], "level": 1})["image"]
+    np.testing.assert_allclose(coarse.meta["original_affine"], reference.meta["original_affine"])
@@ -0,0 +1,148 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+import pytest
+import torch
+from lib.inferers import IncrementalSlidingWindowInferer, InferenceScheduler, MicroBatcher
+from monai.inferers import SlidingWindowInferer
+
+
+class Counted(torch.nn.Module):
+    """Small conv net counting the windows it runs on."""
+
+    def __init__(self):
+        super().__init__()
+        torch.manual_seed(0)
+        self.conv = torch.nn.Conv3d(1, 2, 3, padding=1)
+        self.windows = 0
+
+    def forward(self, x):
+        self.windows += x.shape[0]
+        return self.conv(x)
+
+
+@pytest.mark.parametrize("shape", [(40, 36, 30), (12, 40, 20)])
+@torch.no_grad()
+def test_incremental_matches_sliding_window(shape):
+    params = {"roi_size": (16, 16, 16), "sw_batch_size": 3, "overlap": 0.25, "mode": "gaussian"}
+    network = Counted()
+    image = torch.rand(1, 1, *shape)
+
+    windows = {}
+    expected = SlidingWindowInferer(**params)(image, network)
+    network.windows = 0
+    first = IncrementalSlidingWindowInferer(windows=windows, **params)
+    torch.testing.assert_close(first(image, network), expected)
+    total = first.stats["windows"]
+    assert first.stats["computed"] == total == len(windows) == network.windows
+
+    # a click changes a small box: only the windows reading it run again
+    box = ([5, 6, 7], [8, 9, 10])
+    image[(0, 0, *[slice(s, e) for s, e in zip(*box)])] += 1.0
+    expected = SlidingWindowInferer(**params)(image, network)
+    network.windows = 0
+    second = IncrementalSlidingWindowInferer(windows=windows, changed=[box], **params)
+    torch.testing.assert_close(second(image, network), expected)
+    assert second.stats["windows"] == total
+    assert 0 < second.stats["computed"] == network.windows < total
+
+    # nothing changed: no forward at all
+    network.windows = 0
+    third = IncrementalSlidingWindowInferer(windows=windows, changed=[], **params)
+    third(image, network)
+    assert third.stats["computed"] == network.windows == 0
+
+
+class Gated:
+    """Network blocked on its first forward until ``gate`` is set (the next calls queue meanwhile)."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.batches = []
+
+    def __call__(self, x):
+        self.batches.append(x.shape[0])
+        self.gate.wait(10)
+        return {"pred": x * 2, "sum": x.flatten(1).sum(1)}
+
+
+def wait_for(condition, timeout=10):
+    end = time.time() + timeout
+    while not condition() and time.time() < end:
+        time.sleep(0.005)
+    assert condition()
+
+
+@torch.no_grad()
+def test_micro_batcher_coalesces_and_slices():
+    network = Gated()
+    batcher = MicroBatcher(network, max_batch=5, max_wait_ms=1000)
+    inputs = [torch.rand(n, 1, *shape) for n, shape in [(1, (4, 4, 4)), (2, (4, 4, 4)), (3, (4, 4, 4)), (1, (2, 4, 4))]]
+    futures = [batcher.submit(inputs[0])]
+    wait_for(lambda: network.batches)
+    futures += [batcher.submit(x) for x in inputs[1:]]
+    network.gate.set()
+
+    for x, future in zip(inputs, futures):
+        out = future.result(10)
+        torch.testing.assert_close(out["pred"], x * 2)
+        torch.testing.assert_close(out["sum"], x.flatten(1).sum(1))
+    # same window shape within max_batch in one forward; another shape on its own
+    assert network.batches == [1, 5, 1]
+    assert batcher.stats()["calls"] == 4 and batcher.windows == 7 and batcher.shared_batches == 0
+
+    # a single request is never delayed by max_wait
+    start = time.perf_counter()
+    batcher(torch.rand(1, 1, 4, 4, 4))
+    assert time.perf_counter() - start < 0.5
+    batcher.close()
+
+
+def test_micro_batcher_shares_batches_between_requests():
+    network = Gated()
+    scheduler = InferenceScheduler(max_batch=16, max_wait_ms=3000)
+    batcher = scheduler.network(network)
+    assert scheduler.network(network) is batcher
+    assert scheduler.network(network, {"coalesce": "false"}) is network
+    results = {}
+
+    def request(i):
+        with torch.no_grad(), scheduler.track("weld"):
+            results[i] = batcher(torch.full((2, 1, 4, 4, 4), float(i)))["pred"]
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(3)]
+    threads[0].start()
+    wait_for(lambda: network.batches)
+    for t in threads[1:]:
+        t.start()
+    wait_for(lambda: batcher.depth == 2)
+    start = time.perf_counter()
+    network.gate.set()
+    for t in threads:
+        t.join(10)
+
+    # the two queued requests share a forward, without waiting max_wait for the finished one
+    assert network.batches == [2, 4] and batcher.shared_batches == 1
+    assert time.perf_counter() - start < 2
+    for i in range(3):
+        torch.testing.assert_close(results[i], torch.full((2, 1, 4, 4, 4), 2.0 * i))
+    metrics = scheduler.metrics()["models"]["weld"]
+    assert metrics["requests"] == 3 and metrics["queue_depth"] == 0
+
+    # requests ended: a new one runs alone at once
+    start = time.perf_counter()
+    with torch.no_grad(), scheduler.track("weld"):
+        batcher(torch.rand(1, 1, 4, 4, 4))
+    assert time.perf_counter() - start < 2
+    batcher.close()
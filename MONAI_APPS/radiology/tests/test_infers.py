@@ -0,0 +1,95 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+import torch
+from lib.infers.deepgrow_pipeline import InferDeepgrowPipeline
+from scipy import ndimage
+
+from monailabel.transform.post import LargestCCd
+
+
+def slice_label(slices=12, size=48, seed=0):
+    """(slices, H, W) label: a few boxes per slice, an empty slice, a sparse one and a tie between components."""
+    rng = np.random.default_rng(seed)
+    out = np.zeros((slices, size, size), dtype=np.uint8)
+    for z in range(3, slices):
+        for _ in range(rng.integers(1, 4)):
+            h, w = rng.integers(2, size // 2, 2)
+            y, x = rng.integers(0, size - 2, 2)
+            out[z, y : y + h, x : x + w] = 1
+    out[1, 5:7, 5:8] = 1  # 6 voxels: below min_point_density
+    out[2, 4:10, 4:10] = 1  # two components of the same size
+    out[2, 20:26, 20:26] = 1
+    return out
+
+
+def deepgrow_pipeline(**kwargs):
+    return InferDeepgrowPipeline(path=None, model_3d=None, **kwargs)
+
+
+@pytest.mark.parametrize("random_point_density", [20, 1000])
+def test_slices_points_match_largest_cc(random_point_density):
+    task = deepgrow_pipeline(min_point_density=10, max_random_points=4, random_point_density=random_point_density)
+    label = slice_label()
+    largest = LargestCCd.get_largest_cc(label)
+    sizes = largest.reshape(len(largest), -1).sum(1)
+
+    np.random.seed(0)
+    points, slices = task.get_slices_points(label, [])
+    assert slices == [z for z in range(len(label)) if sizes[z] >= 10]
+    assert 0 not in slices and 1 not in slices and 2 in slices
+
+    # grouped by slice: the seed, then min(max_random_points, size // random_point_density) random points
+    points = np.array(points)
+    assert (np.diff(points[:, 2]) >= 0).all()
+    for z in slices:
+        on_slice = points[points[:, 2] == z]
+        assert len(on_slice) == 1 + min(4, sizes[z] // random_point_density)
+        assert largest[z, on_slice[:, 0], on_slice[:, 1]].all()
+
+    # ties: the lowest component in raster order, as LargestCCd
+    assert (points[points[:, 2] == 2][:, :2] < 10).all()
+
+
+def test_slices_points_inputs():
+    task = deepgrow_pipeline(min_point_density=10, random_point_density=20)
+    label = slice_label(seed=1)
+
+    np.random.seed(3)
+    points, slices = task.get_slices_points(label, [])
+    np.random.seed(3)
+    assert task.get_slices_points(torch.as_tensor(label), []) == (points, slices)
+
+    # initial foreground points come first and their slices count too
+    np.random.seed(3)
+    with_initial, initial_slices = task.get_slices_points(label, [[6, 6, 1]])
+    assert with_initial == [[6, 6, 1]] + points and initial_slices == sorted(slices + [1])
+
+    assert task.get_slices_points(np.zeros((4, 16, 16)), []) == ([], [])
+
+
+def test_slices_points_seed_distribution():
+    # the seed is drawn with probability exp(distance) - 1 (chessboard distance to the border), per slice
+    task = deepgrow_pipeline(min_point_density=10, random_point_density=1000)
+    label = np.zeros((600, 15, 15), dtype=np.uint8)
+    label[:, 3:12, 3:12] = 1
+
+    np.random.seed(0)
+    points, slices = task.get_slices_points(label, [])
+    assert len(points) == len(slices) == len(label)
+
+    distance = ndimage.distance_transform_cdt(label[0], metric="chessboard")
+    weights = np.exp(distance) - 1.0
+    expected = (weights * distance).sum() / weights.sum()
+    drawn = np.array([distance[x, y] for x, y, _ in points])
+    assert drawn.min() >= 1 and abs(drawn.mean() - expected) < 0.1
@@ -0,0 +1,97 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+import torch
+from conftest import random_blobs
+from lib.metrics import evaluate_pair
+from monai.metrics import (
+    compute_average_surface_distance,
+    compute_dice,
+    compute_hausdorff_distance,
+    compute_iou,
+)
+from scipy import ndimage
+
+
+def one_hot(array, label):
+    return torch.as_tensor(array == label)[None, None].float()
+
+
+def reference(pred, label, lbl, spacing):
+    """MONAI metrics on the whole volumes (float, in memory)."""
+    p, g = one_hot(pred, lbl), one_hot(label, lbl)
+    return {
+        "dice": float(compute_dice(p, g)),
+        "iou": float(compute_iou(p, g)),
+        "hd95": float(compute_hausdorff_distance(p, g, percentile=95, spacing=spacing)),
+        "assd": float(compute_average_surface_distance(p, g, symmetric=True, spacing=spacing)),
+    }
+
+
+@pytest.mark.parametrize("slab", [1, 7, 32])
+@pytest.mark.parametrize("spacing", [(1.0, 1.0, 1.0), (0.5, 0.8, 2.0)])
+def test_evaluate_pair_matches_monai(save_nifti, slab, spacing):
+    label = random_blobs((40, 36, 30), seed=1)
+    pred = random_blobs((40, 36, 30), seed=2)
+    pred[label == 2] = 2  # a partly right label 2
+    rows = evaluate_pair(save_nifti(pred, "pred.nii.gz", spacing), save_nifti(label, "label.nii", spacing), slab)
+
+    assert [r["label"] for r in rows] == [1, 2]
+    voxel_mm3 = float(np.prod(spacing))
+    for row in rows:
+        lbl = row["label"]
+        expected = reference(pred, label, lbl, spacing)
+        for key, value in expected.items():
+            assert row[key] == pytest.approx(value, rel=1e-5), key
+        assert row["pred_mm3"] == pytest.approx((pred == lbl).sum() * voxel_mm3)
+        assert row["volume_diff_mm3"] == pytest.approx(((pred == lbl).sum() - (label == lbl).sum()) * voxel_mm3)
+
+
+def test_evaluate_pair_components(save_nifti):
+    label = np.zeros((20, 20, 20), dtype=np.uint8)
+    label[2:5, 2:5, 2:5] = 1  # detected
+    label[10:12, 10:12, 10:12] = 1  # missed
+    label[15:18, 2:4, 2:4] = 1  # detected
+    pred = np.zeros_like(label)
+    pred[3:6, 3:6, 3:6] = 1
+    pred[15, 2, 2] = 1
+    pred[2:4, 15:18, 15:18] = 1  # false positive
+
+    (row,) = evaluate_pair(save_nifti(pred, "pred.nii"), save_nifti(label, "label.nii"), slab=4)
+    assert row["label_components"] == ndimage.label(label)[1] == 3
+    assert row["detected_components"] == 2
+    assert row["detection_rate"] == pytest.approx(2 / 3)
+    assert row["pred_components"] == 3
+    assert row["false_positive_components"] == 1
+
+
+def test_evaluate_pair_native_dtype_and_missing_label(save_nifti):
+    label = np.zeros((16, 16, 16), dtype=np.int16)
+    label[4:8, 4:8, 4:8] = 3
+    pred = label.astype(np.float32)
+    pred[10:12, 10:12, 10:12] = 1  # label only predicted
+
+    rows = {r["label"]: r for r in evaluate_pair(save_nifti(pred, "pred.nii"), save_nifti(label, "label.nii"))}
+    assert sorted(rows) == [1, 3]
+    assert rows[3]["dice"] == rows[3]["iou"] == 1.0
+    assert rows[3]["hd95"] == rows[3]["assd"] == 0.0
+    assert rows[1]["dice"] == 0.0
+    assert np.isnan(rows[1]["hd95"]) and np.isnan(rows[1]["volume_diff_rel"])
+    assert rows[1]["label_components"] == 0 and rows[1]["false_positive_components"] == 1
+
+
+def test_evaluate_pair_shape_mismatch(save_nifti):
+    a = save_nifti(np.zeros((8, 8, 8), dtype=np.uint8), "a.nii")
+    b = save_nifti(np.zeros((8, 8, 9), dtype=np.uint8), "b.nii")
+    with pytest.raises(ValueError, match="Shape mismatch"):
+        evaluate_pair(a, b)
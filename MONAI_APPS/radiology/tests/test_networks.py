@@ -0,0 +1,146 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+import pytest
+import torch
+from lib.networks import ModelPool, export_onnx, export_torchscript, load_weld_model, parity_check, pooled_network
+from lib.networks.weld import weld_unet
+
+
+class Loader:
+    """Counts the loads; each load is a new linear layer of ``size`` x ``size`` float32 weights (+ bias)."""
+
+    def __init__(self, size=256, delay=0.0):
+        self.size = size
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return torch.nn.Linear(self.size, self.size)
+
+
+class Task:
+    """The parts of a ``BasicInferTask`` used by ``pooled_network``."""
+
+    def __init__(self, path, network):
+        self.path = [path]
+        self.network = network
+        self._config = {}
+        self.model_state_dict = "model"
+        self.load_strict = True
+
+    def get_path(self):
+        return self.path[0]
+
+
+def test_model_pool_loads_once_and_reloads(tmp_path):
+    pool = ModelPool()
+    path = tmp_path / "weld.pt"
+    path.write_bytes(b"v1")
+    loader = Loader(delay=0.2)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.get("weld", loader, str(path)))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    assert loader.calls == 1 and all(r is results[0] for r in results)
+    assert pool.get("weld", loader, str(path)) is results[0]
+    assert pool.stats()["misses"] == 1 and pool.stats()["hits"] == 1  # the threads waiting on the load are not hits
+
+    # a new model published on the same path replaces the pooled one
+    path.write_bytes(b"v2 model")
+    reloaded = pool.get("weld", loader, str(path))
+    assert reloaded is not results[0] and loader.calls == 2
+    assert pool.stats()["models"] == 1 and pool.nbytes == (256 * 256 + 256) * 4
+
+
+def test_model_pool_evicts_least_recently_used():
+    nbytes = (256 * 256 + 256) * 4
+    pool = ModelPool(budget_mb=2.5 * nbytes / 2**20)  # room for two networks
+    loaders = {k: Loader() for k in "abc"}
+    a = pool.get("a", loaders["a"])
+    pool.get("b", loaders["b"])
+    assert pool.get("a", loaders["a"]) is a  # b is now the least recently used
+    pool.get("c", loaders["c"])
+    assert pool.stats()["models"] == 2 and pool.stats()["evictions"] == 1
+
+    pool.get("b", loaders["b"])
+    assert loaders["b"].calls == 2 and loaders["a"].calls == 1  # b again, a evicted this time
+    assert pool.get("c", loaders["c"]) is not None and loaders["c"].calls == 1
+
+    # the network just loaded is kept even over budget
+    big = pool.get("big", Loader(size=1024))
+    assert pool.stats()["models"] == 1 and pool.get("big", Loader()) is big
+
+    pool.evict("big")
+    assert pool.stats()["models"] == 0 and pool.nbytes == 0
+
+
+def test_pooled_network_shared_by_tasks(tmp_path):
+    torch.manual_seed(0)
+    path = str(tmp_path / "weld.pt")
+    torch.save({"model": torch.nn.Linear(8, 2).state_dict()}, path)
+    pool = ModelPool()
+
+    first = pooled_network(Task(path, torch.nn.Linear(8, 2)), "cpu", pool=pool)
+    assert not first.training and torch.equal(first.weight, torch.load(path)["model"]["weight"])
+    assert pooled_network(Task(path, torch.nn.Linear(8, 2)), "cpu", pool=pool) is first
+
+    # another architecture on the same checkpoint is not shared
+    task = Task(path, torch.nn.Linear(8, 2, bias=False))
+    task.load_strict = False
+    other = pooled_network(task, "cpu", pool=pool)
+    assert other is not first and pool.stats()["models"] == 2
+    assert pooled_network(Task(None, torch.nn.Linear(8, 2)), "cpu", pool=pool) is None
+
+
+@pytest.fixture
+def weld_checkpoint(tmp_path):
+    torch.manual_seed(0)
+    network = weld_unet()
+    path = str(tmp_path / "weld.pth")
+    torch.save(network.state_dict(), path)
+    return network.eval(), path
+
+
+def test_torchscript_parity(weld_checkpoint):
+    network, path = weld_checkpoint
+    assert isinstance(load_weld_model(path, runtime="torchscript"), torch.nn.Module)  # no artifact: eager
+
+    export_torchscript(network, path.replace(".pth", ".ts"), roi_size=(32, 32, 32))
+    served = load_weld_model(path)
+    assert isinstance(served, torch.jit.ScriptModule)
+
+    # a batch of sliding window ROIs
+    report = parity_check(network, served, torch.rand(3, 1, 32, 32, 32), repeats=1)
+    assert report["max_abs_diff"] < 1e-4 and report["argmax_agreement"] > 0.999
+
+
+def test_onnx_parity(weld_checkpoint):
+    pytest.importorskip("onnxruntime")
+    network, path = weld_checkpoint
+    export_torchscript(network, path.replace(".pth", ".ts"), roi_size=(32, 32, 32))
+    export_onnx(network, path.replace(".pth", ".onnx"), roi_size=(32, 32, 32))
+
+    served = load_weld_model(path)  # preferred over TorchScript on CPU
+    assert served.path.endswith(".onnx")
+    assert not isinstance(load_weld_model(path, runtime="eager"), torch.jit.ScriptModule)
+
+    # dynamic batch axis
+    report = parity_check(network, served, torch.rand(3, 1, 32, 32, 32), repeats=1)
+    assert report["max_abs_diff"] < 1e-4 and report["argmax_agreement"] > 0.999
@@ -0,0 +1,117 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import pytest
+from lib.configs import LazyTask, LazyTaskConfig, TaskManifest, discover_configs
+
+from monailabel.interfaces.exception import MONAILabelException
+from monailabel.interfaces.tasks.infer_v2 import InferType
+
+CONFIGS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lib", "configs")
+
+
+class Task:
+    def __init__(self, path):
+        self.path = [path]
+
+    def info(self):
+        return {"type": InferType.SEGMENTATION, "labels": {"defect": 1}, "dimension": 3, "description": "weld"}
+
+    def is_valid(self):
+        return os.path.exists(self.path[0])
+
+    def __call__(self, request):
+        return request["image"], {}
+
+
+class Factory:
+    def __init__(self, task):
+        self.task = task
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if isinstance(self.task, Exception):
+            raise self.task
+        return self.task
+
+
+def test_discover_configs_describes_tasks():
+    configs = discover_configs(CONFIGS)
+    assert configs["deepedit_weld"].cls == "DeepEditWeldConfig"
+    assert configs["deepgrow_2d"].dimension == 2 and configs["deepgrow_2d"].infer_type == InferType.DEEPGROW
+    assert configs["sw_fastedit"].infer_type == InferType.DEEPEDIT
+
+    weld = LazyTaskConfig("deepedit_weld", configs["deepedit_weld"], "/models", {}, None)
+    info = weld.describe("infer")
+    assert info["type"] == InferType.SEGMENTATION and info["dimension"] == 3
+    assert info["labels"] == {"background": 0, "defect": 1}
+    assert weld.describe("train")["labels"] == info["labels"]
+    assert not weld.built
+
+    # labels from the conf: described by building the task
+    assert configs["segmentation"].labels is None
+    assert LazyTaskConfig("segmentation", configs["segmentation"], "/models", {}, None).describe("infer") is None
+
+
+def test_task_manifest(tmp_path):
+    path = str(tmp_path / "models" / ".task_manifest.json")
+    manifest = TaskManifest(path)
+    assert manifest.get("infer:weld", "a") is None
+
+    manifest.put("infer:weld", "a", {"available": True, "info": {"description": "weld"}})
+    assert manifest.get("infer:weld", "a")["info"] == {"description": "weld"}
+    assert manifest.get("infer:weld", "b") is None  # other config / code / conf
+
+    assert TaskManifest(path).get("infer:weld", "a")["available"]
+    with open(path, "w") as fc:
+        fc.write("{")
+    assert TaskManifest(path).get("infer:weld", "a") is None
+
+
+def test_lazy_task_builds_once_and_saves_manifest(tmp_path):
+    model = tmp_path / "weld.pt"
+    manifest = TaskManifest(str(tmp_path / ".task_manifest.json"))
+    factory = Factory(Task(str(model)))
+
+    # no manifest entry and nothing known of the config: built on the first info()
+    task = LazyTask("weld", factory, "infer", manifest, "a")
+    assert task.info()["description"] == "weld" and factory.calls == 1
+    assert not task.is_valid()
+    assert task({"image": "x"}) == ("x", {}) and factory.calls == 1
+
+    # next run: answered from the manifest, the model file is checked again
+    factory = Factory(Task(str(model)))
+    task = LazyTask("weld", factory, "infer", manifest, "a", describe={"description": "source"})
+    assert task.info()["type"] == InferType.SEGMENTATION and task.labels == {"defect": 1}
+    assert not task.is_valid() and task.get_path() is None
+    model.write_bytes(b"")
+    assert task.is_valid() and task.get_path() == str(model)
+    assert factory.calls == 0 and not task.built
+
+    # another stamp (config changed): the source description until it is built again
+    task = LazyTask("weld", factory, "infer", manifest, "b", describe={"description": "source", "config": {}})
+    assert task.description == "source" and task.config() == {} and factory.calls == 0
+
+
+def test_lazy_task_missing_or_failing(tmp_path):
+    manifest = TaskManifest(str(tmp_path / ".task_manifest.json"))
+    missing = LazyTask("weld", Factory(None), "train", manifest, "a")
+    assert missing.available and missing.get() is None
+    assert not missing.available and missing.stats() == {}
+    assert not LazyTask("weld", Factory(None), "train", manifest, "a").available  # known from the manifest
+
+    failing = LazyTask("weld", Factory(RuntimeError("no weights")), "infer", manifest, "a")
+    assert failing.info()["description"] == "RuntimeError: no weights"
+    with pytest.raises(MONAILabelException, match="no weights"):
+        failing({"image": "x"})
@@ -0,0 +1,133 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import time
+
+from lib.datastore.results import CachedInferTask, ResultCache, model_digest
+
+
+class Task:
+    """Infer task writing a label and an extra (explain) file per call, as the server hands them out."""
+
+    def __init__(self, path, out_dir):
+        self.path = [path]
+        self.out_dir = out_dir
+        self.calls = 0
+        self.labels = {"defect": 1}
+
+    def __call__(self, request, callbacks=None):
+        self.calls += 1
+        label = os.path.join(self.out_dir, f"label_{self.calls}.nii.gz")
+        explain = os.path.join(self.out_dir, f"explain_{self.calls}.nii.gz")
+        for path, text in ((label, f"label {request['image']}"), (explain, "explain")):
+            with open(path, "w") as fc:
+                fc.write(text)
+        return label, {"label_names": self.labels, "explain": {"cam": explain}}
+
+
+def write(path, text):
+    with open(path, "w") as fc:
+        fc.write(text)
+    return str(path)
+
+
+def read(path):
+    with open(path) as fc:
+        return fc.read()
+
+
+def test_result_cache_key(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    image = write(tmp_path / "weld.nii.gz", "image")
+    key = cache.key("weld", {"image": image, "threshold": 0.5}, "m1")
+
+    volatile = {"image": image, "threshold": 0.5, "device": "cpu", "client_id": "x", "result_cache": True}
+    assert cache.key("weld", volatile, "m1") == key
+    assert cache.key("weld", {"threshold": 0.5, "image": write(tmp_path / "copy.nii.gz", "image")}, "m1") == key
+
+    assert cache.key("weld", {"image": image, "threshold": 0.6}, "m1") != key
+    assert cache.key("weld", {"image": image, "threshold": 0.5}, "m2") != key
+    assert cache.key("other", {"image": image, "threshold": 0.5}, "m1") != key
+    assert cache.key("weld", {"image": write(tmp_path / "weld.nii.gz", "new image"), "threshold": 0.5}, "m1") != key
+
+    assert cache.key("weld", {"image": str(tmp_path)}, "m1") is None  # DICOM folder
+    assert cache.key("weld", {"image": [1, 2]}, "m1") is None
+
+
+def test_cached_infer_task(tmp_path):
+    out = tmp_path / "out"
+    out.mkdir()
+    model = write(tmp_path / "weld.pt", "weights")
+    image = write(tmp_path / "image.nii.gz", "image")
+    task = Task(model, str(out))
+    cached = CachedInferTask("weld", task, ResultCache(str(tmp_path / "cache")))
+    assert cached.labels == task.labels
+
+    label, result = cached({"image": image})
+    assert result["result_cache"] == {"hit": False} and task.calls == 1
+    for f in os.listdir(out):  # the server removes the files it sent
+        os.remove(out / f)
+
+    label, result = cached({"image": image, "client_id": "other"})
+    assert task.calls == 1 and result["result_cache"]["hit"]
+    assert read(label) == f"label {image}" and read(result["explain"]["cam"]) == "explain"
+    assert result["label_names"] == {"defect": 1}
+    assert cached.cache.stats()["hits"] == 1
+
+    # opted out, or not a file result: the task runs
+    cached({"image": image, "result_cache": "false"})
+    cached({"image": image, "result_write_to_file": False})
+    assert task.calls == 3
+
+    # a model exported next to the checkpoint is part of the digest: new model, entries of the old one removed
+    digest = model_digest(task)
+    write(tmp_path / "weld.onnx", "exported")
+    assert model_digest(task) != digest
+    label, result = cached({"image": image})
+    assert task.calls == 4 and not result["result_cache"]["hit"]
+    assert cached.cache.stats()["entries"] == 1
+
+    # entries are kept across restarts
+    cached = CachedInferTask("weld", task, ResultCache(str(tmp_path / "cache")))
+    assert cached({"image": image})[1]["result_cache"]["hit"] and task.calls == 4
+
+
+def test_result_cache_lru_and_versions(tmp_path):
+    folder = tmp_path / "cache"
+    source = write(tmp_path / "label.nii.gz", "x" * 40000)
+    cache = ResultCache(str(folder), max_mb=0.1)  # room for two entries
+
+    cache.put("a", "weld", "m1", source, {})
+    time.sleep(0.01)
+    cache.put("b", "weld", "m1", source, {})
+    time.sleep(0.01)
+    assert cache.get("a") is not None  # b is now the least recently used
+    time.sleep(0.01)
+    cache.put("c", "weld", "m1", source, {})
+    assert sorted(os.listdir(folder)) == ["a", "c"] and cache.nbytes <= 0.1 * 2**20
+
+    # an entry larger than the budget is kept alone
+    cache.put("d", "weld", "m1", write(tmp_path / "big.nii.gz", "x" * 200000), {})
+    assert os.listdir(folder) == ["d"] and cache.stats()["entries"] == 1
+
+    # only the entries of the task with another model are invalidated
+    cache.put("e", "other", "m1", None, {"ok": True})
+    cache.invalidate("weld", "m2")
+    assert os.listdir(folder) == ["e"] and cache.get("e") == (None, {"ok": True})
+
+    # entries of another cache version are dropped on start
+    with open(folder / "e" / "meta.json") as fc:
+        meta = json.load(fc)
+    with open(folder / "e" / "meta.json", "w") as fc:
+        json.dump({**meta, "version": -1}, fc)
+    assert ResultCache(str(folder)).stats()["entries"] == 0 and not os.listdir(folder)
@@ -0,0 +1,149 @@
+# Copyright (c) MONAI Consortium
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#     http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+import torch
+from conftest import random_blobs
+from lib.transforms.transforms import LABELS_KEY, AddGuidanceSignal, DefectStatisticsd, label_centroids
+from monai.data import MetaTensor
+from monai.networks.layers import GaussianFilter
+from scipy import ndimage
+
+
+def centroids_where(label, min_size=0):
+    """Previous implementation: one ``np.where`` per label."""
+    out = {}
+    for c in np.unique(label):
+        if c == 0:
+            continue
+        indices = np.where(label == c)
+        if len(indices[0]) < max(min_size, 1):
+            continue
+        out[int(c)] = (len(indices[0]), [np.average(i).astype(int) for i in indices[-3:]])
+    return out
+
+
+@pytest.mark.parametrize("as_tensor", [False, True])
+@pytest.mark.parametrize("min_size", [0, 40])
+def test_label_centroids_matches_where(as_tensor, min_size):
+    label = random_blobs((33, 29, 21), labels=5, blobs=2, seed=3)[None]
+    expected = centroids_where(label, min_size)
+    assert expected  # some labels are above min_size
+
+    x = MetaTensor(torch.as_tensor(label)) if as_tensor else label
+    labels, counts, centres = label_centroids(x, min_size=min_size, slab=4)
+    if as_tensor:
+        assert all(isinstance(t, torch.Tensor) for t in (labels, counts, centres))
+        labels, counts, centres = labels.numpy(), counts.numpy(), centres.numpy()
+
+    assert labels.tolist() == sorted(expected)
+    for lbl, count, centre in zip(labels, counts, centres):
+        assert count == expected[lbl][0]
+        assert centre.tolist() == expected[lbl][1]
+
+
+def test_label_centroids_empty():
+    labels, counts, centres = label_centroids(np.zeros((8, 8, 8), dtype=np.uint8))
+    assert len(labels) == len(counts) == 0 and centres.shape == (0, 3)
+
+
+def signal_filtered(shape, clicks, sigma, disks=False):
+    """Previous implementation: click map filtered with ``GaussianFilter`` and min-max normalized."""
+    signal = torch.zeros(shape)
+    for point in clicks:
+        if any(p < 0 for p in point):
+            continue
+        signal[tuple(max(0, min(int(p), s - 1)) for p, s in zip(point[-len(shape) :], shape))] = 1.0
+    if sigma != 0:
+        signal = GaussianFilter(len(shape), sigma=sigma)(signal[None, None])[0, 0]
+    signal = (signal - signal.min()) / (signal.max() - signal.min())
+    return (signal > 0.1) * 1.0 if disks else signal
+
+
+@pytest.mark.parametrize("sigma", [0, 1, 3])
+@pytest.mark.parametrize("disks", [False, True])
+def test_guidance_signal_matches_gaussian_filter(sigma, disks):
+    shape = (24, 20, 18)
+    # near the border, clamped outside, repeated, ignored (-1) and overlapping clicks
+    clicks = {
+        "weld": [[1, 1, 1], [5, 6, 7], [5, 6, 7], [30, 10, 4], [6, 7, 8]],
+        "defect": [[-1, -1, -1], [12, 18, 17]],
+        "background": [],
+    }
+    transform = AddGuidanceSignal(keys="image", sigma=sigma, disks=disks)
+    image = torch.rand(1, *shape)
+    data = {"image": image.clone(), LABELS_KEY: {k: i for i, k in enumerate(clicks)}, **clicks}
+    out = transform(data)["image"]
+
+    assert out.shape == (4, *shape)
+    torch.testing.assert_close(out[0], image[0])
+    torch.testing.assert_close(out[1], signal_filtered(shape, clicks["weld"], sigma, disks), atol=1e-5, rtol=0)
+    torch.testing.assert_close(out[2], signal_filtered(shape, clicks["defect"], sigma, disks), atol=1e-5, rtol=0)
+    assert not out[3].any()
+
+
+def test_guidance_signal_2d():
+    transform = AddGuidanceSignal(keys="image", sigma=2)
+    idx, values = transform.sparse_signal((16, 16), torch.tensor([[3, 4], [15, 0]]))
+    signal = torch.zeros(16, 16)
+    signal[tuple(idx.T)] = values
+    torch.testing.assert_close(signal, signal_filtered((16, 16), [[3, 4], [15, 0]], 2), atol=1e-5, rtol=0)
+
+
+def defects_loop(mask, spacing, image, seam_threshold, connectivity):
+    """Reference: one pass over the voxels of every component."""
+    components, n = ndimage.label(mask, structure=ndimage.generate_binary_structure(3, connectivity))
+    seam = ndimage.binary_fill_holes((image > seam_threshold) | mask)
+    depth = ndimage.distance_transform_edt(seam, sampling=spacing)
+    rows = []
+    for i in range(1, n + 1):
+        coords = np.argwhere(components == i)
+        lo, hi = coords.min(0), coords.max(0)
+        rows.append(
+            {
+                "voxels": len(coords),
+                "bbox_min": lo.tolist(),
+                "bbox_max": hi.tolist(),
+                "max_dim_mm": float(((hi - lo + 1) * spacing).max()),
+                "centroid": np.round(coords.mean(0), 2).tolist(),
+                "distance_to_surface_mm": float(depth[components == i].min()),
+            }
+        )
+    return rows
+
+
+@pytest.mark.parametrize("connectivity", [1, 3])
+def test_defect_statistics_matches_loop(connectivity):
+    spacing = np.array([0.5, 0.5, 1.5])
+    pred = random_blobs((30, 28, 16), labels=2, blobs=8, seed=4)
+    pred[10, 10, 8] = pred[11, 11, 9] = 1  # only 26-connected
+    image = np.zeros(pred.shape, dtype=np.float32)
+    image[3:27, 3:25, 2:14] = 1.0  # the seam
+
+    meta_image = MetaTensor(torch.as_tensor(image)[None], affine=torch.diag(torch.tensor([*spacing, 1.0])))
+    t = DefectStatisticsd(keys="pred", defect_label=1, connectivity=connectivity)
+    stats = t({"pred": torch.as_tensor(pred)[None], "image": meta_image})["result"]["defects"]
+
+    expected = defects_loop(pred == 1, spacing, image, 0.5, connectivity)
+    assert stats["count"] == len(expected)
+    assert stats["spacing"] == spacing.tolist()
+    assert stats["total_mm3"] == pytest.approx((pred == 1).sum() * spacing.prod())
+    assert stats["id"] == list(range(1, len(expected) + 1))
+    for key in expected[0]:
+        np.testing.assert_allclose(stats[key], [row[key] for row in expected], err_msg=key)
+    assert stats["volume_mm3"] == pytest.approx([row["voxels"] * spacing.prod() for row in expected])
+
+
+def test_defect_statistics_no_defects():
+    t = DefectStatisticsd(keys="pred", image_key="missing")
+    stats = t({"pred": np.zeros((1, 8, 8, 8), dtype=np.int64)})["result"]["defects"]
+    assert stats == {"count": 0, "spacing": [1.0, 1.0, 1.0], "total_mm3": 0.0}